@@ -18,6 +18,7 @@ Or after installing:
 import asyncio
 import signal
 import sys
+import time
 
 from src.utils.config import get_config
 from src.utils.logger import logger, Logger
@@ -76,10 +77,11 @@ async def main():
         from src.slack.handlers import register_handlers
         register_handlers(app, agent)
 
-        # 8. Optionally index channels on startup
+        # 8. Optionally index channels on startup, then periodically
         if config.rag.messages_per_channel > 0:
             main_logger.info("Starting background channel indexing...")
             asyncio.create_task(_background_index(rag))
+            rag.schedule_reindex(scheduler)
 
         # 9. Start the Socket Mode handler
         main_logger.info("Starting Socket Mode connection...")
@@ -90,7 +92,7 @@ async def main():
         for sig in (signal.SIGINT, signal.SIGTERM):
             loop.add_signal_handler(
                 sig,
-                lambda: asyncio.create_task(_shutdown(handler, scheduler))
+                lambda: asyncio.create_task(_shutdown(handler, scheduler, rag))
             )
 
         main_logger.info("MiniClawd Bot is running! Press Ctrl+C to stop.")
@@ -107,7 +109,8 @@ async def _background_index(rag):
     """
     Run background indexing of channels.
 
-    This indexes all channels the bot is a member of.
+    This indexes all channels the bot is a member of, then (if
+    RAG_BACKFILL_DAYS is set) backfills their older history.
     """
     try:
         # Wait a bit for Slack connection to stabilize
@@ -123,23 +126,36 @@ async def _background_index(rag):
         else:
             main_logger.info("No channels to index (bot not in any channels)")
 
+        backfill_days = get_config().rag.backfill_days
+        if channels and backfill_days > 0:
+            main_logger.info(f"Backfilling {backfill_days} days of channel history...")
+            since = time.time() - backfill_days * 86_400
+            total = 0
+            for channel in channels:
+                total += await rag.backfill_channel(channel["id"], channel["name"], since=since)
+            main_logger.info(f"Backfilled {total} messages across {len(channels)} channels")
+
     except Exception as e:
         main_logger.error("Background indexing failed", e)
 
 
-async def _shutdown(handler, scheduler):
+async def _shutdown(handler, scheduler, rag):
     """
     Graceful shutdown handler.
 
     Args:
         handler: The Socket Mode handler
         scheduler: The task scheduler
+        rag: The RAG manager
     """
     main_logger.info("Shutting down...")
 
     # Stop the scheduler
     scheduler.stop()
 
+    # Store messages still queued by the live indexer
+    await rag.close()
+
     # Close the socket connection
     await handler.close_async()
 
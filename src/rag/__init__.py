@@ -12,8 +12,23 @@ exceed token limits), RAG:
 
 Components:
 - embeddings.py: Generate vector embeddings from text
+- backends.py: Embedding providers (OpenAI API, local hashing encoder)
+- embedding_cache.py: Persistent (SQLite) + in-memory embedding cache
+- batching.py: Chunked, concurrent, rate-limit-aware embedding requests
 - vectorstore.py: Store and search vectors
+- sharded.py: Per-channel (or hashed) shards of the vector store
+- segments.py: Append-only on-disk format for the vector store
+- ann.py: Approximate nearest-neighbour indexes (IVF-Flat)
+- rowstore.py: In-memory embedding rows (float32 or int8-quantized)
+- metadata_index.py: Inverted indexes for filtered search
+- lexical.py: BM25 keyword index and rank fusion for hybrid search
+- ranking.py: Recency decay and channel boosts on top of similarity
+- query_cache.py: Exact + semantic cache of search results
+- benchmarks/: Recall/latency benchmarks and round-trip checks (python -m src.rag.benchmarks)
+- chunking.py: Group messages into conversation and thread documents
+- dedup.py: MinHash near-duplicate detection before embedding
 - indexer.py: Index Slack channels in the background
+- live.py: Index new, edited and deleted messages from Slack events
 
 How RAG Works:
 1. During indexing: Messages are converted to vectors and stored
@@ -27,18 +42,31 @@ Why RAG?
 - Efficient - only load what's needed
 """
 
+import asyncio
+import time
 from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
+from src.rag.ann import ANNIndex, IVFFlatIndex
+from src.rag.backends import EmbeddingBackend, HashingBackend, OpenAIBackend, create_backend
 from src.rag.embeddings import EmbeddingGenerator
-from src.rag.vectorstore import VectorStore, VectorDocument
 from src.rag.indexer import ChannelIndexer
+from src.rag.lexical import BM25Index, is_keyword_query
+from src.rag.live import LiveIndexer
+from src.rag.query_cache import QueryCache, QueryCacheStats
+from src.rag.ranking import Ranking, parse_channel_boosts
+from src.rag.sharded import ShardedVectorStore
+from src.rag.vectorstore import VectorDocument, VectorStore
 from src.utils.config import get_config
 from src.utils.logger import Logger
 
 if TYPE_CHECKING:
     from slack_sdk.web.async_client import AsyncWebClient
 
+    from src.tools.scheduler import TaskScheduler
+
 logger = Logger("RAG")
 
 
@@ -53,7 +81,11 @@ class RAGResult:
         channel_name: Human-readable channel name
         author: The user who sent the message
         timestamp: When the message was sent
-        score: Similarity score (0-1, higher is more similar)
+        score: Ranking score (higher is better). Only comparable within
+            one search: in vector mode it is the cosine similarity, in
+            hybrid mode a reciprocal rank fusion score (at most about 0.03
+            per ranking); either way multiplied by the recency and channel
+            weights (see ranking.py)
     """
     content: str
     channel: str
@@ -63,6 +95,32 @@ class RAGResult:
     score: float
 
 
+@dataclass
+class ReindexStats:
+    """
+    Summary of one periodic re-index run.
+
+    Attributes:
+        started_at: When the run started
+        duration: Wall-clock seconds
+        channels_checked: Channels the bot is a member of
+        channels_skipped: Channels with no activity since their cursor
+        channels_indexed: Channels that were fetched and indexed
+        messages: Messages added to the store
+    """
+    started_at: datetime
+    duration: float
+    channels_checked: int
+    channels_skipped: int
+    channels_indexed: int
+    messages: int
+
+    @property
+    def messages_per_second(self) -> float:
+        """Indexing throughput of the run."""
+        return self.messages / self.duration if self.duration > 0 else 0.0
+
+
 class RAGManager:
     """
     Main interface for the RAG system.
@@ -95,24 +153,120 @@ class RAGManager:
         """
         config = get_config()
 
-        self.embeddings = EmbeddingGenerator(
+        data_dir = config.memory.directory.parent / "data"
+
+        cache_path = None
+        if config.rag.embedding_cache_mb > 0:
+            cache_path = data_dir / "embedding_cache.db"
+
+        backend = create_backend(
+            config.rag.embedding_backend,
             api_key=config.openai.api_key,
-            model=config.openai.embedding_model
+            model=config.openai.embedding_model,
+            dim=config.rag.embedding_local_dim
         )
 
-        self.vectorstore = VectorStore(
-            storage_path=config.memory.directory.parent / "data" / "vectorstore"
+        self.embeddings = EmbeddingGenerator(
+            api_key=config.openai.api_key,
+            backend=backend,
+            cache_path=cache_path,
+            cache_max_bytes=config.rag.embedding_cache_mb * 1024 * 1024,
+            cache_memory_bytes=config.rag.embedding_memory_cache_mb * 1024 * 1024,
+            cache_ttl_seconds=config.rag.embedding_cache_ttl_hours * 3600 or None,
+            batch_size=config.rag.embedding_batch_size,
+            batch_tokens=config.rag.embedding_batch_tokens,
+            concurrency=config.rag.embedding_concurrency,
+            max_retries=config.rag.embedding_max_retries,
+            batch_window=config.rag.embedding_batch_window_ms / 1000
         )
 
+        def open_store(path: Path) -> VectorStore:
+            """Open a vector store (the whole store, or one shard)."""
+            index = None
+            if config.rag.ann_index == "ivf":
+                index = IVFFlatIndex(nprobe=config.rag.ann_nprobe)
+
+            return VectorStore(
+                storage_path=path,
+                index=index,
+                compression=config.rag.vector_compression,
+                rerank_factor=config.rag.rerank_factor,
+                compact_threshold=config.rag.compact_dead_percent / 100,
+                lexical_index=BM25Index() if config.rag.search_mode == "hybrid" else None,
+                model=self.embeddings.model,
+                # The store is rebuilt from Slack, so switching models just re-indexes
+                reset_on_model_change=True
+            )
+
+        self.vectorstore: VectorStore | ShardedVectorStore
+        if config.rag.shard_by == "none":
+            self.vectorstore = open_store(data_dir / "vectorstore")
+        else:
+            self.vectorstore = ShardedVectorStore(
+                data_dir / "vectorstore_shards",
+                open_store,
+                shard_by=config.rag.shard_by,
+                num_shards=config.rag.shard_count,
+                max_loaded_shards=config.rag.max_loaded_shards,
+                workers=config.rag.shard_search_threads,
+                model=self.embeddings.model,
+                reset_on_model_change=True
+            )
+
         self.indexer = ChannelIndexer(
             slack_client=slack_client,
             embeddings=self.embeddings,
             vectorstore=self.vectorstore,
             messages_per_channel=config.rag.messages_per_channel,
-            min_message_length=config.rag.min_message_length
+            min_message_length=config.rag.min_message_length,
+            window_chars=config.rag.chunk_window_chars,
+            standalone_chars=config.rag.chunk_standalone_chars,
+            window_overlap=config.rag.chunk_overlap,
+            window_gap_seconds=config.rag.chunk_max_gap_minutes * 60,
+            index_threads=config.rag.index_threads,
+            dedup_threshold=config.rag.dedup_threshold_percent / 100,
+            state_file=data_dir / "index_cursors.json",
+            fetch_concurrency=config.rag.index_fetch_concurrency,
+            embed_concurrency=config.rag.index_embed_concurrency,
+            queue_size=config.rag.index_queue_size,
+            flush_size=config.rag.index_flush_size
         )
 
+        # Real-time indexing from message events (None = disabled)
+        self.live: LiveIndexer | None = None
+        if config.rag.live_index:
+            self.live = LiveIndexer(
+                self.indexer,
+                batch_window=config.rag.live_index_window_ms / 1000,
+                max_batch=config.rag.live_index_batch_size
+            )
+
+        # Search results, reused until the store changes or they expire
+        # (None = disabled)
+        self.query_cache: QueryCache | None = None
+        if config.rag.query_cache_size > 0:
+            self.query_cache = QueryCache(
+                max_entries=config.rag.query_cache_size,
+                similarity_threshold=config.rag.query_cache_similarity_percent / 100 or None,
+                ttl_seconds=config.rag.query_cache_ttl_minutes * 60 or None
+            )
+
+        # Recency / channel weighting applied to every search
+        self.ranking = Ranking(
+            mode=config.rag.ranking_mode,
+            half_life_hours=config.rag.recency_half_life_hours,
+            floor=config.rag.recency_floor_percent / 100,
+            channel_boosts=parse_channel_boosts(config.rag.channel_boosts)
+        )
+        self._max_age = config.rag.max_age_days * 86400 or None
+
+        self._hybrid = config.rag.search_mode == "hybrid"
         self._index_frequency_hours = config.rag.index_frequency_hours
+        self._reindex_stagger_seconds = config.rag.reindex_stagger_seconds
+        self._fetch_concurrency = config.rag.index_fetch_concurrency
+
+        # Results of the most recent periodic re-index
+        self.last_reindex: ReindexStats | None = None
 
         logger.info("RAG system initialized")
 
@@ -120,48 +274,194 @@ class RAGManager:
         self,
         query: str,
         top_k: int = 10,
-        channel_filter: str | None = None
+        channel_filter: str | None = None,
+        since: float | None = None
     ) -> list[RAGResult]:
         """
         Search for messages similar to the query.
 
         Uses semantic search to find messages that are conceptually
         similar to the query, even if they don't share exact words.
+        In hybrid mode, keyword (BM25) matches are fused in, and queries
+        made only of identifiers (ticket numbers, error codes) are answered
+        from the keyword index without embedding the query. Repeated and
+        near-identical questions are served from the query cache until the
+        store changes or the entry expires. Scores include the configured recency decay and
+        channel boosts; messages older than RAG_MAX_AGE_DAYS are skipped.
 
         Args:
             query: The search query
             top_k: Maximum number of results to return
             channel_filter: Optional channel ID to limit search to
+            since: Optional epoch timestamp; only messages after it are searched
 
         Returns:
             List of RAGResult objects, sorted by relevance
         """
         logger.debug(f"RAG search: '{query[:50]}...'")
 
-        # Generate embedding for the query
-        query_embedding = await self.embeddings.generate(query)
+        rag_results = (await self.search_many([query], top_k, channel_filter, since))[0]
 
-        # Search the vector store
-        results = self.vectorstore.search(
-            query_vector=query_embedding,
-            top_k=top_k,
-            filter_metadata={"channel": channel_filter} if channel_filter else None
-        )
+        logger.debug(f"Found {len(rag_results)} results")
+        return rag_results
+
+    async def search_many(
+        self,
+        queries: list[str],
+        top_k: int = 10,
+        channel_filter: str | None = None,
+        since: float | None = None
+    ) -> list[list[RAGResult]]:
+        """
+        Search for several queries at once.
+
+        Useful when fanning out sub-questions or expanding a summary request.
+        All queries are embedded with one generate_batch() call and scored
+        against the store in a single matrix-matrix product.
 
-        # Convert to RAGResults
-        rag_results = []
-        for doc in results:
-            rag_results.append(RAGResult(
+        Args:
+            queries: The search queries
+            top_k: Maximum number of results per query
+            channel_filter: Optional channel ID to limit search to
+            since: Optional epoch timestamp; only messages after it are searched
+
+        Returns:
+            One list of RAGResult objects per query (same order)
+        """
+        if not queries:
+            return []
+
+        if len(queries) > 1:
+            logger.debug(f"RAG batch search: {len(queries)} queries")
+
+        # Repeated questions are answered before anything is embedded
+        scope = (top_k, channel_filter, since)
+        results: dict[int, list[RAGResult]] = {}
+        if self.query_cache is not None:
+            generation = self.vectorstore.generation
+            for i, query in enumerate(queries):
+                cached = self.query_cache.get(query, scope, generation)
+                if cached is not None:
+                    results[i] = cached
+
+        pending = [i for i in range(len(queries)) if i not in results]
+        if pending:
+            found = await self._search_uncached(
+                [queries[i] for i in pending], top_k, channel_filter, since
+            )
+            for i, rag_results in zip(pending, found):
+                results[i] = rag_results
+
+        return [results[i] for i in range(len(queries))]
+
+    async def _search_uncached(
+        self,
+        queries: list[str],
+        top_k: int,
+        channel_filter: str | None,
+        since: float | None
+    ) -> list[list[RAGResult]]:
+        """
+        Run searches that missed the exact query cache.
+
+        In hybrid mode, keyword-only queries are first tried without an
+        embedding. The rest are embedded, checked against the semantic
+        cache tier, and only then searched in the store (in one batch).
+        """
+        filter_metadata = {"channel": channel_filter} if channel_filter else None
+        scope = (top_k, channel_filter, since)
+        cache = self.query_cache
+
+        results: dict[int, list[RAGResult]] = {}
+
+        if self._hybrid:
+            keyword = [i for i, query in enumerate(queries) if is_keyword_query(query)]
+            if keyword:
+                generation = self.vectorstore.generation
+                found = self.vectorstore.search_hybrid_many(
+                    [queries[i] for i in keyword], [None] * len(keyword), top_k,
+                    filter_metadata=filter_metadata, since=since,
+                    max_age=self._max_age, ranking=self.ranking
+                )
+                answered = 0
+                for i, docs in zip(keyword, found):
+                    if docs:
+                        results[i] = self._to_results(docs)
+                        answered += 1
+                        if cache is not None:
+                            cache.put(queries[i], scope, generation, results[i])
+                logger.debug(
+                    f"Keyword search answered {answered} of {len(queries)} "
+                    f"queries without embedding"
+                )
+
+        embed = [i for i in range(len(queries)) if i not in results]
+        if not embed:
+            return [results[i] for i in range(len(queries))]
+
+        embeddings = await self.embeddings.generate_batch([queries[i] for i in embed])
+        # Read after the await: the store may have changed meanwhile
+        generation = self.vectorstore.generation
+
+        vectors: dict[int, list[float]] = {}
+        for i, embedding in zip(embed, embeddings):
+            similar = None
+            if cache is not None:
+                similar = cache.get_similar(queries[i], embedding, scope, generation)
+            if similar is not None:
+                results[i] = similar
+            else:
+                vectors[i] = embedding
+
+        if not vectors:
+            return [results[i] for i in range(len(queries))]
+
+        if self._hybrid:
+            found = self.vectorstore.search_hybrid_many(
+                [queries[i] for i in vectors], list(vectors.values()), top_k,
+                filter_metadata=filter_metadata, since=since,
+                max_age=self._max_age, ranking=self.ranking
+            )
+        else:
+            found = self.vectorstore.search_many(
+                query_vectors=list(vectors.values()),
+                top_k=top_k,
+                filter_metadata=filter_metadata,
+                since=since,
+                max_age=self._max_age,
+                ranking=self.ranking
+            )
+
+        for (i, embedding), docs in zip(vectors.items(), found):
+            results[i] = self._to_results(docs)
+            if cache is not None:
+                cache.put(queries[i], scope, generation, results[i], embedding)
+
+        return [results[i] for i in range(len(queries))]
+
+    def get_query_cache_stats(self) -> QueryCacheStats | None:
+        """
+        Get query result cache statistics.
+
+        Returns:
+            QueryCacheStats with hits per tier, misses and the hit rate
+            (None if the cache is disabled)
+        """
+        return self.query_cache.stats() if self.query_cache is not None else None
+
+    def _to_results(self, docs: list[VectorDocument]) -> list[RAGResult]:
+        """Convert vector store documents to RAGResults."""
+        return [
+            RAGResult(
                 content=doc.content,
                 channel=doc.metadata.get("channel", "unknown"),
                 channel_name=doc.metadata.get("channel_name", "unknown"),
                 author=doc.metadata.get("author", "unknown"),
                 timestamp=doc.metadata.get("timestamp", ""),
                 score=doc.score or 0.0
-            ))
-
-        logger.debug(f"Found {len(rag_results)} results")
-        return rag_results
+            )
+            for doc in docs
+        ]
 
     async def index_channel(
         self,
@@ -183,6 +483,29 @@ class RAGManager:
         """
         return await self.indexer.index_channel(channel_id, channel_name)
 
+    async def backfill_channel(
+        self,
+        channel_id: str,
+        channel_name: str,
+        since: float | None = None,
+        max_messages: int | None = None
+    ) -> int:
+        """
+        Index a channel's deep history, page by page (resumable).
+
+        Args:
+            channel_id: The Slack channel ID
+            channel_name: Human-readable channel name
+            since: Don't go further back than this epoch timestamp
+            max_messages: Stop after this many messages (resumes next call)
+
+        Returns:
+            Number of messages indexed
+        """
+        return await self.indexer.backfill_channel(
+            channel_id, channel_name, since=since, max_messages=max_messages
+        )
+
     async def index_all_channels(
         self,
         channels: list[dict]
@@ -198,6 +521,109 @@ class RAGManager:
         """
         return await self.indexer.index_multiple(channels)
 
+    def handle_message_event(self, event: dict[str, Any]) -> bool:
+        """
+        Index a Slack `message` event in near real time.
+
+        New messages are added, edits (message_changed) replace the
+        document and deletes (message_deleted) remove it. Returns
+        immediately; events are embedded and stored in micro-batches.
+
+        Args:
+            event: The Slack event payload
+
+        Returns:
+            True if the event was queued for indexing
+        """
+        if self.live is None:
+            return False
+        return self.live.submit(event)
+
+    async def close(self) -> None:
+        """Flush queued live events and close the embedding cache."""
+        if self.live is not None:
+            await self.live.close()
+        self.embeddings.close()
+        if isinstance(self.vectorstore, ShardedVectorStore):
+            self.vectorstore.close()
+
+    def schedule_reindex(self, scheduler: "TaskScheduler") -> bool:
+        """
+        Re-index channels every index_frequency_hours.
+
+        Args:
+            scheduler: The bot's task scheduler
+
+        Returns:
+            True if a job was scheduled (False if the frequency is 0)
+        """
+        if self._index_frequency_hours <= 0:
+            return False
+
+        scheduler.schedule_interval(
+            "rag_reindex",
+            self.reindex,
+            timedelta(hours=self._index_frequency_hours)
+        )
+        return True
+
+    async def reindex(self) -> ReindexStats:
+        """
+        Re-index every channel with new activity.
+
+        Channels whose latest message (conversations.info) is not newer
+        than their cursor are skipped without fetching history. Active
+        channels are indexed in groups, with reindex_stagger_seconds
+        between groups so a large workspace doesn't hit Slack and the
+        embedding API all at once.
+
+        Returns:
+            ReindexStats for the run (also kept in last_reindex)
+        """
+        started_at = datetime.now()
+        start = time.perf_counter()
+
+        channels = await self.indexer.get_indexable_channels()
+
+        active = []
+        for channel in channels:
+            if await self.indexer.has_new_activity(channel["id"]):
+                active.append(channel)
+
+        messages = 0
+        group_size = max(1, self._fetch_concurrency)
+        for i in range(0, len(active), group_size):
+            if i > 0 and self._reindex_stagger_seconds > 0:
+                await asyncio.sleep(self._reindex_stagger_seconds)
+            results = await self.indexer.index_multiple(active[i:i + group_size])
+            messages += sum(results.values())
+
+        stats = ReindexStats(
+            started_at=started_at,
+            duration=time.perf_counter() - start,
+            channels_checked=len(channels),
+            channels_skipped=len(channels) - len(active),
+            channels_indexed=len(active),
+            messages=messages
+        )
+        self.last_reindex = stats
+
+        logger.info(
+            f"Re-index: {stats.messages} messages from {stats.channels_indexed} channels "
+            f"({stats.channels_skipped} unchanged) in {stats.duration:.1f}s "
+            f"({stats.messages_per_second:.1f} msg/s)"
+        )
+
+        cache_stats = self.get_query_cache_stats()
+        if cache_stats is not None:
+            logger.info(
+                f"Query cache: {cache_stats.hit_rate:.0%} hit rate "
+                f"({cache_stats.exact_hits} exact, {cache_stats.semantic_hits} semantic, "
+                f"{cache_stats.misses} misses, {cache_stats.invalidations} invalidations, "
+                f"{cache_stats.expirations} expired)"
+            )
+        return stats
+
     def should_use_rag(self, query: str) -> bool:
         """
         Determine if RAG should be used for this query.
@@ -258,8 +684,20 @@ class RAGManager:
 __all__ = [
     "RAGManager",
     "RAGResult",
+    "ReindexStats",
     "EmbeddingGenerator",
     "VectorStore",
+    "ShardedVectorStore",
     "VectorDocument",
     "ChannelIndexer",
+    "BM25Index",
+    "LiveIndexer",
+    "QueryCache",
+    "QueryCacheStats",
+    "Ranking",
+    "ANNIndex",
+    "IVFFlatIndex",
+    "EmbeddingBackend",
+    "OpenAIBackend",
+    "HashingBackend",
 ]
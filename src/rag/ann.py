@@ -0,0 +1,321 @@
+"""
+Approximate Nearest-Neighbour Indexes
+=====================================
+
+Pluggable ANN indexes that sit behind VectorStore.search.
+
+Why approximate search?
+- Exact search scores every stored vector: O(n * dim) per query
+- At hundreds of thousands of messages, that scan dominates latency
+- An ANN index scores only a small, likely-relevant subset of rows
+- Trade-off: a few true neighbours may be missed (measured as recall@k)
+
+IVF-Flat (Inverted File Index):
+    1. Train: cluster the vectors into n_lists groups with k-means
+       (the "coarse quantizer"); each cluster has a centroid
+    2. Index: store each row's ID in the inverted list of its nearest centroid
+    3. Search: score the query against the centroids, pick the nprobe
+       closest lists, and score only the rows in those lists exactly
+
+    Higher nprobe = better recall, slower search. nprobe = n_lists is
+    equivalent to an exact scan.
+
+All vectors are assumed to be unit-normalized (as in VectorStore), so
+"nearest" means highest dot product and k-means is spherical: centroids are
+re-normalized after every update.
+
+The exact scan in VectorStore remains the fallback (untrained index, metadata
+filters) and the ground truth for measuring recall; see benchmarks/search.py.
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from src.rag.rowstore import RowStorage
+from src.utils.logger import Logger
+
+logger = Logger("ANN")
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Get the indices of the top_k highest scores, best first.
+
+    Uses argpartition (O(n)) to find the candidates and only sorts those,
+    instead of sorting every score.
+    """
+    if top_k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.intp)
+    if top_k < len(scores):
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def top_k_indices_2d(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Row-wise top_k for a (n_queries, n) score matrix, best first.
+
+    Vectorized across queries: one argpartition and one argsort over the
+    whole matrix instead of one per query.
+
+    Returns:
+        Column indices, shape (n_queries, min(top_k, n))
+    """
+    n_queries, n = scores.shape
+    top_k = min(top_k, n)
+    if top_k <= 0:
+        return np.empty((n_queries, 0), dtype=np.intp)
+    if top_k < n:
+        candidates = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+    else:
+        candidates = np.broadcast_to(np.arange(n), (n_queries, n))
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+class ANNIndex(ABC):
+    """
+    Interface for approximate nearest-neighbour indexes.
+
+    An index does not own the vectors - VectorStore keeps the matrix and
+    calls into the index to keep row assignments up to date. At search time
+    the index only proposes candidate rows; the store scores them exactly.
+    """
+
+    @property
+    @abstractmethod
+    def is_trained(self) -> bool:
+        """Whether the index is ready to produce candidates."""
+
+    @abstractmethod
+    def train(self, matrix: np.ndarray | RowStorage) -> bool:
+        """
+        Train the index on the current matrix and index every row.
+
+        Args:
+            matrix: All stored rows (unit-normalized float32), as an array
+                or the store's RowStorage
+
+        Returns:
+            True if the index was trained (False if there are too few rows)
+        """
+
+    @abstractmethod
+    def assign(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """
+        Insert or move rows in the index.
+
+        Args:
+            rows: Row numbers in the store matrix
+            vectors: The (new) vectors for those rows
+        """
+
+    @abstractmethod
+    def rebuild(self, matrix: np.ndarray | RowStorage) -> None:
+        """Re-index every row after the store renumbered its matrix."""
+
+    @abstractmethod
+    def candidates(self, query: np.ndarray) -> np.ndarray:
+        """Get candidate row numbers for a (normalized) query vector."""
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Drop all training and assignments."""
+
+
+class IVFFlatIndex(ANNIndex):
+    """
+    Inverted-file index with an exact ("flat") scan inside each probed list.
+
+    Example:
+        index = IVFFlatIndex(nprobe=8)
+        store = VectorStore(Path("data/vectorstore"), index=index)
+
+        # The index trains itself on first search once the store is large
+        # enough; or train it explicitly:
+        store.build_index()
+
+        results = store.search(query_embedding, top_k=5)
+    """
+
+    def __init__(
+        self,
+        n_lists: int | None = None,
+        nprobe: int = 8,
+        train_iterations: int = 10,
+        min_train_size: int = 1000,
+        max_train_points: int = 50_000,
+        seed: int = 0
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            n_lists: Number of inverted lists (defaults to ~sqrt(n) at train time)
+            nprobe: Number of lists scanned per query
+            train_iterations: k-means iterations
+            min_train_size: Minimum rows before the index trains itself
+            max_train_points: Cap on rows sampled for k-means training
+            seed: Random seed for sampling and initialization
+        """
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.train_iterations = train_iterations
+        self.min_train_size = min_train_size
+        self.max_train_points = max_train_points
+        self._rng = np.random.default_rng(seed)
+
+        self._centroids: np.ndarray | None = None
+        # List number for every row (-1 = not indexed)
+        self._assignments = np.empty(0, dtype=np.int32)
+        # Row numbers per list, plus a cached array version for searching
+        self._lists: list[list[int]] = []
+        self._list_arrays: list[np.ndarray | None] = []
+
+    @property
+    def is_trained(self) -> bool:
+        """Whether the coarse quantizer has been trained."""
+        return self._centroids is not None
+
+    # ==========================================================================
+    # Training
+    # ==========================================================================
+
+    def _kmeans(self, sample: np.ndarray, n_lists: int) -> np.ndarray:
+        """Spherical k-means on unit vectors; returns normalized centroids."""
+        init = self._rng.choice(len(sample), size=n_lists, replace=False)
+        centroids = sample[init].copy()
+
+        for _ in range(self.train_iterations):
+            labels = self._nearest_list(sample, centroids)
+
+            # Group members by cluster with one sort, then sum each group
+            order = np.argsort(labels, kind="stable")
+            bounds = np.searchsorted(labels[order], np.arange(n_lists + 1))
+            counts = np.diff(bounds)
+            sums = np.zeros_like(centroids)
+            for i in np.nonzero(counts)[0]:
+                sums[i] = sample[order[bounds[i]:bounds[i + 1]]].sum(axis=0)
+
+            # Re-seed empty clusters with random points
+            empty = np.nonzero(counts == 0)[0]
+            if len(empty):
+                sums[empty] = sample[self._rng.choice(len(sample), size=len(empty))]
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            centroids = (sums / norms).astype(np.float32)
+
+        return centroids
+
+    @staticmethod
+    def _nearest_list(
+        vectors: np.ndarray | RowStorage,
+        centroids: np.ndarray,
+        chunk_size: int = 16_384
+    ) -> np.ndarray:
+        """Assign each vector to its highest-scoring centroid, in chunks."""
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk_size):
+            block = vectors[start:start + chunk_size]
+            labels[start:start + chunk_size] = np.argmax(block @ centroids.T, axis=1)
+        return labels
+
+    def train(self, matrix: np.ndarray | RowStorage) -> bool:
+        """Train the coarse quantizer and index every row."""
+        n = len(matrix)
+        if n < self.min_train_size:
+            return False
+
+        n_lists = self.n_lists or max(1, int(np.sqrt(n)))
+        n_lists = min(n_lists, n)
+
+        # ~64 points per centroid is plenty for a coarse quantizer
+        sample_size = min(n, max(n_lists, min(64 * n_lists, self.max_train_points)))
+        if sample_size < n:
+            sample = matrix[np.sort(self._rng.choice(n, size=sample_size, replace=False))]
+        else:
+            sample = matrix[:]
+
+        self._centroids = self._kmeans(np.asarray(sample, dtype=np.float32), n_lists)
+        self.rebuild(matrix)
+
+        logger.info(f"Trained IVF index: {n_lists} lists over {n} rows")
+        return True
+
+    # ==========================================================================
+    # Maintenance
+    # ==========================================================================
+
+    def _ensure_capacity(self, size: int) -> None:
+        """Grow the assignments array to hold at least `size` rows."""
+        if size > len(self._assignments):
+            grown = np.full(max(size, 2 * len(self._assignments)), -1, dtype=np.int32)
+            grown[:len(self._assignments)] = self._assignments
+            self._assignments = grown
+
+    def assign(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Insert or move rows to the lists of their nearest centroids."""
+        if self._centroids is None or len(rows) == 0:
+            return
+
+        rows = np.asarray(rows, dtype=np.intp)
+        labels = self._nearest_list(np.atleast_2d(vectors), self._centroids)
+        self._ensure_capacity(int(rows.max()) + 1)
+
+        for row, label in zip(rows.tolist(), labels.tolist()):
+            previous = int(self._assignments[row])
+            if previous == label:
+                continue
+            if previous >= 0:
+                self._lists[previous].remove(row)
+                self._list_arrays[previous] = None
+            self._lists[label].append(row)
+            self._list_arrays[label] = None
+            self._assignments[row] = label
+
+    def rebuild(self, matrix: np.ndarray | RowStorage) -> None:
+        """Re-assign every row of the matrix from scratch."""
+        if self._centroids is None:
+            return
+
+        labels = self._nearest_list(matrix, self._centroids)
+        n_lists = len(self._centroids)
+
+        # Group rows by list with one stable sort instead of per-row appends
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(n_lists + 1))
+
+        self._lists = [order[bounds[i]:bounds[i + 1]].tolist() for i in range(n_lists)]
+        self._list_arrays = [None] * n_lists
+        self._assignments = labels.copy()
+
+    def reset(self) -> None:
+        """Forget the centroids and all assignments."""
+        self._centroids = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._lists = []
+        self._list_arrays = []
+
+    # ==========================================================================
+    # Search
+    # ==========================================================================
+
+    def _list_array(self, list_no: int) -> np.ndarray:
+        """Get (and cache) a list's rows as an array."""
+        array = self._list_arrays[list_no]
+        if array is None:
+            array = np.array(self._lists[list_no], dtype=np.intp)
+            self._list_arrays[list_no] = array
+        return array
+
+    def candidates(self, query: np.ndarray) -> np.ndarray:
+        """Get the rows in the nprobe lists closest to the query."""
+        if self._centroids is None:
+            return np.empty(0, dtype=np.intp)
+
+        probe = top_k_indices(self._centroids @ query, self.nprobe)
+        return np.concatenate([self._list_array(int(i)) for i in probe])
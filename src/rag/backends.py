@@ -0,0 +1,383 @@
+"""
+Embedding Backends
+==================
+
+Pluggable providers that turn text into vectors.
+
+Backends:
+- OpenAIBackend: OpenAI's embedding API (best quality, network round-trip)
+- HashingBackend: Local, in-process encoder (no network, no API key)
+
+Every backend has a `name` that identifies the vector space it produces.
+The name is part of the embedding cache key and is recorded by the vector
+store, so vectors from different backends are never mixed.
+
+How the Hashing Backend Works:
+    1. Features: words, word bigrams and character trigrams of the
+       lowercased text
+    2. Hashing: each feature is hashed to a 64-bit integer (no vocabulary
+       to build or store)
+    3. Weighting: sublinear term frequency, 1 + log(count), scaled per
+       feature type; very common words are skipped
+    4. Projection: each hashed feature adds +/-weight to one of `dim`
+       buckets - a very sparse random projection from the (huge) feature
+       space down to `dim` dimensions
+    5. Normalization: vectors are L2-normalized for cosine similarity
+
+    Texts that share words and word fragments get similar vectors. It is
+    a lexical model - it does not know that "car" and "automobile" mean the
+    same thing - but it needs nothing beyond NumPy and embeds thousands of
+    messages per second.
+
+Vectorized Hashing:
+    A batch of texts is joined into one byte buffer and every feature is
+    hashed with array operations, not a Python loop per feature. A
+    polynomial hash of any substring can be read off prefix sums:
+
+        S[i] = sum(b[j] * Q^j for j <= i)       (Q = inverse of P mod 2^64)
+        hash(b[s:e]) = P^(e-1) * (S[e-1] - S[s-1])
+
+    uint64 arithmetic wraps modulo 2^64 and P is odd, so Q exists and the
+    identity holds exactly. Words, bigrams and trigrams are all substrings
+    of the buffer, so all of them are hashed with a handful of vector ops.
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+
+import numpy as np
+from openai import AsyncOpenAI
+
+# Polynomial hash base (odd, so it is invertible modulo 2^64)
+_P = 0x100000001B3
+_P_INV = pow(_P, -1, 2 ** 64)
+
+# Mixing constant for the final hash (Fibonacci hashing)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+# Feature types: (salt, weight)
+_WORD = (np.uint64(0x1), 1.0)
+_BIGRAM = (np.uint64(0x2), 0.7)
+_TRIGRAM = (np.uint64(0x3), 0.3)
+
+# Words too common to carry meaning on their own
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have i in is it its of on or
+so that the this to was we were will with you
+""".split())
+
+
+class EmbeddingBackend(ABC):
+    """Interface for embedding providers."""
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """Identifier of the vector space (model name and parameters)."""
+
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        """Length of the vectors produced."""
+
+    @abstractmethod
+    async def embed(self, texts: list[str]) -> list[np.ndarray]:
+        """
+        Embed a chunk of texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One float32 vector per text (same order)
+        """
+
+    async def close(self) -> None:
+        """Release any network resources."""
+
+
+class OpenAIBackend(EmbeddingBackend):
+    """Embeddings from OpenAI's API."""
+
+    # Known dimensions for OpenAI models
+    DIMENSIONS = {
+        "text-embedding-3-small": 1536,
+        "text-embedding-3-large": 3072,
+        "text-embedding-ada-002": 1536,
+    }
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "text-embedding-3-small",
+        base_url: str | None = None
+    ):
+        """
+        Initialize the OpenAI backend.
+
+        Args:
+            api_key: OpenAI API key
+            model: Embedding model to use
+            base_url: Alternative OpenAI-compatible endpoint
+        """
+        # Retries are handled by the batcher, not the client
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        self.model = model
+
+    @property
+    def name(self) -> str:
+        """The OpenAI model name."""
+        return self.model
+
+    @property
+    def dimension(self) -> int:
+        """The model's embedding dimension."""
+        return self.DIMENSIONS.get(self.model, 1536)
+
+    async def embed(self, texts: list[str]) -> list[np.ndarray]:
+        """Embed one request-sized chunk via the API."""
+        response = await self.client.embeddings.create(
+            model=self.model,
+            input=texts
+        )
+        # The API reports each item's input position; don't rely on list order
+        data = sorted(response.data, key=lambda d: d.index)
+        return [np.array(d.embedding, dtype=np.float32) for d in data]
+
+    async def close(self) -> None:
+        """Close the HTTP client."""
+        await self.client.close()
+
+
+class HashingBackend(EmbeddingBackend):
+    """
+    Local hashed n-gram encoder with a sparse random projection.
+
+    Example:
+        backend = HashingBackend(dim=512)
+        vectors = backend.encode(["deploy failed on prod", "prod deploy broke"])
+        similarity = float(vectors[0] @ vectors[1])
+    """
+
+    def __init__(self, dim: int = 512):
+        """
+        Initialize the encoder.
+
+        Args:
+            dim: Output dimension (more dimensions = fewer hash collisions)
+        """
+        self.dim = dim
+
+        # Hashes of the stopwords, computed with the same hash as the text
+        self._stopword_hashes = np.sort(self._hash_words(sorted(STOPWORDS)))
+
+    @property
+    def name(self) -> str:
+        """Encoder identifier - changes whenever the vectors would change."""
+        return f"local-hash-v1-{self.dim}"
+
+    @property
+    def dimension(self) -> int:
+        """The output dimension."""
+        return self.dim
+
+    async def embed(self, texts: list[str]) -> list[np.ndarray]:
+        """Embed texts on a worker thread so the event loop stays responsive."""
+        matrix = await asyncio.to_thread(self.encode, texts)
+        return list(matrix)
+
+    # ==========================================================================
+    # Encoding
+    # ==========================================================================
+
+    @staticmethod
+    def _buffer(texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Join lowercased texts into one byte buffer.
+
+        Returns:
+            Tuple of (bytes as uint8, start offset of each text)
+        """
+        encoded = [text.lower().encode("utf-8") for text in texts]
+        lengths = np.array([len(b) + 1 for b in encoded], dtype=np.int64)
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        # "\n" separators keep words from running across texts
+        data = np.frombuffer(b"\n".join(encoded) + b"\n", dtype=np.uint8)
+        return data, starts
+
+    @staticmethod
+    def _prefix_hashes(data: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Compute prefix sums for substring hashing.
+
+        Returns:
+            Tuple of (S, powers) where S[i + 1] = sum(b[j] * Q^j, j <= i)
+            and powers[i] = P^i
+        """
+        n = len(data)
+        powers = np.full(n, _P, dtype=np.uint64)
+        powers[0] = 1
+        powers = np.cumprod(powers, dtype=np.uint64)
+
+        inverse = np.full(n, _P_INV, dtype=np.uint64)
+        inverse[0] = 1
+        inverse = np.cumprod(inverse, dtype=np.uint64)
+
+        prefix = np.zeros(n + 1, dtype=np.uint64)
+        np.cumsum(data.astype(np.uint64) * inverse, dtype=np.uint64, out=prefix[1:])
+        return prefix, powers
+
+    @staticmethod
+    def _substring_hashes(
+        prefix: np.ndarray,
+        powers: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray
+    ) -> np.ndarray:
+        """Polynomial hashes of data[starts[i]:ends[i]] for every i."""
+        hashes: np.ndarray = powers[ends - 1] * (prefix[ends] - prefix[starts])
+        return hashes
+
+    @staticmethod
+    def _mix(hashes: np.ndarray, salt: np.uint64) -> np.ndarray:
+        """Scramble hashes so every bit depends on every input byte."""
+        h = (hashes ^ salt) * _MIX
+        h ^= h >> np.uint64(29)
+        h *= _MIX
+        h ^= h >> np.uint64(32)
+        return h
+
+    def _hash_words(self, words: list[str]) -> np.ndarray:
+        """Hash standalone words (used for the stopword table)."""
+        data, starts = self._buffer(words)
+        prefix, powers = self._prefix_hashes(data)
+        ends = starts + np.array([len(w.encode("utf-8")) for w in words], dtype=np.int64)
+        return self._mix(self._substring_hashes(prefix, powers, starts, ends), _WORD[0])
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """
+        Embed texts synchronously.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Matrix of unit-normalized float32 rows, shape (len(texts), dim)
+        """
+        n = len(texts)
+        if n == 0:
+            return np.zeros((0, self.dim), dtype=np.float32)
+
+        data, text_starts = self._buffer(texts)
+        prefix, powers = self._prefix_hashes(data)
+
+        # Word characters: ASCII letters/digits, "_", and any non-ASCII byte
+        is_word = (
+            ((data >= ord("a")) & (data <= ord("z")))
+            | ((data >= ord("0")) & (data <= ord("9")))
+            | (data == ord("_"))
+            | (data >= 0x80)
+        )
+        edges = np.diff(np.concatenate([[False], is_word, [False]]).astype(np.int8))
+        word_starts = np.flatnonzero(edges == 1)
+        word_ends = np.flatnonzero(edges == -1)
+        word_docs = np.searchsorted(text_starts, word_starts, side="right") - 1
+
+        hash_parts: list[np.ndarray] = []
+        doc_parts: list[np.ndarray] = []
+        weight_parts: list[np.ndarray] = []
+
+        # Words (minus stopwords)
+        words = self._mix(
+            self._substring_hashes(prefix, powers, word_starts, word_ends), _WORD[0]
+        )
+        stop = np.isin(words, self._stopword_hashes)
+        hash_parts.append(words[~stop])
+        doc_parts.append(word_docs[~stop])
+        weight_parts.append(np.full((~stop).sum(), _WORD[1]))
+
+        # Bigrams: from the start of one word to the end of the next (same text)
+        same_text = word_docs[:-1] == word_docs[1:]
+        bigrams = self._mix(
+            self._substring_hashes(
+                prefix, powers, word_starts[:-1][same_text], word_ends[1:][same_text]
+            ),
+            _BIGRAM[0]
+        )
+        hash_parts.append(bigrams)
+        doc_parts.append(word_docs[:-1][same_text])
+        weight_parts.append(np.full(len(bigrams), _BIGRAM[1]))
+
+        # Character trigrams fully inside a word
+        if len(data) >= 3:
+            inside = is_word[:-2] & is_word[1:-1] & is_word[2:]
+            tri_starts = np.flatnonzero(inside)
+            trigrams = self._mix(
+                self._substring_hashes(prefix, powers, tri_starts, tri_starts + 3), _TRIGRAM[0]
+            )
+            hash_parts.append(trigrams)
+            doc_parts.append(np.searchsorted(text_starts, tri_starts, side="right") - 1)
+            weight_parts.append(np.full(len(trigrams), _TRIGRAM[1]))
+
+        # Sublinear term frequency: count each (text, feature) pair once
+        all_hashes = np.concatenate(hash_parts)
+        all_docs = np.concatenate(doc_parts)
+        order = np.lexsort((all_hashes, all_docs))
+        sorted_hashes = all_hashes[order]
+        sorted_docs = all_docs[order]
+        sorted_weights = np.concatenate(weight_parts)[order]
+        new_run = np.ones(len(sorted_hashes), dtype=bool)
+        new_run[1:] = (
+            (sorted_hashes[1:] != sorted_hashes[:-1]) | (sorted_docs[1:] != sorted_docs[:-1])
+        )
+        run_starts = np.flatnonzero(new_run)
+        counts = np.diff(np.append(run_starts, len(sorted_hashes)))
+
+        hashes = sorted_hashes[run_starts]
+        docs = sorted_docs[run_starts]
+        weights = sorted_weights[run_starts] * (1 + np.log(counts))
+
+        # Sparse random projection: one signed bucket per feature
+        buckets = (hashes >> np.uint64(33)) % np.uint64(self.dim)
+        signs = np.where((hashes >> np.uint64(7)) & np.uint64(1), 1.0, -1.0)
+
+        matrix = np.bincount(
+            docs * self.dim + buckets.astype(np.int64),
+            weights=signs * weights,
+            minlength=n * self.dim
+        ).reshape(n, self.dim).astype(np.float32)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        embeddings: np.ndarray = matrix / norms
+        return embeddings
+
+
+def create_backend(
+    backend: str,
+    api_key: str = "",
+    model: str = "text-embedding-3-small",
+    dim: int = 512,
+    base_url: str | None = None
+) -> EmbeddingBackend:
+    """
+    Create an embedding backend by name.
+
+    Args:
+        backend: "openai" or "local"
+        api_key: OpenAI API key (openai only)
+        model: OpenAI model name (openai only)
+        dim: Output dimension (local only)
+        base_url: Alternative OpenAI-compatible endpoint (openai only)
+
+    Returns:
+        An EmbeddingBackend
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if backend == "openai":
+        return OpenAIBackend(api_key, model=model, base_url=base_url)
+    if backend == "local":
+        return HashingBackend(dim=dim)
+    raise ValueError(f"Unknown embedding backend: {backend}")
@@ -0,0 +1,224 @@
+"""
+Embedding Batching
+==================
+
+Splits large embedding jobs into API-sized chunks and sends them
+concurrently, retrying rate limits and server errors.
+
+Why not one big request?
+- Embedding APIs cap a request by item count and total tokens
+  (OpenAI: 2048 inputs, ~300k tokens); a large channel blows past both
+- One request at a time leaves throughput on the table
+- Unbounded concurrency just trades throughput for 429 errors
+
+How it works:
+1. Deduplicate: identical texts are embedded once
+2. Chunk: pack texts in order until a chunk hits max_items or max_tokens
+3. Send: up to `concurrency` chunks in flight (asyncio.Semaphore)
+4. Retry: 429 and 5xx responses back off exponentially with jitter,
+   honouring a Retry-After header when the server sends one
+5. Reassemble: results go back to their input positions, so output
+   order always matches input order
+
+Token Estimate:
+    Tokens are estimated as ~4 characters per token. That is close enough
+    to stay under request limits without pulling in a tokenizer.
+"""
+
+import asyncio
+import random
+from collections.abc import Awaitable, Callable, Sequence
+
+import numpy as np
+
+from src.utils.logger import Logger
+
+logger = Logger("Batching")
+
+# Embeds one chunk of texts; returns one vector per text (same order)
+EmbedFunction = Callable[[list[str]], Awaitable[list[np.ndarray]]]
+
+# HTTP statuses worth retrying
+RETRYABLE_STATUSES = {408, 409, 429}
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Check whether a failed request should be retried.
+
+    Works with any client exception that exposes `status_code` (the OpenAI
+    and httpx errors do). Connection errors and timeouts have no status and
+    are retried too.
+    """
+    status = getattr(error, "status_code", None)
+    if status is None:
+        return isinstance(error, (ConnectionError, TimeoutError)) or (
+            type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+        )
+    return status in RETRYABLE_STATUSES or status >= 500
+
+
+def retry_after(error: Exception) -> float | None:
+    """Get the Retry-After delay (seconds) from an error response, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class EmbeddingBatcher:
+    """
+    Chunked, concurrent, rate-limit-aware embedding runner.
+
+    Example:
+        async def embed(texts):
+            response = await client.embeddings.create(model=model, input=texts)
+            return [np.array(d.embedding, dtype=np.float32) for d in response.data]
+
+        batcher = EmbeddingBatcher(embed, max_items=256, concurrency=4)
+        vectors = await batcher.run(texts)   # one vector per text, same order
+    """
+
+    def __init__(
+        self,
+        embed: EmbedFunction,
+        max_items: int = 256,
+        max_tokens: int = 100_000,
+        concurrency: int = 4,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            embed: Function that embeds one chunk
+            max_items: Maximum texts per request
+            max_tokens: Maximum estimated tokens per request
+            concurrency: Maximum requests in flight
+            max_retries: Retries per chunk before giving up
+            base_delay: First backoff delay in seconds (doubles each retry)
+            max_delay: Backoff delay cap in seconds
+        """
+        self.embed = embed
+        self.max_items = max_items
+        self.max_tokens = max_tokens
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+        # Counters (for logging and benchmarks)
+        self.requests = 0
+        self.retries = 0
+
+    def chunk(self, texts: Sequence[str]) -> list[list[int]]:
+        """
+        Split texts into request-sized chunks, preserving order.
+
+        A single text larger than max_tokens gets a chunk of its own.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List of chunks, each a list of indices into texts
+        """
+        chunks: list[list[int]] = []
+        current: list[int] = []
+        tokens = 0
+
+        for i, text in enumerate(texts):
+            cost = estimate_tokens(text)
+            if current and (len(current) >= self.max_items or tokens + cost > self.max_tokens):
+                chunks.append(current)
+                current, tokens = [], 0
+            current.append(i)
+            tokens += cost
+
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def run(self, texts: Sequence[str]) -> list[np.ndarray]:
+        """
+        Embed texts.
+
+        Args:
+            texts: Texts to embed (may contain duplicates)
+
+        Returns:
+            One vector per input text (same order as input)
+        """
+        if not texts:
+            return []
+
+        # Deduplicate: position in `unique` for each input text
+        positions: dict[str, int] = {}
+        unique: list[str] = []
+        for text in texts:
+            if text not in positions:
+                positions[text] = len(unique)
+                unique.append(text)
+
+        chunks = self.chunk(unique)
+        if len(chunks) > 1:
+            logger.debug(
+                f"Embedding {len(unique)} texts in {len(chunks)} chunks "
+                f"(concurrency={self.concurrency})"
+            )
+
+        results = await asyncio.gather(
+            *(self._run_chunk([unique[i] for i in chunk]) for chunk in chunks)
+        )
+
+        vectors: dict[int, np.ndarray] = {}
+        for chunk, chunk_vectors in zip(chunks, results):
+            for i, vector in zip(chunk, chunk_vectors):
+                vectors[i] = vector
+
+        return [vectors[positions[text]] for text in texts]
+
+    async def _run_chunk(self, texts: list[str]) -> list[np.ndarray]:
+        """Embed one chunk under the semaphore, retrying transient errors."""
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                try:
+                    self.requests += 1
+                    vectors = await self.embed(texts)
+                    if len(vectors) != len(texts):
+                        raise ValueError(
+                            f"Expected {len(texts)} embeddings, got {len(vectors)}"
+                        )
+                    return vectors
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        raise
+                    error = e
+
+            # Back off outside the semaphore so other chunks can proceed
+            attempt += 1
+            self.retries += 1
+            delay = retry_after(error)
+            if delay is None:
+                # Exponential backoff with full jitter
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+            logger.warning(
+                f"Embedding request failed ({error.__class__.__name__}), "
+                f"retry {attempt}/{self.max_retries} in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
@@ -0,0 +1,31 @@
+"""
+RAG Benchmarks
+==============
+
+Offline benchmarks and correctness checks for the vector search stack.
+Everything runs on synthetic data - no Slack or OpenAI access needed.
+
+Run with:
+    python -m src.rag.benchmarks ann --sizes 10000 100000 --dim 1536
+    python -m src.rag.benchmarks quantization --sizes 10000 100000
+    python -m src.rag.benchmarks embedding --texts 5000 --concurrency 1 4 8
+    python -m src.rag.benchmarks backfill --messages 20000
+    python -m src.rag.benchmarks insert --sizes 10000 100000 1000000
+    python -m src.rag.benchmarks overhead --sizes 10000 100000
+    python -m src.rag.benchmarks chunking --messages 20000
+    python -m src.rag.benchmarks dedup --messages 20000 --thresholds 0 70 80 90
+    python -m src.rag.benchmarks sharding --size 100000 --channels 500 --workers 1 4
+    python -m src.rag.benchmarks check
+
+Modules:
+- data.py: Synthetic corpora, queries and message texts
+- search.py: ANN, quantization, per-query overhead and sharding
+- embedding.py: Embedding batching against a stand-in server
+- indexing.py: Backfill, chunking, near-duplicates and inserts
+- checks.py: Round trips through segments, tombstones and compaction
+  (exits non-zero on failure)
+
+Memory:
+    A 1536-dim float32 corpus takes ~6 KB per vector, so 1M vectors need
+    ~6 GB of RAM. Start with 10k/100k and scale up if the machine allows.
+"""
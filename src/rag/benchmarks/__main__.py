@@ -0,0 +1,120 @@
+"""
+Benchmark CLI
+=============
+
+Entry point for python -m src.rag.benchmarks (see __init__.py).
+"""
+
+import argparse
+import sys
+
+from src.rag.benchmarks.checks import CHECKS, run_checks
+from src.rag.benchmarks.embedding import bench_embedding
+from src.rag.benchmarks.indexing import (
+    bench_backfill,
+    bench_chunking,
+    bench_dedup,
+    bench_insert,
+)
+from src.rag.benchmarks.search import bench_ann, bench_overhead, bench_quantization, bench_sharding
+
+
+def main() -> None:
+    """Parse arguments and run the selected benchmark (or the checks)."""
+    parser = argparse.ArgumentParser(description="MiniClawd RAG benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    ann = subparsers.add_parser("ann", help="IVF-Flat vs exact scan: recall@k and latency")
+    ann.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    ann.add_argument("--dim", type=int, default=1536)
+    ann.add_argument("--queries", type=int, default=100)
+    ann.add_argument("--top-k", type=int, default=10)
+    ann.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+
+    quant = subparsers.add_parser("quantization", help="int8 vs float32: recall, latency, RAM")
+    quant.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    quant.add_argument("--dim", type=int, default=1536)
+    quant.add_argument("--queries", type=int, default=100)
+    quant.add_argument("--top-k", type=int, default=10)
+    quant.add_argument("--rerank", type=int, nargs="+", default=[0, 2, 4])
+
+    emb = subparsers.add_parser("embedding", help="Batched embedding throughput (stand-in server)")
+    emb.add_argument("--texts", type=int, default=5_000)
+    emb.add_argument("--dim", type=int, default=256)
+    emb.add_argument("--batch-size", type=int, nargs="+", default=[64, 256])
+    emb.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    emb.add_argument("--latency-ms", type=float, default=50)
+    emb.add_argument("--max-inflight", type=int, default=6)
+
+    backfill = subparsers.add_parser(
+        "backfill", help="Streaming history backfill (recorded Slack pages)"
+    )
+    backfill.add_argument("--messages", type=int, default=20_000)
+    backfill.add_argument("--page-size", type=int, default=200)
+    backfill.add_argument("--dim", type=int, default=256)
+
+    insert = subparsers.add_parser("insert", help="Row insert throughput (growth buffer vs vstack)")
+    insert.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    insert.add_argument("--dim", type=int, default=256)
+    insert.add_argument("--batch-size", type=int, default=1000)
+    insert.add_argument("--restack-max", type=int, default=10_000)
+
+    overhead = subparsers.add_parser("overhead", help="Per-query cost of search beyond the scan")
+    overhead.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    overhead.add_argument("--dim", type=int, default=256)
+    overhead.add_argument("--queries", type=int, default=200)
+    overhead.add_argument("--top-k", type=int, default=10)
+
+    chunking = subparsers.add_parser("chunking", help="Per-message vs windowed documents")
+    chunking.add_argument("--messages", type=int, default=20_000)
+    chunking.add_argument("--window-chars", type=int, nargs="+", default=[0, 500, 1000, 2000])
+    chunking.add_argument("--dim", type=int, default=256)
+
+    dedup = subparsers.add_parser("dedup", help="Near-duplicate collapsing on a noisy corpus")
+    dedup.add_argument("--messages", type=int, default=20_000)
+    dedup.add_argument("--thresholds", type=int, nargs="+", default=[0, 70, 80, 90])
+    dedup.add_argument("--page-size", type=int, default=200)
+    dedup.add_argument("--dim", type=int, default=256)
+
+    sharding = subparsers.add_parser("sharding", help="Single store vs per-channel shards")
+    sharding.add_argument("--size", type=int, default=100_000)
+    sharding.add_argument("--channels", type=int, default=500)
+    sharding.add_argument("--dim", type=int, default=256)
+    sharding.add_argument("--queries", type=int, default=100)
+    sharding.add_argument("--top-k", type=int, default=10)
+    sharding.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    sharding.add_argument("--max-loaded", type=int, default=0)
+    sharding.add_argument("--shard-by", choices=["channel", "hash"], default="channel")
+    sharding.add_argument("--shards", type=int, default=16)
+
+    check = subparsers.add_parser("check", help="Correctness round trips (segments, deletes, ...)")
+    check.add_argument("--only", nargs="+", choices=list(CHECKS))
+
+    args = parser.parse_args()
+
+    if args.benchmark == "check":
+        sys.exit(0 if run_checks(args.only) else 1)
+    elif args.benchmark == "ann":
+        bench_ann(args.sizes, args.dim, args.queries, args.top_k, args.nprobe)
+    elif args.benchmark == "quantization":
+        bench_quantization(args.sizes, args.dim, args.queries, args.top_k, args.rerank)
+    elif args.benchmark == "embedding":
+        bench_embedding(args.texts, args.dim, args.batch_size, args.concurrency,
+                        args.latency_ms / 1000, args.max_inflight)
+    elif args.benchmark == "backfill":
+        bench_backfill(args.messages, args.page_size, args.dim)
+    elif args.benchmark == "insert":
+        bench_insert(args.sizes, args.dim, args.batch_size, args.restack_max)
+    elif args.benchmark == "overhead":
+        bench_overhead(args.sizes, args.dim, args.queries, args.top_k)
+    elif args.benchmark == "chunking":
+        bench_chunking(args.messages, args.window_chars, args.dim)
+    elif args.benchmark == "dedup":
+        bench_dedup(args.messages, args.thresholds, args.dim, args.page_size)
+    elif args.benchmark == "sharding":
+        bench_sharding(args.size, args.channels, args.dim, args.queries, args.top_k,
+                       args.workers, args.max_loaded, args.shard_by, args.shards)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+"""
+Correctness Checks
+==================
+
+Deterministic round trips through the vector store's on-disk format. The
+benchmarks measure speed; these make sure the fast paths still return the
+same documents after a restart.
+
+Each check builds a small store in a temporary directory, changes it,
+reopens it from disk and compares what comes back against what should be
+there:
+- segments: documents added in several batches (several segments) reload
+  with the same IDs, metadata and vectors
+- tombstones: deleted documents stay deleted after a reload, and replaced
+  documents come back with their latest vector
+- compaction: a compaction triggered by deletes (rows packed in memory,
+  segments rewritten in the background) loses nothing
+- int8: a compressed store reloads the same documents and still reranks
+  with the exact vectors
+- model: a store refuses another model's vectors, or starts over if asked
+- shards: a sharded store routes, deletes and reloads per channel
+
+The rest check the shortcuts in front of the store, which skip searches
+and embeddings that would otherwise run:
+- query_cache: cached results are dropped when the store changes or
+  their time to live passes, and a similar query reuses results only
+  within the same filters
+- dedup: near-duplicate collapsing keeps the newest message per author and
+  channel, and lists the dropped ones newest first
+"""
+
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+
+from src.rag.benchmarks.data import make_corpus
+from src.rag.dedup import NearDuplicateDetector
+from src.rag.query_cache import QueryCache
+from src.rag.sharded import ShardedVectorStore
+from src.rag.vectorstore import VectorDocument, VectorStore
+
+# Documents per check (small: every check runs in well under a second)
+SIZE = 600
+DIM = 32
+
+
+def expect(condition: bool, message: str) -> None:
+    """
+    Fail a check.
+
+    Raises:
+        AssertionError: With the message, if the condition is false
+    """
+    if not condition:
+        raise AssertionError(message)
+
+
+def make_documents(size: int = SIZE, dim: int = DIM, seed: int = 0) -> list[VectorDocument]:
+    """Generate documents spread over a few channels, one second apart."""
+    corpus = make_corpus(size, dim, n_topics=16, seed=seed)
+    documents = []
+    for i, vector in enumerate(corpus):
+        channel, ts = f"C{i % 5}", f"{1_700_000_000 + i:.6f}"
+        documents.append(VectorDocument(
+            id=f"{channel}_{ts}",
+            content=f"message {i} in {channel}",
+            embedding=vector.tolist(),
+            metadata={"channel": channel, "ts": ts}
+        ))
+    return documents
+
+
+def _add_in_batches(
+    store: VectorStore | ShardedVectorStore,
+    documents: list[VectorDocument]
+) -> None:
+    """Add documents in several batches (one segment each)."""
+    for start in range(0, len(documents), 100):
+        store.add_batch(documents[start:start + 100])
+
+
+def expect_contents(
+    store: VectorStore | ShardedVectorStore,
+    expected: dict[str, VectorDocument],
+    atol: float = 1e-6
+) -> None:
+    """Check a store holds exactly the expected documents (metadata and vectors)."""
+    expect(len(store) == len(expected), f"{len(store)} documents, expected {len(expected)}")
+    for doc_id, doc in expected.items():
+        stored = store.get(doc_id)
+        if stored is None:
+            raise AssertionError(f"{doc_id} missing")
+        expect(stored.metadata == doc.metadata, f"{doc_id} metadata changed")
+        vector = np.asarray(doc.embedding, dtype=np.float32)
+        vector /= np.linalg.norm(vector)
+        expect(
+            np.allclose(stored.embedding, vector, atol=atol),
+            f"{doc_id} vector changed"
+        )
+
+
+def expect_same_search(
+    before: list[list[VectorDocument]],
+    after: list[list[VectorDocument]]
+) -> None:
+    """Check two runs of the same queries returned the same documents."""
+    for n, (first, second) in enumerate(zip(before, after)):
+        expect(
+            [doc.id for doc in first] == [doc.id for doc in second],
+            f"query {n} returned different documents after reload"
+        )
+
+
+def check_segments(tmp: Path) -> None:
+    """Documents added in several segments reload unchanged."""
+    documents = make_documents()
+    queries = make_corpus(10, DIM, n_topics=16, seed=1)
+
+    store = VectorStore(tmp)
+    _add_in_batches(store, documents)
+    before = store.search_many(queries.tolist(), top_k=10)
+    store.wait_for_compaction()
+
+    store = VectorStore(tmp)
+    store.check_consistency()
+    expect_contents(store, {doc.id: doc for doc in documents})
+    expect_same_search(before, store.search_many(queries.tolist(), top_k=10))
+
+
+def check_tombstones(tmp: Path) -> None:
+    """Deletes and replacements survive a reload (without compaction)."""
+    documents = make_documents()
+    replaced = make_documents(seed=2)[:20]
+
+    # A threshold above 1 keeps every tombstone in place
+    store = VectorStore(tmp, compact_threshold=2.0)
+    _add_in_batches(store, documents)
+    deleted = [doc.id for doc in documents[::7]]
+    expect(store.delete_many(deleted) == len(deleted), "not every document was deleted")
+    expect(store.delete_many(deleted) == 0, "documents deleted twice")
+    store.add_batch(replaced)
+    expect(store.dead_rows > 0, "deletes were compacted away")
+    store.wait_for_compaction()
+
+    expected = {doc.id: doc for doc in documents if doc.id not in set(deleted)}
+    expected.update({doc.id: doc for doc in replaced})
+
+    store = VectorStore(tmp, compact_threshold=2.0)
+    store.check_consistency()
+    expect_contents(store, expected)
+    for doc_id in deleted:
+        if doc_id not in expected:
+            expect(doc_id not in store, f"deleted {doc_id} came back")
+
+
+def check_compaction(tmp: Path) -> None:
+    """Compacting rows and segments keeps every live document."""
+    documents = make_documents()
+    queries = make_corpus(10, DIM, n_topics=16, seed=1)
+
+    store = VectorStore(tmp, max_segments=4, compact_threshold=0.25)
+    _add_in_batches(store, documents)
+    deleted = {doc.id for doc in documents[:200]}
+    store.delete_many(sorted(deleted))
+    expect(store.dead_rows == 0, "deleting a third of the rows did not compact them")
+    store.check_consistency()
+    before = store.search_many(queries.tolist(), top_k=10)
+    store.wait_for_compaction()
+
+    store = VectorStore(tmp, max_segments=4, compact_threshold=0.25)
+    store.check_consistency()
+    expect_contents(store, {doc.id: doc for doc in documents if doc.id not in deleted})
+    expect_same_search(before, store.search_many(queries.tolist(), top_k=10))
+
+
+def check_int8(tmp: Path) -> None:
+    """A compressed store reloads the same documents and reranks exactly."""
+    documents = make_documents()
+    queries = make_corpus(10, DIM, n_topics=16, seed=1)
+
+    store = VectorStore(tmp / "float32")
+    _add_in_batches(store, documents)
+    exact = store.search_many(queries.tolist(), top_k=5)
+    store.wait_for_compaction()
+
+    store = VectorStore(tmp / "int8", compression="int8", rerank_factor=8)
+    _add_in_batches(store, documents)
+    store.delete_many([doc.id for doc in documents[::11]])
+    store.add_batch(documents[::11])
+    store.wait_for_compaction()
+
+    store = VectorStore(tmp / "int8", compression="int8", rerank_factor=8)
+    store.check_consistency()
+    expect(len(store) == len(documents), f"{len(store)} documents, expected {len(documents)}")
+    # Rerank scores come from the exact vectors, so they match float32
+    for first, second in zip(exact, store.search_many(queries.tolist(), top_k=5)):
+        first_scores = np.array([doc.score for doc in first], dtype=np.float64)
+        second_scores = np.array([doc.score for doc in second], dtype=np.float64)
+        expect(
+            np.allclose(first_scores, second_scores, atol=1e-5),
+            "reranked int8 scores differ from float32"
+        )
+
+
+def check_model(tmp: Path) -> None:
+    """Another model's store is refused, or cleared when allowed."""
+    store = VectorStore(tmp, model="model-a")
+    store.add_batch(make_documents(size=50))
+    store.wait_for_compaction()
+
+    try:
+        VectorStore(tmp, model="model-b")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("opened model-a vectors as model-b")
+
+    store = VectorStore(tmp, model="model-b", reset_on_model_change=True)
+    expect(len(store) == 0, "store was not cleared for the new model")
+    store.wait_for_compaction()
+    expect(len(VectorStore(tmp, model="model-b")) == 0, "old vectors came back")
+
+
+def check_shards(tmp: Path) -> None:
+    """A sharded store deletes and reloads per channel, like one store."""
+    documents = make_documents()
+    queries = make_corpus(10, DIM, n_topics=16, seed=1)
+
+    single = VectorStore(tmp / "single")
+    sharded = ShardedVectorStore(tmp / "sharded", VectorStore, shard_by="channel")
+    deleted = {doc.id for doc in documents[::3]}
+    for store in (single, sharded):
+        _add_in_batches(store, documents)
+        store.delete_many(sorted(deleted))
+        store.wait_for_compaction()
+    sharded.close()
+
+    sharded = ShardedVectorStore(tmp / "sharded", VectorStore, shard_by="channel")
+    expect(sharded.loaded_shards == [], "shards loaded before first use")
+    expect_contents(sharded, {doc.id: doc for doc in documents if doc.id not in deleted})
+    expect_same_search(
+        single.search_many(queries.tolist(), top_k=10),
+        sharded.search_many(queries.tolist(), top_k=10)
+    )
+    sharded.wait_for_compaction()
+    sharded.close()
+
+
+def check_query_cache(tmp: Path) -> None:
+    """Cached results follow the store generation, expire, and stay in scope."""
+    store = VectorStore(tmp)
+    _add_in_batches(store, make_documents())
+    queries = make_corpus(2, DIM, n_topics=16, seed=1)
+    query, similar = queries[0].tolist(), (queries[0] + 0.01 * queries[1]).tolist()
+    everywhere, in_c1 = (5, None, None), (5, "C1", None)
+    results = store.search(query, top_k=5)
+
+    cache = QueryCache(max_entries=8, similarity_threshold=0.95, ttl_seconds=0.2)
+    generation = store.generation
+    cache.put("What happened in standup?", everywhere, generation, results, query)
+    hit = cache.get("what happened  in standup", everywhere, generation)
+    expect(hit == results, "normalized query missed the exact tier")
+    expect(cache.get("what happened in standup", in_c1, generation) is None,
+           "exact hit crossed into another channel filter")
+
+    # A similar query reuses results only under the filters they were computed with
+    expect(cache.get_similar("standup recap", similar, in_c1, generation) is None,
+           "semantic hit crossed into another channel filter")
+    expect(cache.get_similar("standup recap", similar, everywhere, generation) == results,
+           "similar query missed the semantic tier")
+
+    # Any write moves the store to a new generation and empties the cache
+    store.add_batch(make_documents(size=10, seed=3))
+    expect(store.generation > generation, "adding documents did not bump the generation")
+    expect(cache.get("what happened in standup", everywhere, store.generation) is None,
+           "cached results survived a store change")
+    expect(len(cache) == 0, f"{len(cache)} entries left after invalidation")
+    cache.put("stale", everywhere, generation, results)
+    expect(len(cache) == 0, "results from an older generation were cached")
+
+    # Entries expire ttl_seconds after they were stored
+    cache.put("What happened in standup?", everywhere, store.generation, results, query)
+    expect(cache.get("what happened in standup", everywhere, store.generation) == results,
+           "fresh entry missed")
+    time.sleep(0.25)
+    expect(cache.get("what happened in standup", everywhere, store.generation) is None,
+           "entry outlived its time to live")
+    stats = cache.stats()
+    expect(stats.invalidations == 1, f"{stats.invalidations} invalidations, expected 1")
+    expect(stats.expirations == 1, f"{stats.expirations} expirations, expected 1")
+    store.wait_for_compaction()
+
+
+def check_dedup(tmp: Path) -> None:
+    """Near-duplicates collapse into the newest message of the same author and channel."""
+    deploy = ("Deploy of billing v1.{n}.0 to production finished successfully. "
+              "Rollout took 4 minutes with no errors reported.")
+    messages = [
+        # (channel, author, ts, text)
+        ("C1", "UBOT", 1, deploy.format(n=1)),
+        ("C1", "UBOT", 2, deploy.format(n=2)),
+        ("C1", "U1", 3, deploy.format(n=3)),
+        ("C2", "UBOT", 4, deploy.format(n=4)),
+        ("C1", "UBOT", 5, deploy.format(n=5)),
+        ("C1", "UBOT", 6, "Lunch is in the kitchen today, bring your own plates and cups."),
+    ]
+    documents = [
+        {
+            "id": f"{channel}_{ts}",
+            "content": text,
+            "metadata": {"channel": channel, "author": author, "ts": str(ts)},
+        }
+        for channel, author, ts, text in messages
+    ]
+    # Windows are never collapsed, however similar
+    documents.append({
+        "id": "C1_7_8",
+        "content": deploy.format(n=5),
+        "metadata": {"channel": "C1", "author": "UBOT", "ts": "7", "message_count": 2},
+    })
+
+    detector = NearDuplicateDetector(threshold=0.8)
+    kept = detector.collapse(documents)
+
+    kept_ids = [doc["id"] for doc in kept]
+    expected = ["C1_3", "C2_4", "C1_5", "C1_6", "C1_7_8"]
+    expect(kept_ids == expected, f"kept {kept_ids}, expected {expected}")
+    expect(detector.collapsed == 2, f"{detector.collapsed} collapsed, expected 2")
+
+    duplicates = {doc["id"]: doc["metadata"].get("duplicates") for doc in kept}
+    expect(duplicates["C1_5"] == ["C1_2", "C1_1"],
+           f"C1_5 absorbed {duplicates['C1_5']}, expected newest first")
+    # Another author's or channel's copy is a message of its own
+    for doc_id in ("C1_3", "C2_4", "C1_6", "C1_7_8"):
+        expect(duplicates[doc_id] is None, f"{doc_id} absorbed {duplicates[doc_id]}")
+    expect(all("duplicates" not in doc["metadata"] for doc in documents),
+           "collapse changed its input")
+
+
+CHECKS: dict[str, Callable[[Path], None]] = {
+    "segments": check_segments,
+    "tombstones": check_tombstones,
+    "compaction": check_compaction,
+    "int8": check_int8,
+    "model": check_model,
+    "shards": check_shards,
+    "query_cache": check_query_cache,
+    "dedup": check_dedup,
+}
+
+
+def run_checks(names: list[str] | None = None) -> bool:
+    """
+    Run correctness checks, printing one line per check.
+
+    Args:
+        names: Checks to run (None = all of CHECKS)
+
+    Returns:
+        True if every check passed
+    """
+    passed = True
+    for name in names or list(CHECKS):
+        with tempfile.TemporaryDirectory() as tmp:
+            try:
+                CHECKS[name](Path(tmp))
+            except AssertionError as e:
+                print(f"FAIL {name}: {e}")
+                passed = False
+            else:
+                print(f"ok   {name}")
+    return passed
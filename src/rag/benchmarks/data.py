@@ -0,0 +1,86 @@
+"""
+Synthetic Data
+==============
+
+Corpora, queries and texts shared by the benchmarks and checks.
+
+Synthetic Corpora:
+    Real embeddings are not uniformly random: messages about the same topic
+    cluster together. The corpus generator draws vectors around a set of
+    random "topic" centres so that ANN indexes see realistic structure.
+    Queries are noisy copies of corpus vectors.
+"""
+
+import numpy as np
+
+
+def make_corpus(
+    size: int,
+    dim: int,
+    n_topics: int = 1024,
+    noise: float = 1.5,
+    seed: int = 0,
+    chunk_size: int = 50_000
+) -> np.ndarray:
+    """
+    Generate a clustered corpus of unit-normalized float32 vectors.
+
+    Args:
+        size: Number of vectors
+        dim: Vector dimension
+        n_topics: Number of cluster centres
+        noise: Spread of vectors around their centre
+        seed: Random seed
+        chunk_size: Rows generated at a time (bounds temporary memory)
+
+    Returns:
+        Matrix of shape (size, dim)
+    """
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim), dtype=np.float32)
+    topics /= np.linalg.norm(topics, axis=1, keepdims=True)
+
+    corpus = np.empty((size, dim), dtype=np.float32)
+    for start in range(0, size, chunk_size):
+        end = min(start + chunk_size, size)
+        labels = rng.integers(0, n_topics, size=end - start)
+        block = topics[labels]
+        block += rng.standard_normal(block.shape, dtype=np.float32) * (noise / np.sqrt(dim))
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        corpus[start:end] = block
+
+    return corpus
+
+
+def make_queries(
+    corpus: np.ndarray,
+    count: int,
+    noise: float = 1.0,
+    seed: int = 1
+) -> np.ndarray:
+    """Generate unit-normalized queries as noisy copies of corpus vectors."""
+    rng = np.random.default_rng(seed)
+    dim = corpus.shape[1]
+    queries = corpus[rng.integers(0, len(corpus), size=count)].copy()
+    queries += rng.standard_normal(queries.shape, dtype=np.float32) * (noise / np.sqrt(dim))
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries
+
+
+def make_texts(count: int, duplicate_ratio: float = 0.1, seed: int = 0) -> list[str]:
+    """Generate message-like texts, a fraction of them repeated."""
+    rng = np.random.default_rng(seed)
+    words = ["deploy", "database", "migration", "incident", "review", "release",
+             "customer", "latency", "rollback", "meeting", "roadmap", "bug"]
+    unique = max(1, int(count * (1 - duplicate_ratio)))
+    base = [
+        " ".join(rng.choice(words, size=rng.integers(5, 40))) + f" #{i}"
+        for i in range(unique)
+    ]
+    return [base[i] if i < unique else base[rng.integers(0, unique)] for i in range(count)]
+
+
+def percentiles(latencies: list[float]) -> tuple[float, float]:
+    """Return (p50, p95) latencies in milliseconds."""
+    values = np.array(latencies) * 1000
+    return float(np.percentile(values, 50)), float(np.percentile(values, 95))
@@ -0,0 +1,230 @@
+"""
+Embedding Benchmarks
+====================
+
+Throughput of batched, concurrent embedding requests.
+
+Stand-in Embedding Server:
+    The embedding benchmark starts a local HTTP server that speaks the
+    OpenAI embeddings API (deterministic vectors, simulated latency, a
+    concurrency limit answered with 429s). The real client and batcher run
+    against it, so throughput can be measured without an API key.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import numpy as np
+
+from src.rag.backends import HashingBackend
+from src.rag.batching import EmbeddingBatcher
+from src.rag.benchmarks.data import make_texts
+from src.rag.embeddings import EmbeddingGenerator
+
+# ==============================================================================
+# Embedding Batching: local stand-in server
+# ==============================================================================
+
+class StandInEmbeddingServer:
+    """
+    Local OpenAI-compatible embeddings endpoint for offline benchmarks.
+
+    Each request sleeps latency + per_item * n (like a real server doing
+    work), and requests beyond max_inflight are rejected with a 429 so the
+    batcher's retry path is exercised.
+
+    Example:
+        with StandInEmbeddingServer(dim=256) as server:
+            generator = EmbeddingGenerator("bench", base_url=server.url)
+    """
+
+    def __init__(
+        self,
+        dim: int = 256,
+        latency: float = 0.05,
+        per_item: float = 0.0005,
+        max_inflight: int = 8,
+        max_items: int = 2048
+    ):
+        """
+        Initialize the server (call start() or use as a context manager).
+
+        Args:
+            dim: Embedding dimension
+            latency: Fixed seconds per request
+            per_item: Extra seconds per embedded text
+            max_inflight: Concurrent requests served before answering 429
+            max_items: Texts per request before answering 400
+        """
+        self.dim = dim
+        self.latency = latency
+        self.per_item = per_item
+        self.max_inflight = max_inflight
+        self.max_items = max_items
+
+        self.requests = 0
+        self.rejected = 0
+        self._inflight = 0
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+
+    @property
+    def url(self) -> str:
+        """Base URL for an OpenAI client."""
+        if self._server is None:
+            raise RuntimeError("Stand-in server is not running")
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def embed(self, text: str) -> np.ndarray:
+        """Deterministic unit vector for a text."""
+        seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def start(self) -> "StandInEmbeddingServer":
+        """Start serving on a free localhost port in a background thread."""
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def _reply(
+                self, status: int, body: dict[str, Any], headers: dict[str, str] | None = None
+            ) -> None:
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self) -> None:
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                texts = request["input"]
+                if isinstance(texts, str):
+                    texts = [texts]
+
+                with stand_in._lock:
+                    stand_in.requests += 1
+                    if stand_in._inflight >= stand_in.max_inflight:
+                        stand_in.rejected += 1
+                        busy = True
+                    else:
+                        stand_in._inflight += 1
+                        busy = False
+
+                if busy:
+                    self._reply(429, {"error": {"message": "Rate limit"}},
+                                {"retry-after": "0.05"})
+                    return
+
+                try:
+                    if len(texts) > stand_in.max_items:
+                        self._reply(400, {"error": {"message": "Too many inputs"}})
+                        return
+
+                    time.sleep(stand_in.latency + stand_in.per_item * len(texts))
+                    data = []
+                    for i, text in enumerate(texts):
+                        vector = stand_in.embed(text)
+                        if request.get("encoding_format") == "base64":
+                            embedding = base64.b64encode(vector.tobytes()).decode()
+                        else:
+                            embedding = vector.tolist()
+                        data.append({"object": "embedding", "index": i, "embedding": embedding})
+
+                    self._reply(200, {
+                        "object": "list",
+                        "data": data,
+                        "model": request["model"],
+                        "usage": {"prompt_tokens": 0, "total_tokens": 0}
+                    })
+                finally:
+                    with stand_in._lock:
+                        stand_in._inflight -= 1
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "StandInEmbeddingServer":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+
+def bench_embedding(
+    n_texts: int,
+    dim: int,
+    batch_sizes: list[int],
+    concurrencies: list[int],
+    latency: float,
+    max_inflight: int
+) -> None:
+    """
+    Measure embedding throughput of the batcher against the stand-in server.
+
+    The first row (one maximal request at a time) approximates the old
+    behaviour of a single unchunked, sequential call. The last row runs the
+    local hashing backend in-process for comparison.
+    """
+    texts = make_texts(n_texts)
+    print(f"{n_texts} texts ({len(set(texts))} unique), dim={dim}, "
+          f"server latency={latency * 1000:.0f}ms, max in flight={max_inflight}")
+    print(f"{'batch':>7} {'conc':>5} {'seconds':>8} {'texts/s':>9} "
+          f"{'requests':>9} {'retries':>8} {'429s':>6}")
+
+    async def run(
+        batch_size: int, concurrency: int, server: StandInEmbeddingServer
+    ) -> tuple[float, EmbeddingBatcher]:
+        generator = EmbeddingGenerator(
+            api_key="bench",
+            base_url=server.url,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            max_retries=20
+        )
+        start = time.perf_counter()
+        vectors = await generator.generate_batch(texts)
+        elapsed = time.perf_counter() - start
+        await generator.backend.close()
+
+        # Ordering check: every vector matches its own text
+        for i in range(0, len(texts), max(1, len(texts) // 50)):
+            assert np.allclose(vectors[i], server.embed(texts[i]), atol=1e-6)
+        return elapsed, generator._batcher
+
+    configs = [(2048, 1)] + [(b, c) for b in batch_sizes for c in concurrencies]
+    for batch_size, concurrency in configs:
+        with StandInEmbeddingServer(dim=dim, latency=latency, max_inflight=max_inflight) as server:
+            elapsed, batcher = asyncio.run(run(batch_size, concurrency, server))
+            print(f"{batch_size:>7} {concurrency:>5} {elapsed:>8.2f} {n_texts / elapsed:>9.0f} "
+                  f"{batcher.requests:>9} {batcher.retries:>8} {server.rejected:>6}")
+
+    async def run_local() -> tuple[float, EmbeddingBatcher]:
+        generator = EmbeddingGenerator(api_key="", backend=HashingBackend(dim=dim))
+        start = time.perf_counter()
+        await generator.generate_batch(texts)
+        return time.perf_counter() - start, generator._batcher
+
+    elapsed, batcher = asyncio.run(run_local())
+    print(f"{'local':>7} {batcher.concurrency:>5} {elapsed:>8.2f} {n_texts / elapsed:>9.0f} "
+          f"{batcher.requests:>9} {batcher.retries:>8} {0:>6}")
@@ -0,0 +1,429 @@
+"""
+Indexing Benchmarks
+===================
+
+Getting messages into the store: history backfill, chunking, near-duplicate
+collapsing and row inserts.
+
+Recorded Slack Client:
+    The backfill benchmark replays recorded conversations.history pages
+    (cursor pagination, latest/oldest filtering) and conversations.replies
+    threads from a fake Slack client, and embeds with the local hashing
+    backend, so deep-history indexing can be measured - including resuming
+    from a checkpoint - fully offline.
+
+Noisy Corpus:
+    The dedup benchmark mixes unique chatter with bot posts, standup
+    templates and reposts whose variable fields and typos differ from copy
+    to copy. Every message carries its template group, so collapsed pairs
+    can be checked against ground truth.
+"""
+
+import asyncio
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
+
+import numpy as np
+
+from src.rag.backends import HashingBackend
+from src.rag.benchmarks.data import make_corpus, make_texts
+from src.rag.embeddings import EmbeddingGenerator
+from src.rag.indexer import ChannelIndexer
+from src.rag.rowstore import Float32Rows, Int8Rows
+from src.rag.vectorstore import VectorDocument, VectorStore
+
+if TYPE_CHECKING:
+    from slack_sdk.web.async_client import AsyncWebClient
+
+# ==============================================================================
+# Backfill: recorded Slack pages
+# ==============================================================================
+
+class RecordedSlackClient:
+    """
+    Fake Slack client serving recorded conversations.history pages.
+
+    Messages are served newest first; `cursor` is an offset into the
+    filtered history, like Slack's opaque next_cursor. Thread replies
+    (thread_ts != ts) are only served by conversations.replies.
+    """
+
+    def __init__(self, messages: list[dict[str, Any]], fail_after: int | None = None):
+        """
+        Initialize the client.
+
+        Args:
+            messages: Recorded messages (any order)
+            fail_after: Answer with an error after this many requests
+        """
+        self.messages = sorted(messages, key=lambda m: float(m["ts"]), reverse=True)
+        self.fail_after = fail_after
+        self.requests = 0
+
+    async def conversations_history(
+        self,
+        channel: str,
+        limit: int = 100,
+        latest: str | None = None,
+        oldest: str | None = None,
+        cursor: str | None = None,
+        inclusive: bool = False
+    ) -> dict[str, Any]:
+        """Serve one page of history."""
+        self.requests += 1
+        if self.fail_after is not None and self.requests > self.fail_after:
+            return {"ok": False, "error": "ratelimited"}
+
+        def in_range(ts: float) -> bool:
+            if inclusive:
+                return ((latest is None or ts <= float(latest))
+                        and (oldest is None or ts >= float(oldest)))
+            return ((latest is None or ts < float(latest))
+                    and (oldest is None or ts > float(oldest)))
+
+        history = [
+            m for m in self.messages
+            if m.get("thread_ts", m["ts"]) == m["ts"] and in_range(float(m["ts"]))
+        ]
+        start = int(cursor or 0)
+        page = history[start:start + limit]
+        has_more = start + limit < len(history)
+        return {
+            "ok": True,
+            "messages": page,
+            "has_more": has_more,
+            "response_metadata": {"next_cursor": str(start + limit) if has_more else ""},
+        }
+
+    async def conversations_replies(
+        self,
+        channel: str,
+        ts: str,
+        limit: int = 200,
+        cursor: str | None = None
+    ) -> dict[str, Any]:
+        """Serve a whole thread (parent first) in one page."""
+        self.requests += 1
+        thread = sorted(
+            (m for m in self.messages if m.get("thread_ts", m["ts"]) == ts),
+            key=lambda m: float(m["ts"])
+        )
+        if not thread:
+            return {"ok": False, "error": "thread_not_found"}
+        return {"ok": True, "messages": thread, "has_more": False}
+
+
+def make_messages(count: int, start_ts: float = 1_700_000_000.0) -> list[dict[str, Any]]:
+    """Generate Slack-like messages, one per minute."""
+    texts = make_texts(count, duplicate_ratio=0)
+    return [
+        {"ts": f"{start_ts + i * 60:.6f}", "user": f"U{i % 50}", "text": text}
+        for i, text in enumerate(texts)
+    ]
+
+
+def make_conversation(count: int, seed: int = 0) -> list[dict[str, Any]]:
+    """
+    Generate a Slack-like conversation: mostly short messages in bursts,
+    some long ones, and threads hanging off a tenth of the top-level messages.
+    """
+    rng = np.random.default_rng(seed)
+    words = make_texts(count, duplicate_ratio=0, seed=seed)
+    short = ["ok", "+1", "thanks!", "on it", "deploying now", "looks good to me",
+             "can you take a look?", "done", "which env?", "rolling back"]
+
+    messages: list[dict[str, Any]] = []
+    ts = 1_700_000_000.0
+    while len(messages) < count:
+        # Bursts of activity separated by quiet periods
+        ts += rng.choice([rng.uniform(10, 120), rng.uniform(1800, 7200)], p=[0.8, 0.2])
+        text = words[len(messages)] if rng.random() < 0.3 else str(rng.choice(short))
+        parent: dict[str, Any] = {"ts": f"{ts:.6f}", "user": f"U{rng.integers(50)}", "text": text}
+        messages.append(parent)
+
+        if rng.random() < 0.1:
+            replies = int(rng.integers(1, 12))
+            parent.update(thread_ts=parent["ts"], reply_count=replies)
+            for r in range(replies):
+                if rng.random() < 0.5:
+                    reply_text = words[(len(messages) + r) % count]
+                else:
+                    reply_text = str(rng.choice(short))
+                messages.append({
+                    "ts": f"{ts + 30 * (r + 1):.6f}", "thread_ts": parent["ts"],
+                    "user": f"U{rng.integers(50)}", "text": reply_text
+                })
+
+    return messages[:count]
+
+
+def bench_backfill(n_messages: int, page_size: int, dim: int) -> None:
+    """
+    Measure streaming backfill throughput and peak memory.
+
+    Runs the backfill twice: once interrupted halfway by a Slack error and
+    resumed from its checkpoint, and once in one go for timing.
+    """
+    messages = make_messages(n_messages)
+    print(f"{n_messages} messages, page size {page_size}, local backend dim={dim}")
+
+    async def backfill(
+        slack: RecordedSlackClient, directory: Path, max_messages: int | None = None
+    ) -> tuple[int, int]:
+        generator = EmbeddingGenerator(api_key="", backend=HashingBackend(dim=dim))
+        store = VectorStore(directory / "vectorstore", model=generator.model)
+        indexer = ChannelIndexer(
+            cast("AsyncWebClient", slack), generator, store,
+            state_file=directory / "index_cursors.json"
+        )
+        count = await indexer.backfill_channel(
+            "C1", "bench", max_messages=max_messages, page_size=page_size
+        )
+        return count, len(store)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        pages = -(-n_messages // page_size)
+        interrupted = RecordedSlackClient(messages, fail_after=pages // 2)
+        first, _ = asyncio.run(backfill(interrupted, directory))
+        second, stored = asyncio.run(backfill(RecordedSlackClient(messages), directory))
+        print(f"interrupted run: {first} indexed; resumed run: {second} indexed; "
+              f"stored: {stored}/{n_messages}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        slack = RecordedSlackClient(messages)
+        tracemalloc.start()
+        start = time.perf_counter()
+        count, _ = asyncio.run(backfill(slack, Path(tmp)))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"{'requests':>9} {'seconds':>8} {'msgs/s':>8} {'peak MB':>8}")
+    print(f"{slack.requests:>9} {elapsed:>8.2f} {count / elapsed:>8.0f} {peak / 1024 / 1024:>8.1f}")
+
+
+def bench_chunking(n_messages: int, window_chars: list[int], dim: int) -> None:
+    """
+    Compare one document per message with conversation / thread windows.
+
+    Backfills the same recorded conversation with each window size
+    (0 = one document per message, short messages dropped, no threads) and
+    reports how many messages end up searchable, how many documents and
+    embedded characters that takes, and the store size.
+    """
+    messages = make_conversation(n_messages)
+    replies = sum(1 for m in messages if m.get("thread_ts", m["ts"]) != m["ts"])
+    print(f"{n_messages} messages ({replies} thread replies), local backend dim={dim}")
+
+    async def backfill(window: int, directory: Path) -> tuple[int, VectorStore, float]:
+        generator = EmbeddingGenerator(api_key="", backend=HashingBackend(dim=dim))
+        store = VectorStore(directory / "vectorstore", model=generator.model)
+        indexer = ChannelIndexer(
+            cast("AsyncWebClient", RecordedSlackClient(messages)), generator, store,
+            window_chars=window, index_threads=window > 0
+        )
+        start = time.perf_counter()
+        count = await indexer.backfill_channel("C1", "bench")
+        return count, store, time.perf_counter() - start
+
+    print(f"{'window':>7} {'docs':>7} {'covered':>8} {'chars':>9} {'store MB':>9} {'seconds':>8}")
+    for window in window_chars:
+        with tempfile.TemporaryDirectory() as tmp:
+            count, store, elapsed = asyncio.run(backfill(window, Path(tmp)))
+            store.wait_for_compaction()
+            docs = [store.get_metadata(doc_id) for doc_id in store._documents]
+            covered = sum(m.get("message_count", 1) for m in docs if m is not None)
+            chars = sum(len(doc.content) for doc in store._documents.values())
+            print(f"{window:>7} {count:>7} {covered:>8} {chars:>9} "
+                  f"{store.embedding_bytes / 1024 / 1024:>9.1f} {elapsed:>8.2f}")
+
+
+# ==============================================================================
+# Near-duplicates: noisy corpus
+# ==============================================================================
+
+NOISY_TEMPLATES = [
+    "Build #{n} passed on {branch} in {m} minutes. All {k} test suites green, "
+    "artifacts uploaded to the release bucket.",
+    "Deploy of {service} v1.{m}.{n} to production finished successfully. "
+    "Rollout took {k} minutes with no errors reported.",
+    "ALERT: p99 latency for {service} above {k}00ms for {m} minutes (threshold {n}ms). "
+    "Check the dashboard and on-call runbook.",
+    "Daily standup reminder: please post what you did yesterday, what you plan today "
+    "and any blockers for the {service} team.",
+    "Weekly report for {service}: {n} tickets closed, {m} opened, {k} incidents. "
+    "Full details are in the team wiki page.",
+    "New customer signup: {service} plan, {k} seats, region eu-{m}. "
+    "Account manager please reach out within {n} hours.",
+]
+
+
+def make_noisy_corpus(
+    count: int,
+    duplicate_ratio: float = 0.5,
+    typo_rate: float = 0.01,
+    repost_ratio: float = 0.1,
+    seed: int = 0
+) -> list[dict[str, Any]]:
+    """
+    Generate messages where about `duplicate_ratio` come from bot / template
+    groups (variable fields, character typos) and the rest are unique.
+
+    Each message's "group" is its template index (unique chatter gets a
+    group of its own); a repost copies an earlier message verbatim, group
+    included.
+    """
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    vocabulary = ["".join(rng.choice(letters, size=rng.integers(3, 10))) for _ in range(5000)]
+    services = ["api", "billing", "search", "auth", "payments", "web"]
+
+    def typos(text: str) -> str:
+        chars = np.array(list(text))
+        hits = rng.random(len(chars)) < typo_rate
+        chars[hits] = rng.choice(letters, size=hits.sum())
+        return "".join(chars)
+
+    messages: list[dict[str, Any]] = []
+    for i in range(count):
+        ts = f"{1_700_000_000 + i * 60:.6f}"
+        roll = rng.random()
+        if messages and roll < repost_ratio:
+            source = messages[rng.integers(len(messages))]
+            messages.append({**source, "ts": ts})
+        elif roll < repost_ratio + duplicate_ratio:
+            group = int(rng.integers(len(NOISY_TEMPLATES)))
+            text = NOISY_TEMPLATES[group].format(
+                n=rng.integers(1000, 9999), m=rng.integers(1, 60), k=rng.integers(1, 9),
+                branch=rng.choice(["main", "develop"]), service=rng.choice(services)
+            )
+            messages.append({"ts": ts, "user": "UBOT", "text": typos(text), "group": group})
+        else:
+            text = " ".join(rng.choice(vocabulary, size=rng.integers(8, 40)))
+            group = len(NOISY_TEMPLATES) + i
+            messages.append(
+                {"ts": ts, "user": f"U{rng.integers(50)}", "text": text, "group": group}
+            )
+
+    return messages
+
+
+def bench_dedup(n_messages: int, thresholds: list[int], dim: int, page_size: int) -> None:
+    """
+    Measure what near-duplicate collapsing saves on a noisy corpus.
+
+    Backfills the same corpus with each threshold (0 = off) and reports
+    texts sent to the embedding backend, embedding requests, documents
+    stored and store size, plus precision: the share of collapsed messages
+    that really came from the kept message's template (or were reposts).
+    The batcher already embeds identical texts once, so the threshold-0 row
+    shows what exact deduplication alone saves.
+    """
+    messages = make_noisy_corpus(n_messages)
+    groups = {m["ts"]: m["group"] for m in messages}
+    templated = sum(1 for m in messages if m["group"] < len(NOISY_TEMPLATES))
+    print(f"{n_messages} messages ({templated} from templates), "
+          f"page size {page_size}, local backend dim={dim}")
+
+    class CountingBackend(HashingBackend):
+        """Hashing backend that counts the texts it embeds."""
+        texts = 0
+
+        async def embed(self, texts: list[str]) -> list[np.ndarray]:
+            self.texts += len(texts)
+            return await super().embed(texts)
+
+    async def backfill(
+        threshold: int, directory: Path
+    ) -> tuple[VectorStore, int, int, float]:
+        backend = CountingBackend(dim=dim)
+        generator = EmbeddingGenerator(api_key="", backend=backend, batch_size=100)
+        store = VectorStore(directory / "vectorstore", model=generator.model)
+        indexer = ChannelIndexer(
+            cast("AsyncWebClient", RecordedSlackClient(messages)), generator, store,
+            dedup_threshold=threshold / 100
+        )
+        start = time.perf_counter()
+        await indexer.backfill_channel("C1", "bench", page_size=page_size)
+        elapsed = time.perf_counter() - start
+        store.wait_for_compaction()
+        return store, backend.texts, generator._batcher.requests, elapsed
+
+    print(f"{'thresh':>7} {'embedded':>9} {'requests':>9} {'docs':>7} {'store MB':>9} "
+          f"{'precision':>10} {'seconds':>8}")
+    for threshold in thresholds:
+        with tempfile.TemporaryDirectory() as tmp:
+            store, embedded, requests, elapsed = asyncio.run(backfill(threshold, Path(tmp)))
+
+            correct = dropped = 0
+            for doc in store._documents.values():
+                kept_group = groups[doc.metadata["ts"]]
+                for duplicate in doc.metadata.get("duplicates", []):
+                    dropped += 1
+                    correct += groups[duplicate[len("C1_"):]] == kept_group
+            precision = correct / dropped if dropped else 1.0
+
+            print(f"{threshold:>7} {embedded:>9} {requests:>9} {len(store):>7} "
+                  f"{store.embedding_bytes / 1024 / 1024:>9.1f} {precision:>10.3f} {elapsed:>8.2f}")
+
+
+# ==============================================================================
+# Inserts: growth buffer vs re-stacking
+# ==============================================================================
+
+def bench_insert(sizes: list[int], dim: int, batch_size: int, restack_max: int) -> None:
+    """
+    Measure insert throughput of the vector store's rows.
+
+    Rows arrive in batches of batch_size, as add_batch() receives them:
+    - restack: the old approach - np.vstack the whole matrix per document
+      (O(n^2); only run up to restack_max rows)
+    - float32 / int8: RowStorage.append, one copy per batch into a
+      capacity-doubling buffer
+    - store: VectorStore.add_batch end to end (normalize, rows, metadata
+      index, one segment written per batch)
+    """
+    print(f"dim={dim}, batches of {batch_size}")
+    print(f"{'size':>9} {'method':>9} {'seconds':>8} {'rows/s':>10} {'MB':>8}")
+
+    def report(size: int, method: str, seconds: float, nbytes: int) -> None:
+        print(f"{size:>9} {method:>9} {seconds:>8.2f} {size / seconds:>10.0f} "
+              f"{nbytes / 1024 / 1024:>8.1f}")
+
+    for size in sizes:
+        corpus = make_corpus(size, dim)
+        batches = [corpus[i:i + batch_size] for i in range(0, size, batch_size)]
+
+        if size <= restack_max:
+            start = time.perf_counter()
+            matrix = np.empty((0, dim), dtype=np.float32)
+            for row in corpus:
+                matrix = np.vstack([matrix, row])
+            report(size, "restack", time.perf_counter() - start, matrix.nbytes)
+
+        for method, rows in (("float32", Float32Rows(dim)), ("int8", Int8Rows(dim))):
+            start = time.perf_counter()
+            for batch in batches:
+                rows.append(batch)
+            report(size, method, time.perf_counter() - start, rows.nbytes)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = VectorStore(Path(tmp))
+            ts = 1_700_000_000.0
+            start = time.perf_counter()
+            for b, batch in enumerate(batches):
+                store.add_batch([
+                    VectorDocument(
+                        id=f"C1_{ts + b * batch_size + i:.6f}",
+                        content="",
+                        embedding=vector,
+                        metadata={"channel": "C1", "ts": f"{ts + b * batch_size + i:.6f}"}
+                    )
+                    for i, vector in enumerate(batch)
+                ])
+            report(size, "store", time.perf_counter() - start, store.embedding_bytes)
+            store.wait_for_compaction()
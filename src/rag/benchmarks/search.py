@@ -0,0 +1,302 @@
+"""
+Search Benchmarks
+=================
+
+Recall and latency of the vector store's search paths:
+- ann: IVF-Flat vs the exact scan
+- quantization: int8 rows (with and without exact rerank) vs float32
+- overhead: what VectorStore.search adds on top of the bare scan
+- sharding: one store vs per-channel (or hashed) shards
+"""
+
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.rag.ann import IVFFlatIndex, top_k_indices
+from src.rag.benchmarks.data import make_corpus, make_queries, percentiles
+from src.rag.rowstore import Float32Rows, Int8Rows
+from src.rag.sharded import ShardedVectorStore
+from src.rag.vectorstore import VectorDocument, VectorStore
+
+# ==============================================================================
+# ANN: IVF-Flat vs Exact
+# ==============================================================================
+
+def bench_ann(
+    sizes: list[int],
+    dim: int,
+    n_queries: int,
+    top_k: int,
+    nprobes: list[int]
+) -> None:
+    """
+    Compare IVF-Flat recall@k and latency against the exact scan.
+
+    The exact scan provides the ground-truth neighbours for each query.
+    """
+    print(f"{'size':>9} {'method':>12} {'recall@' + str(top_k):>10} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'scanned':>9}")
+
+    for size in sizes:
+        corpus = make_corpus(size, dim)
+        queries = make_queries(corpus, n_queries)
+
+        # Ground truth from the exact scan
+        truth = []
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            truth.append(set(top_k_indices(corpus @ query, top_k).tolist()))
+            latencies.append(time.perf_counter() - start)
+        p50, p95 = percentiles(latencies)
+        print(f"{size:>9} {'exact':>12} {1.0:>10.3f} {p50:>8.2f} {p95:>8.2f} {size:>9}")
+
+        index = IVFFlatIndex(min_train_size=0)
+        start = time.perf_counter()
+        index.train(corpus)
+        train_seconds = time.perf_counter() - start
+
+        for nprobe in nprobes:
+            index.nprobe = nprobe
+            hits = 0
+            scanned = 0
+            latencies = []
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                rows = index.candidates(query)
+                top = rows[top_k_indices(corpus[rows] @ query, top_k)]
+                latencies.append(time.perf_counter() - start)
+                hits += len(expected.intersection(top.tolist()))
+                scanned += len(rows)
+
+            p50, p95 = percentiles(latencies)
+            recall = hits / (top_k * len(queries))
+            print(f"{size:>9} {'ivf/' + str(nprobe):>12} {recall:>10.3f} "
+                  f"{p50:>8.2f} {p95:>8.2f} {scanned // len(queries):>9}")
+
+        print(f"{'':>9} (IVF training: {train_seconds:.1f}s)")
+
+
+# ==============================================================================
+# Quantization: int8 vs float32
+# ==============================================================================
+
+def bench_quantization(
+    sizes: list[int],
+    dim: int,
+    n_queries: int,
+    top_k: int,
+    rerank_factors: list[int]
+) -> None:
+    """
+    Compare int8 scalar-quantized rows against float32 rows.
+
+    Reports RAM per vector, recall@k against the exact float32 ranking, and
+    latency, with and without an exact rerank of top_k * factor candidates.
+    """
+    print(f"{'size':>9} {'method':>12} {'recall@' + str(top_k):>10} "
+          f"{'p50 ms':>8} {'bytes/vec':>10}")
+
+    for size in sizes:
+        corpus = make_corpus(size, dim)
+        queries = make_queries(corpus, n_queries)
+
+        exact_rows = Float32Rows(dim)
+        exact_rows.append(corpus)
+        int8_rows = Int8Rows(dim)
+        int8_rows.append(corpus)
+
+        truth = []
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            truth.append(set(top_k_indices(exact_rows.scores(query), top_k).tolist()))
+            latencies.append(time.perf_counter() - start)
+        p50, _ = percentiles(latencies)
+        print(f"{size:>9} {'float32':>12} {1.0:>10.3f} {p50:>8.2f} "
+              f"{exact_rows.nbytes // size:>10}")
+
+        for factor in rerank_factors:
+            hits = 0
+            latencies = []
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                scores = int8_rows.scores(query)
+                top = top_k_indices(scores, top_k * max(factor, 1))
+                if factor > 0:
+                    # Exact rerank (the store reads these rows from disk)
+                    top = top[top_k_indices(corpus[top] @ query, top_k)]
+                latencies.append(time.perf_counter() - start)
+                hits += len(expected.intersection(top.tolist()))
+
+            p50, _ = percentiles(latencies)
+            method = f"int8/rr{factor}" if factor else "int8"
+            print(f"{size:>9} {method:>12} {hits / (top_k * len(queries)):>10.3f} "
+                  f"{p50:>8.2f} {int8_rows.nbytes // size:>10}")
+
+
+# ==============================================================================
+# Per-query overhead: VectorStore.search vs the bare scan
+# ==============================================================================
+
+def bench_overhead(sizes: list[int], dim: int, n_queries: int, top_k: int) -> None:
+    """
+    Measure what VectorStore.search adds on top of scoring and top-k.
+
+    - scan: matrix-vector product + argpartition top-k (the floor)
+    - search: VectorStore.search end to end (exact scan)
+    - overhead: search - scan, i.e. row -> document lookup and result building
+    - id list: building list(id_to_index) once, which search used to do
+      on every query to map rows back to IDs
+    """
+    print(f"dim={dim}, top_k={top_k}, {n_queries} queries (p50 ms)")
+    print(f"{'size':>9} {'scan':>8} {'search':>8} {'overhead':>9} {'id list':>8}")
+
+    for size in sizes:
+        corpus = make_corpus(size, dim)
+        queries = make_queries(corpus, n_queries)
+        ids = [f"C1_{1_700_000_000 + i:.6f}" for i in range(size)]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = VectorStore(Path(tmp))
+            for offset in range(0, size, 10_000):
+                batch = zip(ids[offset:offset + 10_000], corpus[offset:offset + 10_000])
+                store.add_batch([
+                    VectorDocument(
+                        id=doc_id, content="", embedding=vector, metadata={"channel": "C1"}
+                    )
+                    for doc_id, vector in batch
+                ])
+
+            scan, search = [], []
+            for query in queries:
+                start = time.perf_counter()
+                top_k_indices(corpus @ query, top_k)
+                scan.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                store.search(query, top_k=top_k)
+                search.append(time.perf_counter() - start)
+            store.wait_for_compaction()
+
+        id_to_index = {doc_id: i for i, doc_id in enumerate(ids)}
+        id_list = []
+        for _ in range(min(n_queries, 20)):
+            start = time.perf_counter()
+            list(id_to_index.keys())
+            id_list.append(time.perf_counter() - start)
+
+        scan_p50, search_p50 = percentiles(scan)[0], percentiles(search)[0]
+        print(f"{size:>9} {scan_p50:>8.2f} {search_p50:>8.2f} {search_p50 - scan_p50:>9.2f} "
+              f"{percentiles(id_list)[0]:>8.2f}")
+
+
+# ==============================================================================
+# Sharding: one store vs per-channel shards
+# ==============================================================================
+
+def bench_sharding(
+    size: int,
+    n_channels: int,
+    dim: int,
+    n_queries: int,
+    top_k: int,
+    workers: list[int],
+    max_loaded: int,
+    shard_by: str,
+    num_shards: int
+) -> None:
+    """
+    Compare a single VectorStore with a ShardedVectorStore.
+
+    - open: constructing the store (sharded: reads shards.json only)
+    - channel: p50 of a channel-filtered search, on a freshly opened store
+      (sharded: loads that one shard on the first query)
+    - all: p50 of an unfiltered search over every shard, per worker count
+      (skipped with max_loaded: every query would reload the shards)
+    - MB: embedding RAM held after the channel-filtered queries (sharded:
+      only the shards those queries touched, at most max_loaded)
+    """
+    corpus = make_corpus(size, dim)
+    queries = make_queries(corpus, n_queries)
+    rng = np.random.default_rng(2)
+    # Skewed channel sizes, as in a real workspace: a few busy channels
+    channels = np.minimum(rng.zipf(1.3, size=size), n_channels) - 1
+    query_channels = [f"C{c}" for c in channels[rng.integers(0, size, size=n_queries)]]
+
+    documents = [
+        VectorDocument(
+            id=f"C{c}_{1_700_000_000 + i:.6f}",
+            content="",
+            embedding=vector,
+            metadata={"channel": f"C{c}", "ts": f"{1_700_000_000 + i:.6f}"}
+        )
+        for i, (c, vector) in enumerate(zip(channels.tolist(), corpus))
+    ]
+
+    print(f"{size} documents in {len(set(channels.tolist()))} channels, shard_by={shard_by}, "
+          f"dim={dim}, top_k={top_k}, {n_queries} queries (p50 ms)")
+    print(f"{'store':>16} {'open':>8} {'channel':>8} {'all':>8} {'MB':>8}")
+
+    def timed(fn: Callable[[Any, str], object]) -> list[float]:
+        latencies = []
+        for query, channel in zip(queries, query_channels):
+            start = time.perf_counter()
+            fn(query, channel)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    def report(
+        name: str,
+        open_s: float,
+        channel: list[float],
+        unfiltered: list[float] | None,
+        nbytes: int
+    ) -> None:
+        unfiltered_p50 = f"{percentiles(unfiltered)[0]:>8.2f}" if unfiltered else f"{'-':>8}"
+        print(f"{name:>16} {open_s * 1000:>8.1f} {percentiles(channel)[0]:>8.2f} {unfiltered_p50} "
+              f"{nbytes / 1024 / 1024:>8.1f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "single"
+        store = VectorStore(path)
+        for offset in range(0, size, 10_000):
+            store.add_batch(documents[offset:offset + 10_000])
+        store.wait_for_compaction()
+
+        start = time.perf_counter()
+        store = VectorStore(path)
+        open_s = time.perf_counter() - start
+        channel = timed(lambda q, c: store.search(q, top_k, filter_metadata={"channel": c}))
+        report("single", open_s, channel, timed(lambda q, c: store.search(q, top_k)),
+               store.embedding_bytes)
+
+        path = Path(tmp) / "sharded"
+        sharded = ShardedVectorStore(path, VectorStore, shard_by=shard_by, num_shards=num_shards)
+        for offset in range(0, size, 10_000):
+            sharded.add_batch(documents[offset:offset + 10_000])
+        sharded.wait_for_compaction()
+        sharded.close()
+
+        for n_workers in workers:
+            start = time.perf_counter()
+            sharded = ShardedVectorStore(
+                path, VectorStore, shard_by=shard_by, num_shards=num_shards,
+                max_loaded_shards=max_loaded, workers=n_workers
+            )
+            open_s = time.perf_counter() - start
+            channel = timed(lambda q, c: sharded.search(q, top_k, filter_metadata={"channel": c}))
+            nbytes = sharded.embedding_bytes
+            unfiltered: list[float] | None = None
+            if max_loaded <= 0:
+                # Warm every shard first, so "all" measures the scan
+                sharded.search(queries[0], top_k)
+                unfiltered = timed(lambda q, c: sharded.search(q, top_k))
+            report(f"sharded w={n_workers}", open_s, channel, unfiltered, nbytes)
+            sharded.wait_for_compaction()
+            sharded.close()
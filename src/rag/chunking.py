@@ -0,0 +1,296 @@
+"""
+Message Chunking
+================
+
+Turns raw Slack messages into the documents the vector store indexes.
+
+Why not one document per message?
+- Most Slack messages are short ("ok", "deploying now", "+1") - alone
+  they carry too little meaning to embed well, and filtering them out by
+  length loses the conversation they belong to
+- A thread's answer is usually in a reply, and the reply only makes sense
+  next to the question
+- Fewer, denser documents mean fewer embeddings to compute and store, and
+  fewer but better hits to put in the prompt
+
+Documents:
+1. Standalone: a message of at least standalone_chars stays its own
+   document (ID "{channel}_{ts}", as before chunking existed)
+2. Conversation window: adjacent short top-level messages (no more than
+   max_gap_seconds apart) are joined, up to window_chars per document
+   (ID "{channel}_{first ts}_{last ts}")
+3. Thread window: a thread's parent and replies (conversations.replies),
+   windowed the same way (IDs "{channel}_{thread ts}", then
+   "{channel}_{thread ts}_1", "_2", ...). Later windows start with a
+   short excerpt of the parent so each one says what the thread is about.
+
+Overlap:
+    Consecutive windows share their last/first `overlap` messages, so an
+    exchange that straddles a window boundary is still whole in one of
+    them.
+
+    messages:  m1 m2 m3 m4 m5 m6 m7
+    windows:  [m1 m2 m3] [m3 m4 m5] [m5 m6 m7]      (overlap = 1)
+
+Source Ranges:
+    Multi-message documents record the ts of their first and last message
+    ("ts", "ts_end") and how many messages they hold ("message_count");
+    thread windows also record "thread_ts". The indexer uses the range to
+    find and rebuild the windows an edited or deleted message belongs to.
+
+With window_chars = 0, every message is its own document.
+"""
+
+from datetime import datetime
+from typing import Any
+
+# Characters of the parent message repeated at the top of later thread windows
+THREAD_HEADER_CHARS = 200
+
+# Message subtypes that are real user messages (others are joins, bots, ...)
+THREAD_SUBTYPES = {None, "thread_broadcast"}
+
+
+def is_thread_parent(message: dict[str, Any]) -> bool:
+    """Whether a message starts a thread with at least one reply."""
+    return bool(message.get("reply_count")) and message.get("thread_ts") == message.get("ts")
+
+
+def is_thread_reply(message: dict[str, Any]) -> bool:
+    """Whether a message is a reply inside a thread."""
+    thread_ts = message.get("thread_ts")
+    return bool(thread_ts) and thread_ts != message.get("ts")
+
+
+def _display_time(ts: str) -> str:
+    """Format a Slack ts for display (falls back to the raw ts)."""
+    try:
+        return datetime.fromtimestamp(float(ts)).isoformat()
+    except (ValueError, TypeError):
+        return ts
+
+
+class MessageChunker:
+    """
+    Groups Slack messages into standalone, conversation and thread documents.
+
+    Example:
+        chunker = MessageChunker(window_chars=1000, standalone_chars=200, overlap=1)
+
+        documents = chunker.chunk(
+            messages,                       # conversations.history
+            "C123", "general",
+            threads={"1700000000.000100": replies}  # conversations.replies
+        )
+        # -> [{"id": ..., "content": ..., "metadata": {...}}, ...]
+    """
+
+    def __init__(
+        self,
+        min_length: int = 10,
+        window_chars: int = 1000,
+        standalone_chars: int = 200,
+        overlap: int = 1,
+        max_gap_seconds: float = 600
+    ):
+        """
+        Initialize the chunker.
+
+        Args:
+            min_length: Minimum characters for a document to be indexed
+            window_chars: Maximum characters of message text per window
+                (0 = every message is its own document)
+            standalone_chars: Top-level messages at least this long are
+                never merged into a window
+            overlap: Messages shared by consecutive windows
+            max_gap_seconds: Longest pause inside a conversation window
+        """
+        self.min_length = min_length
+        self.window_chars = window_chars
+        self.standalone_chars = standalone_chars
+        self.overlap = overlap
+        self.max_gap_seconds = max_gap_seconds
+
+    def _is_indexable(self, message: dict[str, Any], subtypes: set[str | None]) -> bool:
+        """Whether a message has text worth putting in a document."""
+        if message.get("subtype") not in subtypes or not message.get("ts"):
+            return False
+        text = message.get("text", "").strip()
+        # Messages that are just a link or a mention carry nothing to embed
+        return bool(text) and not (text.startswith("<") and text.endswith(">"))
+
+    def _windows(self, messages: list[dict[str, Any]]) -> list[list[dict[str, Any]]]:
+        """Split messages into overlapping windows of at most window_chars."""
+        windows = []
+        start = 0
+        while start < len(messages):
+            end, size = start, 0
+            while end < len(messages):
+                length = len(messages[end].get("text", ""))
+                if end > start and size + length > self.window_chars:
+                    break
+                size += length
+                end += 1
+
+            windows.append(messages[start:end])
+            if end >= len(messages):
+                break
+            # Always move forward, however large the overlap
+            start = max(end - self.overlap, start + 1)
+
+        return windows
+
+    def _document(
+        self,
+        doc_id: str,
+        messages: list[dict[str, Any]],
+        channel_id: str,
+        channel_name: str,
+        header: str = "",
+        thread_ts: str | None = None
+    ) -> dict[str, Any]:
+        """Build a prepared document from one or more messages."""
+        first, last = messages[0], messages[-1]
+        metadata = {
+            "channel": channel_id,
+            "channel_name": channel_name,
+            "author": first.get("user", "unknown"),
+            "timestamp": _display_time(first["ts"]),
+            "ts": first["ts"],  # Original Slack timestamp
+        }
+        if len(messages) > 1 or thread_ts is not None:
+            metadata["ts_end"] = last["ts"]
+            metadata["message_count"] = len(messages)
+        if thread_ts is not None:
+            metadata["thread_ts"] = thread_ts
+
+        content = "\n".join(m.get("text", "").strip() for m in messages)
+        return {"id": doc_id, "content": header + content, "metadata": metadata}
+
+    def chunk(
+        self,
+        messages: list[dict[str, Any]],
+        channel_id: str,
+        channel_name: str,
+        threads: dict[str, list[dict[str, Any]]] | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Chunk a channel's top-level messages (and their threads).
+
+        Args:
+            messages: Raw messages from conversations.history (any order)
+            channel_id: The channel ID
+            channel_name: The channel name
+            threads: Thread ts -> messages from conversations.replies. Thread
+                parents found here become thread windows and replies in
+                `messages` are skipped; with None, parents and replies are
+                treated like any other message.
+
+        Returns:
+            List of prepared documents ({"id", "content", "metadata"})
+        """
+        documents = []
+        run: list[dict[str, Any]] = []
+
+        def close_run() -> None:
+            documents.extend(self._chunk_run(run, channel_id, channel_name))
+            run.clear()
+
+        # Without threads, a reply (e.g. from a live event) is just a message
+        skip_replies = threads is not None
+        top_level = sorted(
+            (
+                m for m in messages
+                if self._is_indexable(m, {None}) and not (skip_replies and is_thread_reply(m))
+            ),
+            key=lambda m: float(m["ts"])
+        )
+
+        for msg in top_level:
+            if threads is not None and is_thread_parent(msg):
+                close_run()
+                thread = threads.get(msg["ts"]) or [msg]
+                documents.extend(self.chunk_thread(thread, channel_id, channel_name))
+                continue
+
+            too_long = len(msg.get("text", "")) >= self.standalone_chars
+            gap = float(msg["ts"]) - float(run[-1]["ts"]) if run else 0.0
+            if too_long or gap > self.max_gap_seconds:
+                close_run()
+            run.append(msg)
+            if too_long:
+                close_run()
+
+        close_run()
+        return documents
+
+    def _chunk_run(
+        self,
+        run: list[dict[str, Any]],
+        channel_id: str,
+        channel_name: str
+    ) -> list[dict[str, Any]]:
+        """Chunk a run of adjacent top-level messages into windows."""
+        if self.window_chars <= 0:
+            windows = [[m] for m in run]
+        else:
+            windows = self._windows(run)
+
+        documents = []
+        for window in windows:
+            if len(window) == 1:
+                doc_id = f"{channel_id}_{window[0]['ts']}"
+            else:
+                doc_id = f"{channel_id}_{window[0]['ts']}_{window[-1]['ts']}"
+            doc = self._document(doc_id, window, channel_id, channel_name)
+            if len(doc["content"]) >= self.min_length:
+                documents.append(doc)
+        return documents
+
+    def chunk_thread(
+        self,
+        messages: list[dict[str, Any]],
+        channel_id: str,
+        channel_name: str
+    ) -> list[dict[str, Any]]:
+        """
+        Chunk one thread (parent first) into windows.
+
+        Args:
+            messages: The thread's messages from conversations.replies
+            channel_id: The channel ID
+            channel_name: The channel name
+
+        Returns:
+            List of prepared documents, in window order
+        """
+        thread = sorted(
+            (m for m in messages if self._is_indexable(m, THREAD_SUBTYPES)),
+            key=lambda m: float(m["ts"])
+        )
+        if not thread:
+            return []
+
+        thread_ts = thread[0].get("thread_ts") or thread[0]["ts"]
+        parent_text = thread[0].get("text", "").strip() if thread[0]["ts"] == thread_ts else ""
+
+        if self.window_chars <= 0:
+            windows = [[m] for m in thread]
+        else:
+            windows = self._windows(thread)
+
+        documents = []
+        for n, window in enumerate(windows):
+            doc_id = f"{channel_id}_{thread_ts}" if n == 0 else f"{channel_id}_{thread_ts}_{n}"
+            header = ""
+            if n > 0 and parent_text:
+                header = f"Thread: {parent_text[:THREAD_HEADER_CHARS]}\n"
+            documents.append(self._document(
+                doc_id, window, channel_id, channel_name, header=header, thread_ts=thread_ts
+            ))
+
+        # A thread's documents are numbered, so keep short ones: dropping
+        # one would leave a gap (the thread as a whole is what's indexed)
+        if sum(len(doc["content"]) for doc in documents) < self.min_length:
+            return []
+        return documents
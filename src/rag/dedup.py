@@ -0,0 +1,268 @@
+"""
+Near-Duplicate Detection
+========================
+
+Collapses near-identical messages into one document before they are
+embedded.
+
+Why?
+- Bots, standup templates and reposts produce many messages that differ
+  only in a name, a number or a date ("Build #1234 passed on main")
+- Each one costs an embedding call and a row in the store, and a search
+  returns several copies of the same text instead of different answers
+
+MinHash:
+    A message is reduced to its set of character shingles (overlapping
+    5-character substrings of the lowercased, whitespace-collapsed text).
+    The Jaccard similarity of two sets (shared / total shingles) measures
+    how much text two messages have in common.
+
+    Comparing shingle sets directly is expensive, so each set is summarized
+    by a signature: for num_perm random hash functions, the smallest hash
+    of any shingle. Two signatures agree in a given position with
+    probability equal to the Jaccard similarity, so the fraction of equal
+    positions estimates it.
+
+        "deploy of api v1.2.3 finished"  ->  [ 81, 502,  17, ...]
+        "deploy of api v1.2.4 finished"  ->  [ 81, 502,  93, ...]
+                                             ~ 0.8 of positions agree
+
+Locality-Sensitive Hashing (LSH):
+    To avoid comparing every pair, signatures are cut into `bands` bands
+    of rows; messages that share any band exactly land in the same bucket
+    and become candidates. With 16 bands of 4 rows, a pair with Jaccard
+    0.9 is a candidate with probability 1 - (1 - 0.9^4)^16 > 0.9999999,
+    a pair with Jaccard 0.3 only ~12% of the time. Candidates are then
+    checked against the threshold on the full signature.
+
+Collapsing:
+    Documents are processed newest first, so the most recent message of a
+    group is kept (recency ranking prefers it anyway). Each later match is
+    dropped and its document ID appended to the kept document's
+    "duplicates" metadata - the reference list.
+
+    Only single-message documents from the same author in the same
+    channel are collapsed: conversation and thread windows are rebuilt by
+    ts range and numbered without gaps (see chunking.py), a document kept
+    for one channel must still match that channel's filter, and a bot or a
+    person repeating a template is the case worth collapsing - two people
+    writing similar sentences are having a conversation.
+
+Threshold:
+    Shingle overlap is blind to meaning: "we should NOT migrate the
+    billing database" and "we should migrate the billing database" share
+    over 90% of their shingles. Keep the threshold high (0.95 or more);
+    dropped messages are only findable through their kept duplicate.
+"""
+
+import re
+from typing import Any
+
+import numpy as np
+
+# Characters per shingle
+SHINGLE_SIZE = 5
+
+# Hash functions per signature and LSH bands (num_perm must divide evenly)
+NUM_PERM = 64
+BANDS = 16
+
+# Universal hashing modulus (Mersenne prime 2^61 - 1)
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+# Shingles hashed per step (bounds the num_perm x shingles temporary)
+MAX_SHINGLES_PER_STEP = 1 << 15
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def _encode(text: str, size: int = SHINGLE_SIZE) -> bytes:
+    """Normalize a text (lowercase, collapsed whitespace) to at least `size` bytes."""
+    return WHITESPACE.sub(" ", text.lower()).strip().encode("utf-8").ljust(size, b"\0")
+
+
+def shingle_hashes(data: np.ndarray, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """
+    Hash every `size`-byte window of a byte array.
+
+    Args:
+        data: uint8 array (one or more encoded texts back to back)
+        size: Bytes per shingle
+
+    Returns:
+        32-bit window hashes (as uint64), one per window start
+    """
+    # Polynomial hash of each window (wraps mod 2^64), then keep the
+    # well-mixed high 32 bits
+    windows = np.lib.stride_tricks.sliding_window_view(data, size).astype(np.uint64)
+    powers = np.uint64(257) ** np.arange(size - 1, -1, -1, dtype=np.uint64)
+    hashes = (windows * powers).sum(axis=1, dtype=np.uint64)
+    mixed: np.ndarray = (hashes * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)
+    return mixed
+
+
+class NearDuplicateDetector:
+    """
+    Collapses near-duplicate documents with MinHash + LSH.
+
+    Example:
+        detector = NearDuplicateDetector(threshold=0.95)
+
+        documents = detector.collapse(prepared)   # before generate_batch()
+        # kept: {"id": ..., "metadata": {..., "duplicates": ["C1_1700...", ...]}}
+
+        print(detector.collapsed, "of", detector.documents, "documents collapsed")
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        num_perm: int = NUM_PERM,
+        bands: int = BANDS,
+        seed: int = 1
+    ):
+        """
+        Initialize the detector.
+
+        Args:
+            threshold: Estimated Jaccard similarity at which two documents
+                are duplicates (0-1)
+            num_perm: Hash functions per signature (more = more accurate)
+            bands: LSH bands (more = more candidates, fewer misses)
+            seed: Seed for the hash functions (fixed for stable results)
+
+        Raises:
+            ValueError: If the settings are out of range
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+
+        # h_i(x) = (a_i * x + b_i) mod p; a < 2^31 and x < 2^32 keep
+        # a * x + b below 2^64
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 61, size=num_perm, dtype=np.uint64)
+
+        # Counters (for logging and benchmarks)
+        self.documents = 0
+        self.collapsed = 0
+
+    def signatures(self, texts: list[str]) -> np.ndarray:
+        """
+        Compute MinHash signatures for several texts.
+
+        Texts are hashed back to back, a few thousand shingles per NumPy
+        step, instead of one small array operation per text.
+
+        Args:
+            texts: The texts
+
+        Returns:
+            uint64 array of shape (len(texts), num_perm)
+        """
+        signatures = np.empty((len(texts), self.num_perm), dtype=np.uint64)
+        encoded = [_encode(text) for text in texts]
+
+        start = 0
+        while start < len(encoded):
+            # Take texts until the step's shingle budget is used up
+            end, shingles = start, 0
+            while end < len(encoded) and (end == start or shingles < MAX_SHINGLES_PER_STEP):
+                shingles += len(encoded[end]) - SHINGLE_SIZE + 1
+                end += 1
+
+            data = np.frombuffer(b"".join(encoded[start:end]), dtype=np.uint8)
+            lengths = np.array([len(e) for e in encoded[start:end]])
+            counts = lengths - SHINGLE_SIZE + 1
+
+            # Windows that start and end inside one text, grouped by text
+            text_starts = np.cumsum(lengths) - lengths
+            group_starts = np.cumsum(counts) - counts
+            positions = np.arange(counts.sum()) + np.repeat(text_starts - group_starts, counts)
+            hashes = shingle_hashes(data)[positions]
+
+            hashed = (self._a[:, None] * hashes + self._b[:, None]) % MERSENNE_PRIME
+            signatures[start:end] = np.minimum.reduceat(hashed, group_starts, axis=1).T
+            start = end
+
+        return signatures
+
+    def similarity(self, a: str, b: str) -> float:
+        """Estimate the Jaccard similarity of two texts."""
+        first, second = self.signatures([a, b])
+        return float(np.count_nonzero(first == second)) / self.num_perm
+
+    def collapse(self, documents: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Collapse near-duplicates among prepared documents.
+
+        Args:
+            documents: Prepared documents ({"id", "content", "metadata"})
+
+        Returns:
+            The documents to embed, in their original order. Kept documents
+            that absorbed duplicates get metadata "duplicates" (IDs of the
+            dropped documents, newest first); other documents are unchanged.
+        """
+        self.documents += len(documents)
+
+        # Newest first, so the most recent message of a group is kept
+        eligible = sorted(
+            (
+                i for i, doc in enumerate(documents)
+                if "message_count" not in doc["metadata"]
+            ),
+            key=lambda i: -float(documents[i]["metadata"].get("ts") or 0)
+        )
+        if len(eligible) < 2:
+            return documents
+
+        signatures = self.signatures([documents[i]["content"] for i in eligible])
+        # One hashable key per band: the band's rows as raw bytes
+        band_keys = np.ascontiguousarray(signatures).view(
+            np.dtype((np.void, 8 * self.num_perm // self.bands))
+        ).tolist()
+
+        buckets: dict[tuple[Any, ...], list[int]] = {}
+        duplicates: dict[int, list[str]] = {}
+        dropped: set[int] = set()
+
+        for n, i in enumerate(eligible):
+            doc = documents[i]
+            group = (doc["metadata"].get("channel"), doc["metadata"].get("author"))
+            keys = [(group, band, key) for band, key in enumerate(band_keys[n])]
+
+            # Kept documents sharing a band are candidates; the best one
+            # above the threshold absorbs this document
+            candidates = list({m for key in keys for m in buckets.get(key, ())})
+            if candidates:
+                similarities = np.count_nonzero(
+                    signatures[candidates] == signatures[n], axis=1
+                ) / self.num_perm
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    duplicates.setdefault(eligible[candidates[best]], []).append(doc["id"])
+                    dropped.add(i)
+                    continue
+
+            for key in keys:
+                buckets.setdefault(key, []).append(n)
+
+        if not dropped:
+            return documents
+
+        self.collapsed += len(dropped)
+        collapsed = []
+        for i, doc in enumerate(documents):
+            if i in dropped:
+                continue
+            if i in duplicates:
+                doc = {**doc, "metadata": {**doc["metadata"], "duplicates": duplicates[i]}}
+            collapsed.append(doc)
+        return collapsed
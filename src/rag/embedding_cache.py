@@ -0,0 +1,439 @@
+"""
+Embedding Cache
+===============
+
+A persistent, content-addressed cache for embedding vectors.
+
+Why persist the cache?
+- Embedding calls cost money and add a network round-trip
+- The startup index pass re-embeds every message it has already seen
+- With a disk cache, a restart costs zero embedding calls for unchanged history
+
+Two Tiers:
+1. Memory: an LRU of recently used vectors (no disk access on hit)
+2. Disk: a SQLite table of float32 blobs, shared across restarts
+   (optional - without a path the cache is memory-only)
+
+Memory Accounting:
+    A cached vector used to be a Python list of floats - each element is a
+    separate 24-byte float object plus an 8-byte list slot, so a 1536-dim
+    embedding cost ~48 KB. Vectors are stored as float32 arrays instead
+    (1536 dims = 6 KB), and the memory tier is bounded by a byte budget
+    rather than growing forever.
+
+    Entries can also expire after a TTL (memory tier only - disk entries
+    are content-addressed and never go stale, they are bounded by size).
+
+    stats() reports hits, misses, evictions and bytes for both tiers so the
+    budgets can be sized from production numbers.
+
+Keys:
+    Each entry is keyed by a hash of (model, text). Switching embedding
+    models never returns a vector from the wrong model.
+
+Size-based Eviction:
+    The disk tier tracks the bytes it stores. Once it exceeds max_bytes,
+    the least recently used entries are deleted until it is back under
+    the limit.
+
+Storage:
+    data/
+    └── embedding_cache.db   # SQLite: key, float32 vector blob, last_used
+"""
+
+import hashlib
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from src.utils.logger import Logger
+
+logger = Logger("EmbeddingCache")
+
+
+def cache_key(model: str, text: str) -> str:
+    """
+    Create a content-addressed cache key.
+
+    Args:
+        model: Embedding model name
+        text: The embedded text
+
+    Returns:
+        Hex digest of the model and text
+    """
+    return hashlib.blake2b(f"{model}\0{text}".encode(), digest_size=16).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """
+    Embedding cache counters.
+
+    Attributes:
+        memory_hits: Lookups served from the memory tier
+        disk_hits: Lookups served from the disk tier
+        misses: Lookups found in neither tier
+        memory_evictions: Entries dropped from memory (LRU or TTL)
+        expirations: Of those, entries dropped because their TTL passed
+        disk_evictions: Entries deleted from disk to stay under max_bytes
+        memory_items: Vectors currently in memory
+        memory_bytes: Bytes of vector data in memory
+        disk_items: Vectors currently on disk
+        disk_bytes: Bytes of vector data on disk
+    """
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    memory_evictions: int = 0
+    expirations: int = 0
+    disk_evictions: int = 0
+    memory_items: int = 0
+    memory_bytes: int = 0
+    disk_items: int = 0
+    disk_bytes: int = 0
+
+    @property
+    def hits(self) -> int:
+        """Lookups served from either tier."""
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were hits (0 if none yet)."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class EmbeddingCache:
+    """
+    Two-tier (memory LRU + SQLite) embedding cache.
+
+    Example:
+        cache = EmbeddingCache(Path("data/embedding_cache.db"))
+
+        key = cache_key("text-embedding-3-small", "Hello world")
+        cache.put_many({key: np.array([0.1, 0.2], dtype=np.float32)})
+
+        found = cache.get_many([key])
+        vector = found.get(key)
+
+        print(cache.stats().hit_rate)
+    """
+
+    def __init__(
+        self,
+        path: Path | None,
+        max_bytes: int = 512 * 1024 * 1024,
+        memory_max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float | None = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite database file (None for a memory-only cache)
+            max_bytes: Disk tier size limit (vector bytes)
+            memory_max_bytes: Memory tier size limit (vector bytes)
+            ttl_seconds: Drop memory entries this long after they were stored
+                (None = no expiry)
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.memory_max_bytes = memory_max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        # Memory tier: key -> (vector, stored_at), least recently used first
+        self._memory: OrderedDict[str, tuple[np.ndarray, float]] = OrderedDict()
+        self._memory_bytes = 0
+
+        self._conn: sqlite3.Connection | None = None
+        self._disk_count = 0
+        self._disk_bytes = 0
+
+        self._stats = CacheStats()
+
+        if path is not None:
+            self._open(path)
+
+    def _open(self, path: Path) -> None:
+        """Open (or create) the SQLite disk tier."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)"
+        )
+        self._conn.commit()
+
+        row = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+        self._disk_count, self._disk_bytes = row
+
+        logger.info(
+            f"Embedding cache opened: {self._disk_count} vectors "
+            f"({self._disk_bytes / 1024 / 1024:.1f} MB)"
+        )
+
+    # ==========================================================================
+    # Memory Tier
+    # ==========================================================================
+
+    def _remember(self, key: str, vector: np.ndarray, stored_at: float) -> None:
+        """Insert into the memory tier, evicting the least recently used."""
+        self._forget(key)
+        if vector.nbytes > self.memory_max_bytes:
+            return
+
+        self._memory[key] = (vector, stored_at)
+        self._memory_bytes += vector.nbytes
+
+        while self._memory_bytes > self.memory_max_bytes:
+            _, (old, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= old.nbytes
+            self._stats.memory_evictions += 1
+
+    def _forget(self, key: str) -> None:
+        """Remove a key from the memory tier (if present)."""
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[0].nbytes
+
+    def _recall(self, key: str, now: float) -> np.ndarray | None:
+        """Look up a key in the memory tier, dropping it if expired."""
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+
+        vector, stored_at = entry
+        if self.ttl_seconds is not None and now - stored_at > self.ttl_seconds:
+            self._forget(key)
+            self._stats.memory_evictions += 1
+            self._stats.expirations += 1
+            return None
+
+        self._memory.move_to_end(key)
+        return vector
+
+    # ==========================================================================
+    # Public API
+    # ==========================================================================
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        """
+        Look up several keys.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Dict of the keys that were found and their float32 vectors
+        """
+        found: dict[str, np.ndarray] = {}
+        missing: list[str] = []
+        now = time.time()
+
+        for key in keys:
+            vector = self._recall(key, now)
+            if vector is not None:
+                found[key] = vector
+            else:
+                missing.append(key)
+        self._stats.memory_hits += len(keys) - len(missing)
+
+        if missing and self._conn is not None:
+            from_disk = self._read_disk(self._conn, missing)
+            self._stats.disk_hits += len(from_disk)
+            found.update(from_disk)
+
+        self._stats.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> np.ndarray | None:
+        """Look up a single key."""
+        return self.get_many([key]).get(key)
+
+    def put_many(self, vectors: dict[str, np.ndarray], batch_size: int = 500) -> None:
+        """
+        Store several vectors in both tiers.
+
+        Args:
+            vectors: Dict of key -> vector
+            batch_size: Rows written per SQL statement
+        """
+        if not vectors:
+            return
+
+        now = time.time()
+        rows = []
+        for key, vector in vectors.items():
+            vector = np.asarray(vector, dtype=np.float32)
+            self._remember(key, vector, now)
+            rows.append((key, vector.tobytes(), now))
+
+        if self._conn is None:
+            return
+
+        try:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+
+                # Account for replaced entries so the byte count stays exact
+                placeholders = ",".join("?" * len(batch))
+                replaced_count, replaced_bytes = self._conn.execute(
+                    f"SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings "
+                    f"WHERE key IN ({placeholders})",
+                    [r[0] for r in batch]
+                ).fetchone()
+
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, last_used) "
+                    "VALUES (?, ?, ?)",
+                    batch
+                )
+
+                self._disk_count += len(batch) - replaced_count
+                self._disk_bytes += sum(len(r[1]) for r in batch) - replaced_bytes
+
+            self._conn.commit()
+
+            if self._disk_bytes > self.max_bytes:
+                self._evict(self._conn)
+
+        except sqlite3.Error as e:
+            logger.error("Error writing embedding cache", e)
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        """Store a single vector."""
+        self.put_many({key: vector})
+
+    def clear(self) -> None:
+        """Remove every cached vector from both tiers."""
+        self._memory.clear()
+        self._memory_bytes = 0
+        if self._conn is None:
+            return
+
+        try:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._disk_count = 0
+            self._disk_bytes = 0
+        except sqlite3.Error as e:
+            logger.error("Error clearing embedding cache", e)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __len__(self) -> int:
+        """Number of cached vectors (on disk, or in memory for a memory-only cache)."""
+        return self._disk_count if self._conn is not None else len(self._memory)
+
+    @property
+    def disk_bytes(self) -> int:
+        """Bytes of vector data on disk."""
+        return self._disk_bytes
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes of vector data in memory."""
+        return self._memory_bytes
+
+    def stats(self) -> CacheStats:
+        """
+        Get a snapshot of the cache counters.
+
+        Returns:
+            CacheStats with hit/miss/eviction counts and current sizes
+        """
+        return CacheStats(
+            memory_hits=self._stats.memory_hits,
+            disk_hits=self._stats.disk_hits,
+            misses=self._stats.misses,
+            memory_evictions=self._stats.memory_evictions,
+            expirations=self._stats.expirations,
+            disk_evictions=self._stats.disk_evictions,
+            memory_items=len(self._memory),
+            memory_bytes=self._memory_bytes,
+            disk_items=self._disk_count,
+            disk_bytes=self._disk_bytes
+        )
+
+    # ==========================================================================
+    # Disk Tier
+    # ==========================================================================
+
+    def _read_disk(
+        self, conn: sqlite3.Connection, keys: list[str], batch_size: int = 500
+    ) -> dict[str, np.ndarray]:
+        """Read keys from SQLite and promote hits to the memory tier."""
+        found: dict[str, np.ndarray] = {}
+        now = time.time()
+
+        try:
+            for start in range(0, len(keys), batch_size):
+                batch = keys[start:start + batch_size]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    found[key] = vector
+                    self._remember(key, vector, now)
+
+            if found:
+                # Refresh recency so hot entries survive eviction
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error("Error reading embedding cache", e)
+
+        return found
+
+    def _evict(self, conn: sqlite3.Connection, target_ratio: float = 0.9) -> None:
+        """Delete least recently used entries until under target_ratio * max_bytes."""
+        target = int(self.max_bytes * target_ratio)
+        evicted = 0
+
+        while self._disk_bytes > target:
+            rows = conn.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                break
+
+            victims = []
+            for key, size in rows:
+                victims.append((key,))
+                self._disk_bytes -= size
+                self._disk_count -= 1
+                if self._disk_bytes <= target:
+                    break
+
+            conn.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+            evicted += len(victims)
+
+        conn.commit()
+        self._stats.disk_evictions += evicted
+        logger.debug(f"Evicted {evicted} embeddings from disk cache")
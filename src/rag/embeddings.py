@@ -2,7 +2,8 @@
 Embedding Generation
 ====================
 
-Generates vector embeddings from text using OpenAI's embedding models.
+Generates vector embeddings from text using OpenAI's embedding models,
+or a local in-process encoder (see backends.py).
 
 What are embeddings?
 - A vector (list of numbers) that represents the meaning of text
@@ -22,14 +23,33 @@ Example:
 
 Caching:
     Embeddings are cached to avoid repeated API calls for the same text.
-    This saves money and speeds up repeated queries.
+    This saves money and speeds up repeated queries. With a cache path the
+    cache persists across restarts (see embedding_cache.py), so re-indexing
+    unchanged history costs no API calls at all.
+
+Batching:
+    Uncached texts go through an EmbeddingBatcher (see batching.py), which
+    splits them into request-sized chunks, sends several concurrently and
+    retries rate limits with backoff.
+
+Request Coalescing:
+    When several users ask at once, the same text can be requested by
+    concurrent handlers before any of them has cached it.
+    - Single-flight: a text already being embedded returns the pending
+      future instead of sending a second request
+    - Micro-batching: generate() calls arriving within a few milliseconds
+      of each other are merged into one batched request
 """
 
-import hashlib
+import asyncio
+from pathlib import Path
 from typing import Sequence
 
-from openai import AsyncOpenAI
+import numpy as np
 
+from src.rag.backends import EmbeddingBackend, OpenAIBackend
+from src.rag.batching import EmbeddingBatcher
+from src.rag.embedding_cache import CacheStats, EmbeddingCache, cache_key
 from src.utils.logger import Logger
 
 logger = Logger("Embeddings")
@@ -37,12 +57,14 @@ logger = Logger("Embeddings")
 
 class EmbeddingGenerator:
     """
-    Generates text embeddings using OpenAI's API.
+    Generates text embeddings using OpenAI's API or a local backend.
 
     Features:
     - Async embedding generation
-    - Simple in-memory caching
+    - Pluggable backends (OpenAI API or local hashing encoder)
+    - Two-tier caching (memory LRU + optional SQLite on disk)
     - Batch embedding for efficiency
+    - Coalescing of concurrent calls (single-flight + micro-batching)
 
     Example:
         generator = EmbeddingGenerator(api_key="sk-...", model="text-embedding-3-small")
@@ -61,7 +83,18 @@ class EmbeddingGenerator:
     def __init__(
         self,
         api_key: str,
-        model: str = "text-embedding-3-small"
+        model: str = "text-embedding-3-small",
+        cache_path: Path | None = None,
+        cache_max_bytes: int = 512 * 1024 * 1024,
+        cache_memory_bytes: int = 64 * 1024 * 1024,
+        cache_ttl_seconds: float | None = None,
+        batch_size: int = 256,
+        batch_tokens: int = 100_000,
+        concurrency: int = 4,
+        max_retries: int = 5,
+        batch_window: float = 0.005,
+        base_url: str | None = None,
+        backend: EmbeddingBackend | None = None
     ):
         """
         Initialize the embedding generator.
@@ -69,24 +102,63 @@ class EmbeddingGenerator:
         Args:
             api_key: OpenAI API key
             model: Embedding model to use
+            cache_path: SQLite file for a persistent cache (None = memory only)
+            cache_max_bytes: Size limit of the persistent cache
+            cache_memory_bytes: Size limit of the in-memory cache
+            cache_ttl_seconds: Expire in-memory entries after this long
+                (None = no expiry)
+            batch_size: Maximum texts per embedding request
+            batch_tokens: Maximum estimated tokens per embedding request
+            concurrency: Maximum embedding requests in flight
+            max_retries: Retries for rate-limited or failed requests
+            batch_window: Seconds generate() waits to merge concurrent calls
+            base_url: Alternative OpenAI-compatible endpoint
+            backend: Embedding backend (defaults to OpenAI with `model`)
         """
-        self.client = AsyncOpenAI(api_key=api_key)
-        self.model = model
+        self.backend = backend or OpenAIBackend(api_key, model=model, base_url=base_url)
 
-        # Simple in-memory cache
-        # Key: hash of text, Value: embedding vector
-        self._cache: dict[str, list[float]] = {}
+        # Identifies the vector space; part of every cache key
+        self.model = self.backend.name
 
-        logger.info(f"Embedding generator initialized with model: {model}")
+        # Key: hash of model + text, Value: float32 embedding vector
+        self._cache = EmbeddingCache(
+            cache_path,
+            max_bytes=cache_max_bytes,
+            memory_max_bytes=cache_memory_bytes,
+            ttl_seconds=cache_ttl_seconds
+        )
+
+        self._batcher = EmbeddingBatcher(
+            self.backend.embed,
+            max_items=batch_size,
+            max_tokens=batch_tokens,
+            concurrency=concurrency,
+            max_retries=max_retries
+        )
+
+        # Single-flight: key -> future resolved by the request embedding it
+        self._inflight: dict[str, asyncio.Future[np.ndarray]] = {}
+
+        # Micro-batching: generate() calls waiting for the window to close
+        self.batch_window = batch_window
+        self._pending: list[tuple[str, str]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_tasks: set[asyncio.Task[None]] = set()
+
+        logger.info(f"Embedding generator initialized with model: {self.model}")
 
     def _hash_text(self, text: str) -> str:
-        """Create a hash key for caching."""
-        return hashlib.md5(text.encode()).hexdigest()
+        """Create a hash key for caching (includes the model name)."""
+        return cache_key(self.model, text)
 
     async def generate(self, text: str) -> list[float]:
         """
         Generate an embedding for a single text.
 
+        Concurrent calls are coalesced: a text that is already being
+        embedded shares the pending request, and calls arriving within the
+        batch window are sent together as one batched request.
+
         Args:
             text: The text to embed
 
@@ -94,24 +166,94 @@ class EmbeddingGenerator:
             Vector embedding as a list of floats
         """
         # Check cache first
-        cache_key = self._hash_text(text)
-        if cache_key in self._cache:
+        key = self._hash_text(text)
+        cached = self._cache.get(key)
+        if cached is not None:
             logger.debug("Embedding cache hit")
-            return self._cache[cache_key]
-
-        # Generate embedding via API
-        response = await self.client.embeddings.create(
-            model=self.model,
-            input=text
-        )
+            vector: list[float] = cached.tolist()
+            return vector
 
-        embedding = response.data[0].embedding
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._enqueue(key, text)
+        else:
+            logger.debug("Joined in-flight embedding request")
 
-        # Cache the result
-        self._cache[cache_key] = embedding
+        # Shield so a cancelled caller doesn't cancel the shared request
+        embedding = await asyncio.shield(future)
 
         logger.debug(f"Generated embedding (dim={len(embedding)})")
-        return embedding
+        vector = embedding.tolist()
+        return vector
+
+    # ==========================================================================
+    # Request Coalescing
+    # ==========================================================================
+
+    def _enqueue(self, key: str, text: str) -> asyncio.Future[np.ndarray]:
+        """Register an in-flight text and schedule the micro-batch flush."""
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self._pending.append((key, text))
+
+        if len(self._pending) >= self._batcher.max_items:
+            # Window is full - send now
+            self._start_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.batch_window, self._start_flush
+            )
+
+        return future
+
+    def _start_flush(self) -> None:
+        """Send everything queued in the current window as one batch."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending, self._pending = self._pending, []
+        if pending:
+            self._spawn_flush(pending)
+
+    def _spawn_flush(self, pending: list[tuple[str, str]]) -> None:
+        """Run a flush as a task (not cancelled along with any one caller)."""
+        task = asyncio.ensure_future(self._flush(pending))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, pending: list[tuple[str, str]]) -> None:
+        """Embed a micro-batch and resolve its futures."""
+        keys = [key for key, _ in pending]
+        if len(pending) > 1:
+            logger.debug(f"Coalesced {len(pending)} embedding calls into one batch")
+
+        embeddings: list[np.ndarray] | None = None
+        error: Exception | None = None
+        try:
+            embeddings = await self._batcher.run([text for _, text in pending])
+            try:
+                self._cache.put_many(dict(zip(keys, embeddings)))
+            except Exception as e:
+                # The embeddings are still good; only the cache misses out
+                logger.warning(f"Failed to cache {len(keys)} embeddings: {e}")
+        except Exception as e:
+            error = e
+        finally:
+            # Every waiter gets a result, the error, or (if this task was
+            # cancelled) a cancellation - never an unresolved future
+            for n, key in enumerate(keys):
+                future = self._inflight.pop(key, None)
+                if future is None or future.done():
+                    continue
+                if embeddings is not None:
+                    future.set_result(embeddings[n])
+                elif error is not None:
+                    future.set_exception(error)
+                    # Mark retrieved; every waiter still sees the error
+                    future.exception()
+                else:
+                    future.cancel()
 
     async def generate_batch(
         self,
@@ -121,7 +263,9 @@ class EmbeddingGenerator:
         Generate embeddings for multiple texts.
 
         More efficient than calling generate() multiple times because
-        it batches the API call.
+        it batches the API calls: uncached texts are deduplicated, split
+        into request-sized chunks and sent concurrently. Texts already
+        being embedded by a concurrent call share that request.
 
         Args:
             texts: List of texts to embed
@@ -134,42 +278,40 @@ class EmbeddingGenerator:
 
         # Check which texts need to be generated (not in cache)
         results: list[list[float] | None] = []
-        texts_to_generate: list[tuple[int, str]] = []
-
-        for i, text in enumerate(texts):
-            cache_key = self._hash_text(text)
-            if cache_key in self._cache:
-                results.append(self._cache[cache_key])
-            else:
-                results.append(None)  # Placeholder
-                texts_to_generate.append((i, text))
+        texts_to_generate: list[tuple[str, str]] = []
+        waiting: list[tuple[int, asyncio.Future[np.ndarray]]] = []
+
+        keys = [self._hash_text(text) for text in texts]
+        cached = self._cache.get_many(keys)
+        loop = asyncio.get_running_loop()
+
+        for i, (text, key) in enumerate(zip(texts, keys)):
+            if key in cached:
+                results.append(cached[key].tolist())
+                continue
+
+            results.append(None)  # Placeholder
+            future = self._inflight.get(key)
+            if future is None:
+                # Publish as in-flight so concurrent calls join this request
+                future = loop.create_future()
+                self._inflight[key] = future
+                texts_to_generate.append((key, text))
+            waiting.append((i, future))
 
         # If all were cached, return immediately
-        if not texts_to_generate:
+        if not waiting:
             logger.debug(f"All {len(texts)} embeddings found in cache")
             return [r for r in results if r is not None]
 
-        # Generate embeddings for uncached texts
-        uncached_texts = [t[1] for t in texts_to_generate]
+        # Generate embeddings for uncached texts (resolves their futures)
+        if texts_to_generate:
+            logger.debug(f"Generating {len(texts_to_generate)} embeddings (batch)")
+            self._spawn_flush(texts_to_generate)
 
-        logger.debug(f"Generating {len(uncached_texts)} embeddings (batch)")
-
-        response = await self.client.embeddings.create(
-            model=self.model,
-            input=uncached_texts
-        )
-
-        # Fill in results and cache
-        for j, embedding_data in enumerate(response.data):
-            original_index = texts_to_generate[j][0]
-            text = texts_to_generate[j][1]
-            embedding = embedding_data.embedding
-
-            results[original_index] = embedding
-
-            # Cache it
-            cache_key = self._hash_text(text)
-            self._cache[cache_key] = embedding
+        # Fill in results
+        for original_index, future in waiting:
+            results[original_index] = (await asyncio.shield(future)).tolist()
 
         # Filter out None (shouldn't happen, but type safety)
         return [r for r in results if r is not None]
@@ -183,6 +325,19 @@ class EmbeddingGenerator:
         """Get the number of cached embeddings."""
         return len(self._cache)
 
+    def get_cache_stats(self) -> CacheStats:
+        """
+        Get embedding cache statistics.
+
+        Returns:
+            CacheStats with hits, misses, evictions and bytes per tier
+        """
+        return self._cache.stats()
+
+    def close(self) -> None:
+        """Close the persistent cache."""
+        self._cache.close()
+
     @property
     def dimension(self) -> int:
         """
@@ -191,10 +346,4 @@ class EmbeddingGenerator:
         Returns:
             The embedding dimension (e.g., 1536 for text-embedding-3-small)
         """
-        # Known dimensions for OpenAI models
-        dimensions = {
-            "text-embedding-3-small": 1536,
-            "text-embedding-3-large": 3072,
-            "text-embedding-ada-002": 1536,
-        }
-        return dimensions.get(self.model, 1536)
+        return self.backend.dimension
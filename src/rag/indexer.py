@@ -5,16 +5,62 @@ Channel Indexer
 Indexes Slack channel messages into the vector store for RAG search.
 
 The indexer:
-1. Fetches recent messages from Slack channels
-2. Generates embeddings for each message
-3. Stores them in the vector store
+1. Fetches recent messages (and their threads) from Slack channels
+2. Chunks them into documents (see chunking.py)
+3. Collapses near-duplicate documents (see dedup.py)
+4. Generates embeddings for each document
+5. Stores them in the vector store
 
 Indexing Strategy:
 - Index the most recent N messages per channel (configurable)
-- Skip very short messages (configurable minimum length)
+- Join short adjacent messages, and each thread's replies, into windowed
+  documents instead of indexing (or dropping) them one by one
 - Re-index periodically to capture new messages
 - Avoid duplicate entries using message timestamps as IDs
 
+Threads:
+    conversations.history only returns top-level messages. For each
+    thread parent it returns (reply_count > 0), conversations.replies
+    fetches the thread, which is indexed as one or more thread windows.
+    Replies to threads older than a channel's cursor arrive through live
+    indexing, which rebuilds the thread's windows.
+
+Near-Duplicates:
+    Within each batch of prepared documents (a channel pass, a backfill
+    page, a live flush), near-identical messages from one author - bot
+    posts, standup templates, reposts - are collapsed into the newest one,
+    which lists the others in its "duplicates" metadata. When that document
+    is edited beyond recognition or deleted, the newest remaining duplicate
+    is fetched and takes its place, so the group never leaves the index.
+
+Incremental Indexing (High-Water Marks):
+    After each pass the indexer remembers, per channel, the newest message
+    timestamp it has seen (the "cursor"). The next pass asks Slack only for
+    messages after the cursor (conversations.history oldest=cursor) and
+    skips any message whose document is already in the store before
+    embedding it. A periodic re-index therefore costs time proportional to
+    new traffic, not to history depth.
+
+Deep-History Backfill:
+    backfill_channel() walks a channel's history with cursor pagination
+    (an async generator yielding one page at a time). Each page is
+    embedded and stored before the next is fetched, so memory stays
+    bounded by the page size however many months are indexed. After each
+    page the oldest ts reached is checkpointed; an interrupted backfill
+    resumes from there (conversations.history latest=checkpoint). The
+    checkpoint also records the since bound it ran to, so raising the
+    backfill depth later fetches just the older history.
+
+    Cursors are saved to a small JSON file next to the vector store. If
+    the store turns out to be empty (e.g. it was cleared after switching
+    embedding models) the cursors are discarded and channels are indexed
+    from scratch.
+
+Multi-Channel Pipeline:
+    index_multiple() runs fetching, preparing, embedding and writing as
+    concurrent stages joined by bounded queues (see index_multiple), so
+    one channel's Slack fetch overlaps another's embedding.
+
 Background Indexing:
     In production, indexing should run in the background:
     - Initial index when bot joins a channel
@@ -22,11 +68,21 @@ Background Indexing:
     - Triggered indexing when user requests it
 """
 
+import asyncio
+import json
+import math
+import os
+from collections.abc import AsyncIterator, Coroutine
 from datetime import datetime
-from typing import TYPE_CHECKING
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
+from src.rag.chunking import MessageChunker, is_thread_parent, is_thread_reply
+from src.rag.dedup import NearDuplicateDetector
 from src.rag.embeddings import EmbeddingGenerator
-from src.rag.vectorstore import VectorStore, VectorDocument
+from src.rag.metadata_index import parse_ts
+from src.rag.sharded import ShardedVectorStore
+from src.rag.vectorstore import VectorDocument, VectorStore
 from src.utils.logger import Logger
 
 if TYPE_CHECKING:
@@ -62,9 +118,20 @@ class ChannelIndexer:
         self,
         slack_client: "AsyncWebClient",
         embeddings: EmbeddingGenerator,
-        vectorstore: VectorStore,
+        vectorstore: VectorStore | ShardedVectorStore,
         messages_per_channel: int = 200,
-        min_message_length: int = 10
+        min_message_length: int = 10,
+        state_file: Path | None = None,
+        fetch_concurrency: int = 4,
+        embed_concurrency: int = 2,
+        queue_size: int = 8,
+        flush_size: int = 1000,
+        window_chars: int = 0,
+        standalone_chars: int = 200,
+        window_overlap: int = 1,
+        window_gap_seconds: float = 600,
+        index_threads: bool = False,
+        dedup_threshold: float = 0.0
     ):
         """
         Initialize the indexer.
@@ -74,13 +141,139 @@ class ChannelIndexer:
             embeddings: Embedding generator for creating vectors
             vectorstore: Vector store for persisting documents
             messages_per_channel: Max messages to index per channel
-            min_message_length: Minimum message length to index
+            min_message_length: Minimum document length to index
+            state_file: JSON file for per-channel cursors (None = not persisted)
+            fetch_concurrency: Channels fetched from Slack at once (index_multiple)
+            embed_concurrency: Channels embedded at once (index_multiple)
+            queue_size: Max channels waiting between pipeline stages
+            flush_size: Documents buffered before writing to the store
+            window_chars: Characters per conversation / thread window
+                (0 = one document per message)
+            standalone_chars: Messages this long are never merged into a window
+            window_overlap: Messages shared by consecutive windows
+            window_gap_seconds: Longest pause inside a conversation window
+            index_threads: Fetch and index thread replies
+            dedup_threshold: Estimated Jaccard similarity at which messages
+                are collapsed as near-duplicates (0 = keep every message)
         """
         self.slack_client = slack_client
         self.embeddings = embeddings
         self.vectorstore = vectorstore
         self.messages_per_channel = messages_per_channel
         self.min_message_length = min_message_length
+        self.state_file = state_file
+        self.fetch_concurrency = fetch_concurrency
+        self.embed_concurrency = embed_concurrency
+        self.queue_size = queue_size
+        self.flush_size = flush_size
+        self.index_threads = index_threads
+        self.chunker = MessageChunker(
+            min_length=min_message_length,
+            window_chars=window_chars,
+            standalone_chars=standalone_chars,
+            overlap=window_overlap,
+            max_gap_seconds=window_gap_seconds
+        )
+        self.deduplicator = NearDuplicateDetector(dedup_threshold) if dedup_threshold > 0 else None
+
+        # Channel ID -> newest indexed Slack ts (high-water mark)
+        self._cursors: dict[str, str] = {}
+        # Channel ID -> backfill checkpoint {"latest": oldest ts reached,
+        # "oldest": since bound (None = all history), "done": bool}
+        self._backfill: dict[str, dict[str, Any]] = {}
+        # Channel ID -> name, for live events (which only carry the ID)
+        self._channel_names: dict[str, str] = {}
+
+        self._load_state()
+
+    # ==========================================================================
+    # Cursors
+    # ==========================================================================
+
+    def _load_state(self) -> None:
+        """Load per-channel cursors from disk."""
+        if self.state_file is None or not self.state_file.exists():
+            return
+
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+
+            self._cursors = state.get("cursors", {})
+            self._backfill = state.get("backfill", {})
+            logger.debug(f"Loaded index cursors for {len(self._cursors)} channels")
+
+        except Exception as e:
+            logger.error("Error loading indexer state", e)
+
+    def _save_state(self) -> None:
+        """Save per-channel cursors to disk (atomically)."""
+        if self.state_file is None:
+            return
+
+        try:
+            state = {
+                "cursors": self._cursors,
+                "backfill": self._backfill,
+                "last_updated": datetime.now().isoformat()
+            }
+
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.state_file.with_suffix(".json.tmp")
+            with open(tmp_file, "w") as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_file, self.state_file)
+
+        except Exception as e:
+            logger.error("Error saving indexer state", e)
+
+    def get_cursor(self, channel_id: str) -> str | None:
+        """
+        Get a channel's high-water mark.
+
+        Args:
+            channel_id: The Slack channel ID
+
+        Returns:
+            The newest indexed Slack ts, or None if never indexed
+        """
+        if (self._cursors or self._backfill) and len(self.vectorstore) == 0:
+            # The store was cleared - the cursors no longer describe it
+            logger.info("Vector store is empty; resetting index cursors")
+            self._cursors = {}
+            self._backfill = {}
+            self._save_state()
+
+        return self._cursors.get(channel_id)
+
+    def reset_cursor(self, channel_id: str | None = None) -> None:
+        """
+        Forget a channel's cursor (or all cursors) to force a full re-index.
+
+        Args:
+            channel_id: The channel to reset, or None for every channel
+        """
+        if channel_id is None:
+            self._cursors = {}
+            self._backfill = {}
+        else:
+            self._cursors.pop(channel_id, None)
+            self._backfill.pop(channel_id, None)
+        self._save_state()
+
+    def _advance_cursor(self, channel_id: str, messages: list[dict[str, Any]]) -> None:
+        """Move a channel's cursor to the newest fetched message."""
+        timestamps = [m["ts"] for m in messages if m.get("ts")]
+        current = self._cursors.get(channel_id)
+        if current is not None:
+            timestamps.append(current)
+        if not timestamps:
+            return
+
+        newest = max(timestamps, key=float)
+        if newest != current:
+            self._cursors[channel_id] = newest
+            self._save_state()
 
     async def index_channel(
         self,
@@ -90,29 +283,69 @@ class ChannelIndexer:
         """
         Index messages from a single channel.
 
-        Fetches recent messages, generates embeddings, and stores them.
+        Fetches messages newer than the channel's cursor (or the most
+        recent messages on the first pass) and their threads, chunks them,
+        embeds the documents that are not already stored, and stores them.
 
         Args:
             channel_id: The Slack channel ID
             channel_name: Human-readable channel name
 
         Returns:
-            Number of messages indexed
+            Number of documents indexed
         """
         logger.info(f"Indexing channel: #{channel_name} ({channel_id})")
 
-        # Fetch messages from Slack
-        messages = await self._fetch_messages(channel_id)
+        # Fetch messages from Slack (only new ones if we have a cursor)
+        cursor = self.get_cursor(channel_id)
+        try:
+            messages = await self._fetch_messages(channel_id, oldest=cursor)
+        except Exception as e:
+            logger.error(f"Error fetching messages from #{channel_name}", e)
+            return 0
 
         if not messages:
             logger.debug(f"No messages to index in #{channel_name}")
             return 0
 
-        # Filter and prepare messages
-        prepared = self._prepare_messages(messages, channel_id, channel_name)
+        threads = await self._fetch_threads(channel_id, messages)
+        count = await self._store_messages(messages, channel_id, channel_name, threads)
+
+        # Only move the cursor once the messages are stored
+        self._advance_cursor(channel_id, messages)
+
+        if count:
+            logger.info(f"Indexed {count} documents from #{channel_name}")
+        else:
+            logger.debug(f"No new indexable messages in #{channel_name}")
+        return count
+
+    async def _store_messages(
+        self,
+        messages: list[dict[str, Any]],
+        channel_id: str,
+        channel_name: str,
+        threads: dict[str, list[dict[str, Any]]] | None = None
+    ) -> int:
+        """
+        Chunk, embed and store raw Slack messages that are not stored yet.
+
+        Args:
+            messages: Raw messages from Slack API
+            channel_id: The channel ID
+            channel_name: The channel name
+            threads: Thread ts -> thread messages (see _fetch_threads)
+
+        Returns:
+            Number of documents stored
+        """
+        # Chunk messages into documents, skipping ones already stored
+        prepared = [
+            m for m in self._prepare_messages(messages, channel_id, channel_name, threads)
+            if not self._is_stored(m)
+        ]
 
         if not prepared:
-            logger.debug(f"No indexable messages in #{channel_name}")
             return 0
 
         # Generate embeddings in batch
@@ -131,24 +364,544 @@ class ChannelIndexer:
             documents.append(doc)
 
         self.vectorstore.add_batch(documents)
-
-        logger.info(f"Indexed {len(documents)} messages from #{channel_name}")
         return len(documents)
 
+    # ==========================================================================
+    # Backfill
+    # ==========================================================================
+
+    async def iter_history(
+        self,
+        channel_id: str,
+        latest: str | None = None,
+        oldest: str | None = None,
+        page_size: int = 200,
+        inclusive: bool = False
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """
+        Walk a channel's history page by page, newest first.
+
+        Follows response_metadata.next_cursor until Slack reports no more
+        pages. Only one page is held at a time.
+
+        Args:
+            channel_id: The Slack channel ID
+            latest: Only messages before this Slack ts
+            oldest: Only messages after this Slack ts
+            page_size: Messages per request (Slack allows up to 999, suggests 200)
+            inclusive: Include messages exactly at latest / oldest
+
+        Yields:
+            Lists of message dictionaries from Slack API
+
+        Raises:
+            RuntimeError: If Slack returns an error
+        """
+        page_cursor = None
+        while True:
+            response = await self.slack_client.conversations_history(
+                channel=channel_id,
+                latest=latest,
+                oldest=oldest,
+                limit=page_size,
+                cursor=page_cursor,
+                inclusive=inclusive
+            )
+
+            if not response["ok"]:
+                raise RuntimeError(f"Failed to fetch messages: {response.get('error')}")
+
+            messages: list[dict[str, Any]] = response.get("messages", [])
+            if messages:
+                yield messages
+
+            page_cursor = (response.get("response_metadata") or {}).get("next_cursor")
+            if not response.get("has_more") or not page_cursor:
+                return
+
+    async def backfill_channel(
+        self,
+        channel_id: str,
+        channel_name: str,
+        since: float | None = None,
+        max_messages: int | None = None,
+        page_size: int = 200
+    ) -> int:
+        """
+        Index a channel's deep history, streaming page by page.
+
+        Each page is embedded and stored as it arrives, then a checkpoint
+        (the oldest ts reached) is saved. An interrupted or capped backfill
+        resumes from the checkpoint on the next call. A finished one is
+        not repeated unless `since` reaches further back than the bound it
+        finished with; then only the older history is fetched.
+
+        Args:
+            channel_id: The Slack channel ID
+            channel_name: Human-readable channel name
+            since: Don't go further back than this epoch timestamp
+            max_messages: Stop after fetching this many messages (resumable)
+            page_size: Messages per Slack request
+
+        Returns:
+            Number of documents indexed by this call
+        """
+        self.get_cursor(channel_id)  # Drops stale state if the store was cleared
+        checkpoint = self._backfill.get(channel_id, {})
+        oldest = f"{since:.6f}" if since is not None else None
+        if checkpoint.get("done") and self._backfill_covers(checkpoint, since):
+            logger.debug(f"Backfill of #{channel_name} already complete")
+            return 0
+
+        logger.info(f"Backfilling #{channel_name} ({channel_id})")
+
+        fetched = 0
+        indexed = 0
+        try:
+            async for page in self.iter_history(
+                channel_id, latest=checkpoint.get("latest"), oldest=oldest, page_size=page_size
+            ):
+                threads = await self._fetch_threads(channel_id, page)
+                indexed += await self._store_messages(page, channel_id, channel_name, threads)
+                fetched += len(page)
+
+                # Backfill covers everything older than its first page, so the
+                # live cursor can start there if the channel has none yet
+                if self._cursors.get(channel_id) is None:
+                    self._advance_cursor(channel_id, page)
+
+                # Checkpoint: everything newer than this ts is stored
+                checkpoint = {
+                    "latest": min((m["ts"] for m in page), key=float),
+                    "oldest": oldest,
+                    "done": False,
+                }
+                self._backfill[channel_id] = checkpoint
+                self._save_state()
+
+                if max_messages is not None and fetched >= max_messages:
+                    logger.info(
+                        f"Backfill of #{channel_name} paused after {fetched} messages "
+                        f"({indexed} documents indexed)"
+                    )
+                    return indexed
+
+        except Exception as e:
+            logger.error(f"Backfill of #{channel_name} interrupted", e)
+            return indexed
+
+        # Everything back to the bound is stored now, so a deeper backfill
+        # later only fetches what is older than the oldest ts reached
+        self._backfill[channel_id] = {
+            "latest": checkpoint.get("latest") or oldest,
+            "oldest": oldest,
+            "done": True,
+        }
+        self._save_state()
+
+        logger.info(f"Backfilled {indexed} documents from #{channel_name}")
+        return indexed
+
+    @staticmethod
+    def _backfill_covers(checkpoint: dict[str, Any], since: float | None) -> bool:
+        """
+        Whether a finished backfill already reached back to `since`.
+
+        Checkpoints written before bounds were recorded have no "oldest";
+        they are extended from their oldest ts rather than trusted.
+        """
+        if "oldest" not in checkpoint:
+            return False
+        if checkpoint["oldest"] is None:
+            return True
+        return since is not None and since >= float(checkpoint["oldest"])
+
+    # ==========================================================================
+    # Live Updates
+    # ==========================================================================
+
+    async def get_channel_name(self, channel_id: str) -> str:
+        """
+        Look up a channel's name (cached after the first lookup).
+
+        Args:
+            channel_id: The Slack channel ID
+
+        Returns:
+            The channel name, or "unknown" if Slack can't tell us
+        """
+        if channel_id in self._channel_names:
+            return self._channel_names[channel_id]
+
+        name = "unknown"
+        try:
+            response = await self.slack_client.conversations_info(channel=channel_id)
+            if response["ok"]:
+                name = (response.get("channel") or {}).get("name") or name
+        except Exception as e:
+            logger.debug(f"Could not look up name of {channel_id}: {e}")
+            return name
+
+        self._channel_names[channel_id] = name
+        return name
+
+    async def apply_changes(
+        self,
+        messages: dict[str, list[dict[str, Any]]],
+        deleted: dict[str, list[dict[str, Any]]]
+    ) -> tuple[int, int]:
+        """
+        Apply new, edited and deleted messages to the store.
+
+        Unlike index_channel(), documents that are already stored are
+        re-embedded and replaced (that's what an edit is). An edit that
+        makes a message unindexable (e.g. too short) removes its document.
+
+        Documents that hold several messages are rebuilt from Slack, so an
+        edit or delete never leaves the old text behind:
+        - a change in a thread re-fetches the thread (conversations.replies)
+        - a change to a message inside a conversation window re-fetches
+          the window's time range and chunks it again
+
+        A new short message is not stored on its own when windowing is on:
+        it belongs in a window with its neighbours, so it is left for the
+        next index pass (see _awaits_window).
+
+        Cursors never move here. A batch that fails to store, or events
+        missed while the socket was down, stay after the cursor, so the
+        next index pass fetches them again; messages that were stored live
+        are skipped by that pass without being re-embedded.
+
+        Args:
+            messages: Channel ID -> raw Slack messages (new or edited)
+            deleted: Channel ID -> deleted messages (at least their "ts";
+                ideally the previous message from the event)
+
+        Returns:
+            Tuple of (documents stored, documents removed)
+        """
+        prepared: list[dict[str, Any]] = []
+        removed: set[str] = set()
+
+        for channel_id in messages.keys() | deleted.keys():
+            channel_name = await self.get_channel_name(channel_id)
+            changed = messages.get(channel_id, [])
+            gone = deleted.get(channel_id, [])
+
+            threads: set[str] = set()
+            if self.index_threads:
+                threads = {
+                    m["thread_ts"] for m in changed + gone
+                    if is_thread_reply(m) or is_thread_parent(m)
+                }
+                changed = [m for m in changed if m.get("thread_ts") not in threads]
+                gone = [m for m in gone if m.get("thread_ts") not in threads]
+
+            # Each message's own document is replaced below or removed
+            removed.update(f"{channel_id}_{m.get('ts', '')}" for m in changed + gone)
+
+            # Conversation windows that hold a changed message are re-chunked
+            # (as are windows holding a parent whose first reply just arrived)
+            by_ts = {
+                m["ts"]: m for m in changed
+                if m.get("ts") and not self._awaits_window(channel_id, m)
+            }
+            windows = self._covering_windows(
+                channel_id, changed + gone + [{"ts": ts} for ts in threads]
+            )
+            if windows:
+                fetched = await self._fetch_range(channel_id, windows)
+                if fetched is not None:
+                    removed.update(windows)
+                    for msg in fetched:
+                        if not (self.index_threads and is_thread_parent(msg)):
+                            by_ts[msg["ts"]] = msg
+
+            prepared.extend(
+                self._prepare_messages(list(by_ts.values()), channel_id, channel_name)
+            )
+
+            for thread_ts in threads:
+                old_ids = self._thread_doc_ids(channel_id, thread_ts)
+                thread = await self._fetch_thread(channel_id, thread_ts)
+                if thread is None:
+                    # Gone with its parent (or Slack failed - then keep it)
+                    if any(m.get("ts") == thread_ts for m in deleted.get(channel_id, [])):
+                        removed.update(old_ids)
+                    continue
+                removed.update(old_ids)
+                prepared.extend(self.chunker.chunk_thread(thread, channel_id, channel_name))
+
+        prepared.extend(await self._reassign_duplicates(removed, prepared))
+
+        documents = []
+        if prepared:
+            embeddings_list = await self.embeddings.generate_batch(
+                [m["content"] for m in prepared]
+            )
+            documents = [
+                VectorDocument(
+                    id=msg["id"],
+                    content=msg["content"],
+                    embedding=embedding,
+                    metadata=msg["metadata"]
+                )
+                for msg, embedding in zip(prepared, embeddings_list)
+            ]
+
+        # Documents that are rebuilt are replaced by add_batch, not deleted
+        removed -= {doc.id for doc in documents}
+        removed_count = self.vectorstore.delete_many(sorted(removed))
+        if documents:
+            self.vectorstore.add_batch(documents)
+
+        return len(documents), removed_count
+
+    async def _reassign_duplicates(
+        self, removed: set[str], prepared: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """
+        Keep the near-duplicates of replaced or removed documents indexed.
+
+        A document rebuilt with text that is still a near-duplicate of its
+        old text keeps its reference list. Otherwise the newest referenced
+        message that still exists is fetched and stored in its place,
+        inheriting the rest of the list.
+
+        Args:
+            removed: IDs of documents being removed
+            prepared: Documents about to be stored (reference lists are
+                carried over in place)
+
+        Returns:
+            Promoted duplicates to store as well
+        """
+        if self.deduplicator is None:
+            return []
+
+        rebuilt = {doc["id"]: doc for doc in prepared}
+        taken = removed | rebuilt.keys()
+        promoted = []
+
+        for doc_id in sorted(taken):
+            metadata = self.vectorstore.get_metadata(doc_id) or {}
+            references = metadata.get("duplicates")
+            if not references:
+                continue
+
+            doc = rebuilt.get(doc_id)
+            if doc is not None:
+                # A document that vanished meanwhile counts as not similar
+                old = self.vectorstore.get(doc_id)
+                similarity = (
+                    self.deduplicator.similarity(old.content, doc["content"])
+                    if old is not None else 0.0
+                )
+                if similarity >= self.deduplicator.threshold:
+                    doc["metadata"] = {
+                        **doc["metadata"],
+                        "duplicates": references + doc["metadata"].get("duplicates", [])
+                    }
+                    continue
+
+            replacement = await self._fetch_duplicate(metadata["channel"], references, taken)
+            if replacement is not None:
+                promoted.append(replacement)
+                taken.add(replacement["id"])
+
+        return promoted
+
+    async def _fetch_duplicate(
+        self,
+        channel_id: str,
+        references: list[str],
+        taken: set[str]
+    ) -> dict[str, Any] | None:
+        """
+        Fetch the newest referenced duplicate that still exists.
+
+        Args:
+            channel_id: The Slack channel ID
+            references: Duplicate document IDs, newest first
+            taken: Document IDs already being replaced or removed
+
+        Returns:
+            The duplicate as a prepared document carrying the remaining
+            references, or None if none could be fetched
+        """
+        channel_name = await self.get_channel_name(channel_id)
+        candidates = [ref for ref in references if ref not in taken]
+
+        for n, doc_id in enumerate(candidates):
+            ts = doc_id[len(channel_id) + 1:]
+            try:
+                messages: list[dict[str, Any]] = []
+                async for page in self.iter_history(
+                    channel_id, latest=ts, oldest=ts, page_size=1, inclusive=True
+                ):
+                    messages.extend(page)
+            except Exception as e:
+                logger.error(f"Error fetching duplicate {doc_id}", e)
+                return None
+
+            documents = self.chunker.chunk(messages, channel_id, channel_name)
+            if documents and documents[0]["id"] == doc_id:
+                doc = documents[0]
+                if candidates[n + 1:]:
+                    doc["metadata"]["duplicates"] = candidates[n + 1:]
+                return doc
+
+        return None
+
+    def _covering_windows(self, channel_id: str, messages: list[dict[str, Any]]) -> set[str]:
+        """Get the stored conversation windows that contain any of the messages."""
+        windows = set()
+        for msg in messages:
+            ts = parse_ts(msg.get("ts"))
+            if math.isnan(ts):
+                continue
+            for doc_id in self.vectorstore.find_covering(ts, channel_id):
+                metadata = self.vectorstore.get_metadata(doc_id) or {}
+                if metadata.get("message_count", 1) > 1 and "thread_ts" not in metadata:
+                    windows.add(doc_id)
+        return windows
+
+    def _awaits_window(self, channel_id: str, message: dict[str, Any]) -> bool:
+        """
+        Check if a live message should be left for the next index pass.
+
+        With windowing on, a short top-level message is chunked together
+        with its neighbours, which a live batch doesn't have. Storing it
+        alone would leave a document the index pass never merges into a
+        window; since cursors don't move live, that pass fetches and
+        windows it instead. Messages that already have their own document
+        (e.g. stored before windowing was enabled) are still replaced.
+        """
+        if self.chunker.window_chars <= 0:
+            return False
+        if len(message.get("text", "")) >= self.chunker.standalone_chars:
+            return False
+        return f"{channel_id}_{message.get('ts', '')}" not in self.vectorstore
+
+    def _thread_doc_ids(self, channel_id: str, thread_ts: str) -> list[str]:
+        """Get the IDs of a thread's stored windows (numbered without gaps)."""
+        doc_ids = []
+        doc_id = f"{channel_id}_{thread_ts}"
+        while doc_id in self.vectorstore:
+            doc_ids.append(doc_id)
+            doc_id = f"{channel_id}_{thread_ts}_{len(doc_ids)}"
+        return doc_ids
+
+    async def _fetch_range(self, channel_id: str, windows: set[str]) -> list[dict[str, Any]] | None:
+        """
+        Re-fetch the top-level messages spanned by stored windows.
+
+        Returns:
+            The messages, or None if Slack could not return them
+        """
+        spans = [self.vectorstore.get_metadata(doc_id) or {} for doc_id in windows]
+        oldest = min((m["ts"] for m in spans), key=float)
+        latest = max((m.get("ts_end", m["ts"]) for m in spans), key=float)
+
+        try:
+            messages: list[dict[str, Any]] = []
+            async for page in self.iter_history(
+                channel_id, latest=latest, oldest=oldest, inclusive=True
+            ):
+                messages.extend(page)
+            return messages
+        except Exception as e:
+            logger.error(f"Error re-fetching messages from {channel_id}", e)
+            return None
+
+    async def _fetch_thread(self, channel_id: str, thread_ts: str) -> list[dict[str, Any]] | None:
+        """
+        Fetch a thread's parent and replies (conversations.replies).
+
+        Args:
+            channel_id: The Slack channel ID
+            thread_ts: The parent message's ts
+
+        Returns:
+            The thread's messages, or None if Slack could not return them
+            (e.g. the thread was deleted)
+        """
+        messages: list[dict[str, Any]] = []
+        page_cursor = None
+        try:
+            while True:
+                response = await self.slack_client.conversations_replies(
+                    channel=channel_id,
+                    ts=thread_ts,
+                    limit=200,
+                    cursor=page_cursor
+                )
+                if not response["ok"]:
+                    logger.debug(f"Could not fetch thread {thread_ts}: {response.get('error')}")
+                    return None
+
+                messages.extend(response.get("messages", []))
+                page_cursor = (response.get("response_metadata") or {}).get("next_cursor")
+                if not response.get("has_more") or not page_cursor:
+                    return messages
+
+        except Exception as e:
+            logger.debug(f"Could not fetch thread {thread_ts} in {channel_id}: {e}")
+            return None
+
+    async def _fetch_threads(
+        self,
+        channel_id: str,
+        messages: list[dict[str, Any]]
+    ) -> dict[str, list[dict[str, Any]]] | None:
+        """
+        Fetch the threads started by any of the messages.
+
+        Threads are fetched one at a time: conversations.replies has a
+        lower rate limit than conversations.history.
+
+        Args:
+            channel_id: The Slack channel ID
+            messages: Top-level messages from conversations.history
+
+        Returns:
+            Thread ts -> thread messages (None if thread indexing is off)
+        """
+        if not self.index_threads:
+            return None
+
+        threads = {}
+        for msg in messages:
+            if is_thread_parent(msg):
+                thread = await self._fetch_thread(channel_id, msg["ts"])
+                if thread:
+                    threads[msg["ts"]] = thread
+        return threads
+
     async def _fetch_messages(
         self,
-        channel_id: str
+        channel_id: str,
+        oldest: str | None = None
     ) -> list[dict]:
         """
-        Fetch recent messages from a channel.
+        Fetch messages from a channel.
+
+        Without `oldest`, fetches the most recent messages_per_channel
+        messages. With `oldest`, fetches every message after it, following
+        pagination so a burst of traffic between passes leaves no gap.
 
         Args:
             channel_id: The Slack channel ID
+            oldest: Only fetch messages after this Slack ts
 
         Returns:
             List of message dictionaries from Slack API
+
+        Raises:
+            RuntimeError: If Slack returns an error (other errors from the
+                client propagate as well, so callers can report the channel)
         """
-        try:
+        if oldest is None:
             # Use conversations.history to get recent messages
             response = await self.slack_client.conversations_history(
                 channel=channel_id,
@@ -156,111 +909,249 @@ class ChannelIndexer:
             )
 
             if not response["ok"]:
-                logger.error(f"Failed to fetch messages: {response.get('error')}")
-                return []
+                raise RuntimeError(f"Failed to fetch messages: {response.get('error')}")
 
             return response.get("messages", [])
 
-        except Exception as e:
-            logger.error(f"Error fetching messages from {channel_id}", e)
-            return []
+        # Pages run newest first - a partial result would leave a gap
+        # behind the advanced cursor, so any error discards them all
+        messages: list[dict[str, Any]] = []
+        async for page in self.iter_history(
+            channel_id, oldest=oldest, page_size=self.messages_per_channel
+        ):
+            messages.extend(page)
+        return messages
 
     def _prepare_messages(
         self,
         messages: list[dict],
         channel_id: str,
-        channel_name: str
+        channel_name: str,
+        threads: dict[str, list[dict[str, Any]]] | None = None
     ) -> list[dict]:
         """
         Prepare messages for indexing.
 
-        Filters out short messages, system messages, and formats the content.
+        Filters out system messages, chunks the rest into standalone
+        messages, conversation windows and thread windows (see chunking.py)
+        and collapses near-duplicates (see dedup.py).
 
         Args:
             messages: Raw messages from Slack API
             channel_id: The channel ID
             channel_name: The channel name
+            threads: Thread ts -> thread messages (None = don't build threads)
 
         Returns:
-            List of prepared message dicts ready for embedding
+            List of prepared documents ready for embedding
         """
-        prepared = []
-
-        for msg in messages:
-            # Skip system messages (subtype indicates special message types)
-            if msg.get("subtype"):
-                continue
+        documents = self.chunker.chunk(messages, channel_id, channel_name, threads)
+        if self.deduplicator is None:
+            return documents
 
-            # Get the message text
-            text = msg.get("text", "")
-
-            # Skip very short messages
-            if len(text) < self.min_message_length:
-                continue
-
-            # Skip messages that are just links or mentions
-            if text.startswith("<") and text.endswith(">"):
-                continue
-
-            # Create unique ID from channel and timestamp
-            msg_ts = msg.get("ts", "")
-            doc_id = f"{channel_id}_{msg_ts}"
+        collapsed = self.deduplicator.collapse(documents)
+        if len(collapsed) < len(documents):
+            logger.debug(
+                f"Collapsed {len(documents) - len(collapsed)} near-duplicate "
+                f"documents in #{channel_name}"
+            )
+        return collapsed
 
-            # Format timestamp for display
-            try:
-                ts_float = float(msg_ts)
-                timestamp = datetime.fromtimestamp(ts_float).isoformat()
-            except (ValueError, TypeError):
-                timestamp = msg_ts
-
-            prepared.append({
-                "id": doc_id,
-                "content": text,
-                "metadata": {
-                    "channel": channel_id,
-                    "channel_name": channel_name,
-                    "author": msg.get("user", "unknown"),
-                    "timestamp": timestamp,
-                    "ts": msg_ts,  # Original Slack timestamp
-                }
-            })
+    def _is_stored(self, doc: dict[str, Any]) -> bool:
+        """Whether a prepared document is already stored with the same messages."""
+        stored = self.vectorstore.get_metadata(doc["id"])
+        if stored is None:
+            return False
 
-        return prepared
+        # A thread window that gained replies has the same ID but a new range
+        metadata = doc["metadata"]
+        return bool(
+            stored.get("ts_end") == metadata.get("ts_end")
+            and stored.get("message_count") == metadata.get("message_count")
+        )
 
     async def index_multiple(
         self,
         channels: list[dict]
     ) -> dict[str, int]:
         """
-        Index multiple channels.
+        Index multiple channels through a staged pipeline.
+
+        Stages run concurrently, connected by bounded queues:
+
+            fetch (N workers) -> prepare -> embed (M workers) -> write
+
+        - fetch: conversations.history (and threads) for each channel
+          (network bound)
+        - prepare: chunk messages into documents, drop ones already stored
+        - embed: generate_batch() per channel
+        - write: buffer documents from several channels and add them to the
+          store in one add_batch() (one segment on disk) per flush
+
+        While one channel is being embedded, others are already being
+        fetched, so total time approaches the slowest stage instead of the
+        sum of every channel's fetch + embed + save. Bounded queues keep a
+        fast stage from piling up messages in memory.
 
         Args:
             channels: List of channel dicts with 'id' and 'name' keys
 
         Returns:
-            Dict mapping channel_id to number of messages indexed
+            Dict mapping channel_id to number of documents indexed
         """
-        results = {}
+        channels = [c for c in channels if c.get("id")]
+        results: dict[str, int] = {c["id"]: 0 for c in channels}
+        if not channels:
+            return results
+
+        # Each stage's queue carries (channel, ...) items, then one None per consumer
+        channel_q: asyncio.Queue[tuple[str, str]] = asyncio.Queue()
+        fetched_q: asyncio.Queue[
+            tuple[str, str, list[dict[str, Any]], dict[str, list[dict[str, Any]]] | None] | None
+        ] = asyncio.Queue(maxsize=self.queue_size)
+        prepared_q: asyncio.Queue[
+            tuple[str, str, list[dict[str, Any]], list[dict[str, Any]]] | None
+        ] = asyncio.Queue(maxsize=self.queue_size)
+        embedded_q: asyncio.Queue[
+            tuple[str, list[dict[str, Any]], list[VectorDocument]] | None
+        ] = asyncio.Queue(maxsize=self.queue_size)
 
         for channel in channels:
-            channel_id = channel.get("id")
-            channel_name = channel.get("name", "unknown")
+            channel_q.put_nowait((channel["id"], channel.get("name", "unknown")))
 
-            if not channel_id:
-                continue
+        async def fetch_worker() -> None:
+            while not channel_q.empty():
+                channel_id, channel_name = channel_q.get_nowait()
+                logger.info(f"Indexing channel: #{channel_name} ({channel_id})")
+                try:
+                    cursor = self.get_cursor(channel_id)
+                    messages = await self._fetch_messages(channel_id, oldest=cursor)
+                    threads = await self._fetch_threads(channel_id, messages)
+                except Exception as e:
+                    logger.error(f"Error indexing channel {channel_name}", e)
+                    continue
+                await fetched_q.put((channel_id, channel_name, messages, threads))
+
+        async def prepare_worker() -> None:
+            while (item := await fetched_q.get()) is not None:
+                channel_id, channel_name, messages, threads = item
+                try:
+                    documents = self._prepare_messages(messages, channel_id, channel_name, threads)
+                    prepared = [m for m in documents if not self._is_stored(m)]
+                except Exception as e:
+                    logger.error(f"Error indexing channel {channel_name}", e)
+                    continue
+                await prepared_q.put((channel_id, channel_name, messages, prepared))
+
+        async def embed_worker() -> None:
+            while (item := await prepared_q.get()) is not None:
+                channel_id, channel_name, messages, prepared = item
+                try:
+                    embeddings_list = await self.embeddings.generate_batch(
+                        [m["content"] for m in prepared]
+                    )
+                except Exception as e:
+                    logger.error(f"Error indexing channel {channel_name}", e)
+                    continue
 
+                documents = [
+                    VectorDocument(
+                        id=msg["id"],
+                        content=msg["content"],
+                        embedding=embedding,
+                        metadata=msg["metadata"]
+                    )
+                    for msg, embedding in zip(prepared, embeddings_list)
+                ]
+                await embedded_q.put((channel_id, messages, documents))
+
+        async def write_worker() -> None:
+            buffered: list[tuple[str, list[dict[str, Any]], list[VectorDocument]]] = []
+            pending_docs = 0
+
+            def flush() -> None:
+                nonlocal buffered, pending_docs
+                documents = [doc for _, _, docs in buffered for doc in docs]
+                try:
+                    if documents:
+                        self.vectorstore.add_batch(documents)
+                    # Only move cursors once the messages are stored
+                    for channel_id, messages, docs in buffered:
+                        results[channel_id] += len(docs)
+                        self._advance_cursor(channel_id, messages)
+                except Exception as e:
+                    logger.error("Error writing indexed messages", e)
+                buffered, pending_docs = [], 0
+
+            while (item := await embedded_q.get()) is not None:
+                buffered.append(item)
+                pending_docs += len(item[2])
+                if pending_docs >= self.flush_size:
+                    flush()
+            flush()
+
+        async def run_stage(
+            workers: list[Coroutine[Any, Any, None]],
+            next_q: asyncio.Queue[Any],
+            next_workers: int
+        ) -> None:
+            """Wait for a stage's workers, then tell the next stage to stop."""
             try:
-                count = await self.index_channel(channel_id, channel_name)
-                results[channel_id] = count
-            except Exception as e:
-                logger.error(f"Error indexing channel {channel_name}", e)
-                results[channel_id] = 0
+                await asyncio.gather(*workers)
+            finally:
+                # Even if a worker died, the next stage must not wait forever
+                for _ in range(next_workers):
+                    await next_q.put(None)
+
+        fetchers = [fetch_worker() for _ in range(min(self.fetch_concurrency, len(channels)))]
+        embedders = [embed_worker() for _ in range(self.embed_concurrency)]
+
+        await asyncio.gather(
+            run_stage(fetchers, fetched_q, 1),
+            run_stage([prepare_worker()], prepared_q, len(embedders)),
+            run_stage(embedders, embedded_q, 1),
+            write_worker()
+        )
 
         total = sum(results.values())
-        logger.info(f"Indexed {total} messages across {len(channels)} channels")
+        logger.info(f"Indexed {total} documents across {len(channels)} channels")
 
         return results
 
+    async def has_new_activity(self, channel_id: str) -> bool:
+        """
+        Check whether a channel has messages newer than its cursor.
+
+        Uses conversations.info's latest message, which is one cheap call
+        instead of a history fetch. When Slack doesn't report a latest
+        message (or the call fails) the channel is assumed to be active.
+
+        Args:
+            channel_id: The Slack channel ID
+
+        Returns:
+            False only if the channel is known to have nothing new
+        """
+        cursor = self.get_cursor(channel_id)
+        if cursor is None:
+            return True
+
+        try:
+            response = await self.slack_client.conversations_info(channel=channel_id)
+            if not response["ok"]:
+                return True
+
+            latest = (response.get("channel") or {}).get("latest")
+            latest_ts = latest.get("ts") if isinstance(latest, dict) else None
+            if latest_ts is None:
+                return True
+
+            return float(latest_ts) > float(cursor)
+
+        except Exception as e:
+            logger.debug(f"Could not check activity of {channel_id}: {e}")
+            return True
+
     async def get_indexable_channels(self) -> list[dict]:
         """
         Get list of channels the bot can index.
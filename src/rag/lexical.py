@@ -0,0 +1,392 @@
+"""
+Lexical Search (BM25)
+=====================
+
+An in-process BM25 inverted index over message text, kept alongside the
+vector store.
+
+Why lexical search next to embeddings?
+- Exact identifiers (JIRA-1234, ERR_CONN_RESET, a commit hash) carry no
+  meaning an embedding model can capture - two ticket numbers look alike
+  to it. A term index finds the one message that contains the string.
+- Keyword-only queries can skip the embedding call entirely.
+- Dense search is better at paraphrases ("the deploy broke" vs "release
+  failed"). Fusing both rankings gets the best of each.
+
+BM25:
+    score(d, q) = sum over query terms t of
+        idf(t) * tf(t, d) * (k1 + 1) / (tf(t, d) + k1 * (1 - b + b * |d| / avgdl))
+    idf(t)      = ln(1 + (N - df(t) + 0.5) / (df(t) + 0.5))
+
+    k1 limits how much repeating a term helps; b controls how strongly long
+    messages are penalized.
+
+Tokens:
+    Text is lowercased and split on anything that isn't a letter or digit,
+    except that -, _, . and / between alphanumerics keep an identifier in
+    one piece. Each compound token is indexed whole and as its parts, so
+    "JIRA-1234" matches both "jira-1234" and "1234".
+
+Index Layout:
+    term -> posting arrays (row, term frequency, row stamp), append-only.
+    Re-indexing or removing a row bumps its stamp, which invalidates its
+    old postings without searching for them; rebuild() drops them for
+    good (the vector store calls it when it compacts).
+
+Corpus Statistics:
+    N, avgdl and df(t) describe the whole corpus. An index that holds only
+    part of it (one shard of a sharded store) scores with stats() summed
+    over every part (merge_stats) instead of its own, so a term that is
+    common in one channel but rare overall keeps its high idf.
+
+Reciprocal Rank Fusion:
+    Dense and BM25 scores live on different scales, so rankings are fused
+    by rank instead: score(d) = sum over rankings of 1 / (k + rank(d)),
+    with k = 60 as in the original RRF paper.
+"""
+
+import math
+import re
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.rag.ann import top_k_indices
+
+# Alphanumeric runs, joined by -, _, ., / when they sit between alphanumerics
+TOKEN_PATTERN = re.compile(r"[^\W_]+(?:[-_./][^\W_]+)*")
+PART_PATTERN = re.compile(r"[^\W_]+")
+
+# Tokens that look like identifiers rather than words
+IDENTIFIER_PATTERN = re.compile(
+    r"""
+    ^(
+        [^\W_]*\d[^\W_]*             # contains a digit: 4521, v2, e3b0c442
+      | [^\W_]+(?:[-_./][^\W_]+)+     # compound: ERR_CONN_RESET, api.example.com
+      | \#\d+                         # issue / PR number: #4521
+    )$
+    """,
+    re.VERBOSE
+)
+
+# Default RRF constant
+RRF_K = 60
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text into index terms.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        Lowercased terms; compound identifiers appear whole and as parts
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        parts = PART_PATTERN.findall(token)
+        if len(parts) > 1:
+            terms.extend(parts)
+    return terms
+
+
+def is_keyword_query(query: str, max_terms: int = 3) -> bool:
+    """
+    Check whether a query is a lookup of exact identifiers.
+
+    Such queries ("JIRA-1234", "ERR_CONN_RESET #4521", but not "login bug")
+    are answered from the BM25 index alone, without embedding the query.
+
+    Args:
+        query: The search query
+        max_terms: Longest query still treated as a keyword lookup
+
+    Returns:
+        True if every word of a short query looks like an identifier, or
+        the whole query is "quoted"
+    """
+    query = query.strip()
+    if len(query) > 2 and query[0] == query[-1] == '"':
+        return True
+
+    words = query.split()
+    return 0 < len(words) <= max_terms and all(
+        IDENTIFIER_PATTERN.match(word.strip("?!,;:()[]'\"")) for word in words
+    )
+
+
+@dataclass
+class BM25Stats:
+    """
+    Corpus statistics that BM25 scores are computed from.
+
+    Attributes:
+        n_docs: Indexed documents (N)
+        total_length: Sum of the document lengths, in terms
+        df: Term -> document frequency (for the terms of one query)
+    """
+    n_docs: int = 0
+    total_length: int = 0
+    df: dict[str, int] = field(default_factory=dict)
+
+
+def merge_stats(parts: list[BM25Stats]) -> BM25Stats:
+    """
+    Add up the statistics of several indexes over disjoint documents.
+
+    Args:
+        parts: One BM25Stats per index
+
+    Returns:
+        The statistics of all their documents together
+    """
+    merged = BM25Stats()
+    for part in parts:
+        merged.n_docs += part.n_docs
+        merged.total_length += part.total_length
+        for term, df in part.df.items():
+            merged.df[term] = merged.df.get(term, 0) + df
+    return merged
+
+
+def reciprocal_rank_fusion(
+    rankings: list[np.ndarray],
+    k: int = RRF_K
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Fuse several rankings of rows by reciprocal rank.
+
+    Args:
+        rankings: Row arrays, each ordered best first
+        k: Rank offset; larger values flatten the difference between ranks
+
+    Returns:
+        Tuple of (rows, fused scores), best first
+    """
+    fused: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking.tolist(), start=1):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (k + rank)
+
+    if not fused:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+
+    rows = np.fromiter(fused.keys(), dtype=np.intp, count=len(fused))
+    scores = np.fromiter(fused.values(), dtype=np.float32, count=len(fused))
+    order = np.argsort(-scores, kind="stable")
+    return rows[order], scores[order]
+
+
+class BM25Index:
+    """
+    Incremental BM25 index over row-numbered documents.
+
+    Example:
+        index = BM25Index()
+        index.add(0, "Deploy failed with ERR_CONN_RESET")
+        index.add(1, "JIRA-1234 is fixed in the next release")
+
+        rows, scores = index.search("jira-1234", top_k=5)
+        # -> rows == array([1])
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize an empty index.
+
+        Args:
+            k1: Term-frequency saturation
+            b: Document-length normalization (0 = none, 1 = full)
+        """
+        self.k1 = k1
+        self.b = b
+
+        # term -> parallel arrays of (row, term frequency, row stamp)
+        self._rows: dict[str, array[int]] = {}
+        self._tfs: dict[str, array[int]] = {}
+        self._stamps: dict[str, array[int]] = {}
+        # term -> live document frequency
+        self._df: Counter[str] = Counter()
+        # Cached live postings as numpy arrays: term -> (rows, tfs)
+        self._cache: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+
+        # Per-row state: unique terms (to undo df), length and stamp
+        self._row_terms: dict[int, tuple[str, ...]] = {}
+        self._lengths = np.zeros(0, dtype=np.float32)
+        self._row_stamps = np.zeros(0, dtype=np.int64)
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        """Number of indexed documents."""
+        return len(self._row_terms)
+
+    def _ensure_rows(self, size: int) -> None:
+        """Grow the per-row arrays to hold at least `size` rows."""
+        if size > len(self._lengths):
+            capacity = max(size, 2 * len(self._lengths))
+            lengths = np.zeros(capacity, dtype=np.float32)
+            lengths[:len(self._lengths)] = self._lengths
+            stamps = np.zeros(capacity, dtype=np.int64)
+            stamps[:len(self._row_stamps)] = self._row_stamps
+            self._lengths, self._row_stamps = lengths, stamps
+
+    def add(self, row: int, text: str) -> None:
+        """
+        Index (or re-index) a row.
+
+        Args:
+            row: The row number
+            text: The document text
+        """
+        self.remove(row)
+        self._ensure_rows(row + 1)
+
+        terms = tokenize(text)
+        counts = Counter(terms)
+        stamp = int(self._row_stamps[row])
+
+        for term, tf in counts.items():
+            if term not in self._rows:
+                self._rows[term] = array("q")
+                self._tfs[term] = array("H")
+                self._stamps[term] = array("q")
+            self._rows[term].append(row)
+            self._tfs[term].append(min(tf, 65_535))
+            self._stamps[term].append(stamp)
+            self._df[term] += 1
+            self._cache.pop(term, None)
+
+        self._row_terms[row] = tuple(counts)
+        self._lengths[row] = len(terms)
+        self._total_length += len(terms)
+
+    def remove(self, row: int) -> None:
+        """Remove a row from the index (its postings become stale)."""
+        terms = self._row_terms.pop(row, None)
+        if terms is None:
+            return
+
+        for term in terms:
+            self._df[term] -= 1
+            if self._df[term] <= 0:
+                del self._df[term]
+                del self._rows[term], self._tfs[term], self._stamps[term]
+            self._cache.pop(term, None)
+
+        self._total_length -= int(self._lengths[row])
+        self._lengths[row] = 0
+        self._row_stamps[row] += 1
+
+    def rebuild(self, texts: list[str]) -> None:
+        """Re-index from scratch; row i gets texts[i]."""
+        self.clear()
+        for row, text in enumerate(texts):
+            self.add(row, text)
+
+    def clear(self) -> None:
+        """Remove every row."""
+        self._rows, self._tfs, self._stamps = {}, {}, {}
+        self._df = Counter()
+        self._cache = {}
+        self._row_terms = {}
+        self._lengths = np.zeros(0, dtype=np.float32)
+        self._row_stamps = np.zeros(0, dtype=np.int64)
+        self._total_length = 0
+
+    def _postings(self, term: str) -> tuple[np.ndarray, np.ndarray]:
+        """Get (and cache) a term's live postings as (rows, tfs)."""
+        cached = self._cache.get(term)
+        if cached is None:
+            rows = np.frombuffer(self._rows[term], dtype=np.int64).astype(np.intp)
+            tfs = np.frombuffer(self._tfs[term], dtype=np.uint16).astype(np.float32)
+            stamps = np.frombuffer(self._stamps[term], dtype=np.int64)
+            live = stamps == self._row_stamps[rows]
+            cached = (rows[live], tfs[live])
+            self._cache[term] = cached
+        return cached
+
+    def stats(self, query: str) -> BM25Stats:
+        """
+        Get this index's statistics for a query's terms.
+
+        Args:
+            query: The query text
+
+        Returns:
+            BM25Stats with N, the total length and each indexed query
+            term's document frequency
+        """
+        return BM25Stats(
+            n_docs=len(self._row_terms),
+            total_length=self._total_length,
+            df={t: self._df[t] for t in dict.fromkeys(tokenize(query)) if t in self._df}
+        )
+
+    def scores(
+        self,
+        query: str,
+        stats: BM25Stats | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Score every row that contains at least one query term.
+
+        Args:
+            query: The query text
+            stats: Corpus statistics to score with (None = this index's
+                own; see merge_stats)
+
+        Returns:
+            Tuple of (rows, BM25 scores), in no particular order
+        """
+        if stats is None:
+            stats = self.stats(query)
+        terms = [t for t in dict.fromkeys(tokenize(query)) if t in self._df]
+        if not terms or stats.n_docs == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+
+        n_docs = stats.n_docs
+        avg_length = stats.total_length / n_docs or 1.0
+        scores = np.zeros(len(self._lengths), dtype=np.float32)
+        matched = np.zeros(len(self._lengths), dtype=bool)
+
+        for term in terms:
+            rows, tfs = self._postings(term)
+            df = stats.df.get(term, self._df[term])
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[rows] / avg_length)
+            scores[rows] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+            matched[rows] = True
+
+        rows = np.flatnonzero(matched)
+        return rows, scores[rows]
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        rows: np.ndarray | None = None,
+        stats: BM25Stats | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the best-matching rows for a query.
+
+        Args:
+            query: The query text
+            top_k: Number of rows to return
+            rows: Only consider these rows (e.g. a metadata filter)
+            stats: Corpus statistics to score with (None = this index's own)
+
+        Returns:
+            Tuple of (rows, BM25 scores), best first
+        """
+        hits, scores = self.scores(query, stats)
+        if rows is not None and len(hits):
+            keep = np.isin(hits, rows, assume_unique=True)
+            hits, scores = hits[keep], scores[keep]
+
+        order = top_k_indices(scores, top_k)
+        return hits[order], scores[order]
@@ -0,0 +1,194 @@
+"""
+Live Indexing
+=============
+
+Keeps the vector store up to date from Slack message events, so new
+messages are searchable seconds after they are posted instead of after
+the next index pass.
+
+Events handled (from the `message` event the bot already receives):
+- plain message:        embed and add it
+- message_changed:      re-embed the edited text and replace the document
+- message_deleted:      remove the document
+
+Messages that live in a larger document - a thread window or a window of
+short messages (see chunking.py) - rebuild that document instead: the
+indexer re-fetches the thread or time range from Slack and re-chunks it.
+A new short message waits for the next index pass instead: it belongs in a
+window with its neighbours, and storing it alone would keep it out of one.
+
+DMs (channel_type "im"/"mpim") are never indexed - the batch indexer only
+covers channels, and live indexing follows the same rule.
+
+Micro-Batching:
+    Embedding one message per request wastes round trips when a channel
+    is busy. Events are queued by document ID and flushed together once
+    the batch window (e.g. 1 second) passes or max_batch events are
+    queued, whichever comes first:
+
+        event -> pending[doc_id] -> (window / max_batch) -> flush
+                                                   embed + add_batch + delete
+
+    Keying by document ID means a message that is posted and edited (or
+    deleted) within one window is only embedded once - in its final state.
+
+    Flushes run one at a time, so an edit can never be overwritten by an
+    older version of the same message still being embedded.
+
+Cursors:
+    Live events never move a channel's high-water mark. A flush that
+    fails drops its batch, and events are lost while the socket is
+    disconnected; because the cursor stays behind them, the next index
+    pass fetches those messages again. Messages that were stored live
+    are fetched too but skipped without re-embedding (the same document
+    is already stored), so the cost is Slack history calls, not vectors.
+"""
+
+import asyncio
+from typing import Any
+
+from src.rag.indexer import ChannelIndexer
+from src.utils.logger import Logger
+
+logger = Logger("LiveIndexer")
+
+# Channel types that are never indexed
+PRIVATE_CHANNEL_TYPES = {"im", "mpim"}
+
+
+class LiveIndexer:
+    """
+    Micro-batching indexer for Slack message events.
+
+    Example:
+        live = LiveIndexer(indexer, batch_window=1.0, max_batch=100)
+
+        # In the `message` event handler (returns immediately)
+        live.submit(event)
+
+        # On shutdown
+        await live.close()
+    """
+
+    def __init__(
+        self,
+        indexer: ChannelIndexer,
+        batch_window: float = 1.0,
+        max_batch: int = 100
+    ):
+        """
+        Initialize the live indexer.
+
+        Args:
+            indexer: Channel indexer that embeds and stores messages
+            batch_window: Seconds to collect events before flushing
+            max_batch: Queued events that trigger an immediate flush
+        """
+        self.indexer = indexer
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+
+        # Document ID -> (channel ID, message, deleted?). A deleted message
+        # is the event's previous_message (its thread_ts finds the thread)
+        self._pending: dict[str, tuple[str, dict[str, Any], bool]] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_tasks: set[asyncio.Task[None]] = set()
+        self._lock = asyncio.Lock()
+
+        # Counters (for logging and monitoring)
+        self.events = 0
+        self.batches = 0
+        self.indexed = 0
+        self.removed = 0
+
+    def submit(self, event: dict[str, Any]) -> bool:
+        """
+        Queue a Slack `message` event for indexing.
+
+        Must be called from the event loop. Never blocks: the work happens
+        in a background flush.
+
+        Args:
+            event: The Slack event payload
+
+        Returns:
+            True if the event was queued, False if it is not indexable
+        """
+        channel_id = event.get("channel")
+        if not channel_id or event.get("channel_type") in PRIVATE_CHANNEL_TYPES:
+            return False
+
+        subtype = event.get("subtype")
+        deleted = False
+        if subtype is None:
+            message = event
+        elif subtype == "message_changed":
+            message = event.get("message") or {}
+        elif subtype == "message_deleted":
+            message = {**(event.get("previous_message") or {}), "ts": event.get("deleted_ts")}
+            deleted = True
+        else:
+            return False
+
+        ts = message.get("ts")
+        if not ts:
+            return False
+
+        self._pending[f"{channel_id}_{ts}"] = (channel_id, message, deleted)
+        self.events += 1
+
+        if len(self._pending) >= self.max_batch:
+            # Batch is full - flush now
+            self._start_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.batch_window, self._start_flush
+            )
+
+        return True
+
+    def _start_flush(self) -> None:
+        """Flush everything queued in the current window as one batch."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending, self._pending = self._pending, {}
+        if pending:
+            task = asyncio.ensure_future(self._flush(pending))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, pending: dict[str, tuple[str, dict[str, Any], bool]]) -> None:
+        """Embed and store one batch of changes."""
+        messages: dict[str, list[dict[str, Any]]] = {}
+        deleted: dict[str, list[dict[str, Any]]] = {}
+        for channel_id, message, is_deleted in pending.values():
+            target = deleted if is_deleted else messages
+            target.setdefault(channel_id, []).append(message)
+
+        async with self._lock:
+            try:
+                indexed, removed = await self.indexer.apply_changes(messages, deleted)
+            except Exception as e:
+                logger.error(
+                    f"Error indexing {len(pending)} live messages (left for the next index pass)", e
+                )
+                return
+
+        self.batches += 1
+        self.indexed += indexed
+        self.removed += removed
+        logger.debug(
+            f"Live batch: {len(pending)} events, {indexed} stored, {removed} removed"
+        )
+
+    async def flush(self) -> None:
+        """Flush queued events now and wait for every running flush."""
+        self._start_flush()
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks)
+
+    async def close(self) -> None:
+        """Flush remaining events (call on shutdown)."""
+        await self.flush()
@@ -0,0 +1,270 @@
+"""
+Metadata Index
+==============
+
+Inverted indexes over document metadata, so filtered searches only score
+the rows that can match.
+
+Without an index, a filter like {"channel": "C123"} has to look at every
+document's metadata in Python. With one, the store looks up the set of
+rows for "channel=C123" directly and runs the dot product on just those.
+
+Indexed Fields:
+- channel: Slack channel ID
+- author: Slack user ID
+- time bucket: the day (UTC) derived from the Slack "ts" metadata
+
+Time Range Queries:
+    The day buckets double as a coarse range index on timestamp. A query
+    for [since, until] takes the rows of every bucket in the range; only
+    the first and last bucket can contain out-of-range rows, and those are
+    refined against a per-row timestamp array.
+
+    Example: "What did #payments say last week" touches only rows that are
+    both in the #payments posting list and in the last 7 day buckets.
+
+Time Spans:
+    A document that covers several messages (see chunking.py) records the
+    ts of its last message as "ts_end". A second per-row array holds it
+    (ts_end = ts for single messages), so covering(ts) finds every
+    document whose span contains a given message with two vectorized
+    comparisons.
+"""
+
+import math
+from typing import Any
+
+import numpy as np
+
+# Metadata fields with equality (posting list) indexes
+INDEXED_FIELDS = ("channel", "author")
+
+SECONDS_PER_DAY = 86_400
+
+
+def parse_ts(value: Any) -> float:
+    """Parse a Slack timestamp ("1700000000.000100") into epoch seconds (NaN if missing)."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class MetadataIndex:
+    """
+    Row-level inverted indexes for metadata filtering.
+
+    Rows are the store's row numbers. Posting lists are kept as sets for
+    O(1) updates and converted to sorted arrays (cached) when queried.
+
+    Example:
+        index = MetadataIndex()
+        index.add(0, {"channel": "C1", "author": "U1", "ts": "1700000000.0001"})
+        index.add(1, {"channel": "C2", "author": "U1", "ts": "1700090000.0001"})
+
+        rows = index.candidates({"channel": "C1"}, since=1699990000)
+        # -> array([0])
+    """
+
+    def __init__(self, bucket_seconds: int = SECONDS_PER_DAY):
+        """
+        Initialize an empty index.
+
+        Args:
+            bucket_seconds: Width of a time bucket
+        """
+        self.bucket_seconds = bucket_seconds
+
+        # field -> value -> rows
+        self._postings: dict[str, dict[Any, set[int]]] = {f: {} for f in INDEXED_FIELDS}
+        # time bucket -> rows
+        self._buckets: dict[int, set[int]] = {}
+        # Cached sorted arrays, keyed by ("field", value) or ("bucket", n)
+        self._cache: dict[tuple[str, Any], np.ndarray] = {}
+
+        # Per-row state needed to undo an entry on update
+        self._row_keys: dict[int, tuple[tuple[str, Any], ...]] = {}
+        # Per-row timestamp and end of the covered span (NaN if unknown)
+        self._timestamps = np.empty(0, dtype=np.float64)
+        self._ends = np.empty(0, dtype=np.float64)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Per-row timestamps in epoch seconds (NaN if unknown)."""
+        return self._timestamps
+
+    def _keys_for(self, metadata: dict[str, Any], ts: float) -> tuple[tuple[str, Any], ...]:
+        """Get the index keys a document belongs to."""
+        keys = [(f, metadata[f]) for f in INDEXED_FIELDS if metadata.get(f) is not None]
+        if not math.isnan(ts):
+            keys.append(("bucket", int(ts // self.bucket_seconds)))
+        return tuple(keys)
+
+    def _table(self, field: str) -> dict[Any, set[int]]:
+        """Get the posting sets for a field (time buckets or an indexed field)."""
+        return self._buckets if field == "bucket" else self._postings[field]
+
+    def _posting(self, key: tuple[str, Any]) -> set[int] | None:
+        """Get the posting set for a key."""
+        field, value = key
+        return self._table(field).get(value)
+
+    def add(self, row: int, metadata: dict[str, Any]) -> None:
+        """
+        Index (or re-index) a row.
+
+        Args:
+            row: The row number
+            metadata: The document's metadata
+        """
+        self.remove(row)
+
+        ts = parse_ts(metadata.get("ts"))
+        if row >= len(self._timestamps):
+            capacity = max(row + 1, 2 * len(self._timestamps))
+            self._timestamps = _grown(self._timestamps, capacity)
+            self._ends = _grown(self._ends, capacity)
+        self._timestamps[row] = ts
+        self._ends[row] = parse_ts(metadata["ts_end"]) if "ts_end" in metadata else ts
+
+        keys = self._keys_for(metadata, ts)
+        for key in keys:
+            self._table(key[0]).setdefault(key[1], set()).add(row)
+            self._cache.pop(key, None)
+        self._row_keys[row] = keys
+
+    def remove(self, row: int) -> None:
+        """Remove a row from every posting list."""
+        keys = self._row_keys.pop(row, None)
+        if keys is None:
+            return
+
+        for key in keys:
+            posting = self._posting(key)
+            if posting is not None:
+                posting.discard(row)
+            self._cache.pop(key, None)
+        self._timestamps[row] = math.nan
+        self._ends[row] = math.nan
+
+    def rebuild(self, metadatas: list[dict[str, Any]]) -> None:
+        """Re-index from scratch; row i gets metadatas[i]."""
+        self.clear()
+        for row, metadata in enumerate(metadatas):
+            self.add(row, metadata)
+
+    def clear(self) -> None:
+        """Remove every row."""
+        self._postings = {f: {} for f in INDEXED_FIELDS}
+        self._buckets = {}
+        self._cache = {}
+        self._row_keys = {}
+        self._timestamps = np.empty(0, dtype=np.float64)
+        self._ends = np.empty(0, dtype=np.float64)
+
+    def _rows_for(self, key: tuple[str, Any]) -> np.ndarray:
+        """Get (and cache) the sorted rows for a key."""
+        rows = self._cache.get(key)
+        if rows is None:
+            posting = self._posting(key) or set()
+            rows = np.fromiter(posting, dtype=np.intp, count=len(posting))
+            rows.sort()
+            self._cache[key] = rows
+        return rows
+
+    def _rows_in_range(self, since: float | None, until: float | None) -> np.ndarray:
+        """Get the rows with since <= ts <= until using the day buckets."""
+        if not self._buckets:
+            return np.empty(0, dtype=np.intp)
+
+        first = int(since // self.bucket_seconds) if since is not None else min(self._buckets)
+        last = int(until // self.bucket_seconds) if until is not None else max(self._buckets)
+
+        buckets = [b for b in self._buckets if first <= b <= last]
+        if not buckets:
+            return np.empty(0, dtype=np.intp)
+
+        rows = np.concatenate([self._rows_for(("bucket", b)) for b in buckets])
+
+        # Only the edge buckets can hold rows outside the range
+        ts = self._timestamps[rows]
+        mask = np.ones(len(rows), dtype=bool)
+        if since is not None:
+            mask &= ts >= since
+        if until is not None:
+            mask &= ts <= until
+
+        rows = rows[mask]
+        rows.sort()
+        return rows
+
+    def covering(self, ts: float, filters: dict[str, Any] | None = None) -> np.ndarray:
+        """
+        Get the rows whose time span (ts .. ts_end) contains a timestamp.
+
+        Args:
+            ts: The timestamp (epoch seconds)
+            filters: Metadata equality filters (indexed fields only)
+
+        Returns:
+            Sorted matching rows
+        """
+        rows = self.candidates(filters, until=ts)
+        if rows is None:
+            # Can't happen: the time range is always filtered on
+            return np.empty(0, dtype=np.intp)
+        covered: np.ndarray = rows[self._ends[rows] >= ts]
+        return covered
+
+    def can_filter(self, field: str) -> bool:
+        """Whether a metadata field is covered by an index."""
+        return field in INDEXED_FIELDS
+
+    def candidates(
+        self,
+        filters: dict[str, Any] | None = None,
+        since: float | None = None,
+        until: float | None = None
+    ) -> np.ndarray | None:
+        """
+        Get the rows matching indexed equality filters and a time range.
+
+        Filters on fields without an index are ignored here; the caller
+        must check those separately.
+
+        Args:
+            filters: Metadata equality filters (None values are ignored)
+            since: Minimum timestamp (epoch seconds, inclusive)
+            until: Maximum timestamp (epoch seconds, inclusive)
+
+        Returns:
+            Sorted matching rows, or None if nothing indexed was filtered on
+        """
+        row_sets = [
+            self._rows_for((field, value))
+            for field, value in (filters or {}).items()
+            if value is not None and self.can_filter(field)
+        ]
+
+        if since is not None or until is not None:
+            row_sets.append(self._rows_in_range(since, until))
+
+        if not row_sets:
+            return None
+
+        # Intersect smallest first so each step is as cheap as possible
+        row_sets.sort(key=len)
+        rows = row_sets[0]
+        for other in row_sets[1:]:
+            if len(rows) == 0:
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+
+        return rows
+
+
+def _grown(values: np.ndarray, capacity: int) -> np.ndarray:
+    """Copy a per-row array into a larger NaN-filled one."""
+    grown = np.full(capacity, math.nan)
+    grown[:len(values)] = values
+    return grown
@@ -0,0 +1,378 @@
+"""
+Query Result Cache
+==================
+
+Caches RAG search results, so a question that is asked again (by the same
+or another user) is answered without embedding the query or scanning the
+store.
+
+Why cache results?
+- The same questions come up over and over: "what happened in standup",
+  "summarize #engineering today"
+- Each search costs an embedding call plus a pass over every row
+- The store changes only when messages are indexed, so a result stays
+  correct until the next write
+
+Two Tiers:
+1. Exact: keyed by the normalized query text (lowercased, whitespace
+   collapsed, trailing punctuation dropped) plus the search filters
+   (top_k, channel, since). Checked before the query is embedded.
+2. Semantic (optional): once the query is embedded, its vector is compared
+   with the vectors of the cached queries that used the same filters. If
+   one is within the cosine similarity threshold ("what happened at
+   standup?" vs "what happened in standup"), its results are reused and
+   the store is not scanned.
+
+Invalidation:
+    Every entry belongs to a store generation (VectorStore.generation,
+    bumped by each add, delete and clear). When the generation moves on,
+    the whole cache is dropped - a new message may belong in any result,
+    so no entry can be trusted. Results computed against an older
+    generation than the cache has seen are never stored.
+
+    Scores also depend on the clock: recency weights decay and a max_age
+    cutoff moves even when nothing is indexed. With ttl_seconds set (e.g.
+    a tenth of the recency half-life), an entry older than that is
+    dropped on lookup, so cached rankings never drift far from fresh ones.
+
+Size:
+    At most max_entries results are kept; the least recently used entry
+    is evicted first. Query vectors live in one preallocated matrix, so a
+    semantic lookup is a single matrix-vector product.
+
+stats() reports exact hits, semantic hits, misses and the hit rate.
+"""
+
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from src.utils.logger import Logger
+
+logger = Logger("QueryCache")
+
+# Punctuation that doesn't change what a query asks for
+TRAILING_PUNCTUATION = "?!.,;: "
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for exact cache lookups.
+
+    Args:
+        query: The search query
+
+    Returns:
+        Lowercased query with whitespace collapsed and trailing
+        punctuation removed
+    """
+    return WHITESPACE.sub(" ", query.lower()).strip(TRAILING_PUNCTUATION)
+
+
+@dataclass
+class QueryCacheStats:
+    """
+    Query cache counters.
+
+    Attributes:
+        exact_hits: Lookups answered by the normalized query text
+        semantic_hits: Lookups answered by a similar cached query
+        misses: Searches that had to run against the store
+        invalidations: Times the cache was dropped because the store changed
+        expirations: Entries dropped because they outlived ttl_seconds
+        entries: Results currently cached
+    """
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    expirations: int = 0
+    entries: int = 0
+
+    @property
+    def hits(self) -> int:
+        """Lookups answered from either tier."""
+        return self.exact_hits + self.semantic_hits
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were hits (0 if none yet)."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class _Entry:
+    """A cached result list, when it was stored and its vector slot (-1 = none)."""
+    results: list[Any]
+    scope: Hashable
+    stored_at: float
+    slot: int = -1
+
+
+class QueryCache:
+    """
+    LRU cache of search results, invalidated by store generation and age.
+
+    Example:
+        cache = QueryCache(max_entries=256, similarity_threshold=0.95, ttl_seconds=3600)
+        scope = (top_k, channel_id, since)
+
+        results = cache.get(query, scope, store.generation)
+        if results is None:
+            embedding = await embed(query)
+            results = cache.get_similar(query, embedding, scope, store.generation)
+        if results is None:
+            results = search(embedding)
+            cache.put(query, scope, store.generation, results, embedding)
+
+        print(cache.stats().hit_rate)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        similarity_threshold: float | None = None,
+        ttl_seconds: float | None = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached results
+            similarity_threshold: Cosine similarity at which another
+                query's results are reused (None disables the semantic tier)
+            ttl_seconds: Drop entries this long after they were stored
+                (None = keep them until the store changes)
+        """
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+
+        # (normalized query, scope) -> entry, least recently used first
+        self._entries: OrderedDict[tuple[str, Hashable], _Entry] = OrderedDict()
+        self._generation: int | None = None
+
+        # Semantic tier: unit-normalized query vectors, one row per slot
+        self._vectors: np.ndarray | None = None
+        self._slot_keys: list[tuple[str, Hashable] | None] = []
+        self._free_slots: list[int] = []
+
+        self._stats = QueryCacheStats()
+
+    def __len__(self) -> int:
+        """Number of cached results."""
+        return len(self._entries)
+
+    def _sync(self, generation: int) -> bool:
+        """
+        Move the cache to a store generation.
+
+        Returns:
+            False if the generation is older than the cache's (stale caller)
+        """
+        if generation == self._generation:
+            return True
+        if self._generation is not None and generation < self._generation:
+            return False
+
+        if self._entries:
+            self._stats.invalidations += 1
+            self.clear()
+        self._generation = generation
+        return True
+
+    def _expired(self, key: tuple[str, Hashable], now: float) -> bool:
+        """Check if an entry outlived ttl_seconds, dropping it if so."""
+        if self.ttl_seconds is None or now - self._entries[key].stored_at <= self.ttl_seconds:
+            return False
+        self._remove(key)
+        self._stats.expirations += 1
+        return True
+
+    def get(self, query: str, scope: Hashable, generation: int) -> list[Any] | None:
+        """
+        Look up results by query text.
+
+        Args:
+            query: The search query (normalized here)
+            scope: Hashable search filters the results were computed with
+            generation: Current store generation
+
+        Returns:
+            A copy of the cached results, or None
+        """
+        if not self._sync(generation):
+            return None
+
+        key = (normalize_query(query), scope)
+        entry = self._entries.get(key)
+        if entry is None or self._expired(key, time.monotonic()):
+            return None
+
+        self._entries.move_to_end(key)
+        self._stats.exact_hits += 1
+        return list(entry.results)
+
+    def get_similar(
+        self,
+        query: str,
+        embedding: list[float],
+        scope: Hashable,
+        generation: int
+    ) -> list[Any] | None:
+        """
+        Look up results of a similar query with the same filters.
+
+        On a hit, the results are also cached under this query's text, so
+        repeating it is an exact hit.
+
+        Args:
+            query: The search query
+            embedding: The query's embedding
+            scope: Hashable search filters the results were computed with
+            generation: Current store generation
+
+        Returns:
+            A copy of the cached results, or None
+        """
+        if (
+            self.similarity_threshold is None
+            or self._vectors is None
+            or len(embedding) != self._vectors.shape[1]
+            or not self._sync(generation)
+        ):
+            return None
+
+        now = time.monotonic()
+        candidates = [
+            (slot, key) for slot, key in enumerate(self._slot_keys)
+            if key is not None and key[1] == scope and not self._expired(key, now)
+        ]
+        if not candidates:
+            return None
+
+        similarities = self._vectors[[slot for slot, _ in candidates]] @ _unit(embedding)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+
+        match = candidates[best][1]
+        self._entries.move_to_end(match)
+        entry = self._entries[match]
+        # The copy expires with the results it was copied from
+        self._insert((normalize_query(query), scope), entry.results, None, entry.stored_at)
+
+        self._stats.semantic_hits += 1
+        logger.debug(
+            f"Semantic hit: '{query[:50]}' ~ '{match[0][:50]}' "
+            f"(similarity {similarities[best]:.3f})"
+        )
+        return list(entry.results)
+
+    def put(
+        self,
+        query: str,
+        scope: Hashable,
+        generation: int,
+        results: list[Any],
+        embedding: list[float] | None = None
+    ) -> None:
+        """
+        Cache the results of a search that missed both tiers.
+
+        Args:
+            query: The search query
+            scope: Hashable search filters the results were computed with
+            generation: Store generation the results were computed at
+            results: The search results
+            embedding: The query's embedding (enables semantic lookups;
+                None for queries that were answered without one)
+        """
+        self._stats.misses += 1
+        if self.max_entries <= 0 or not self._sync(generation):
+            return
+
+        vector = None
+        if embedding is not None and self.similarity_threshold is not None:
+            vector = _unit(embedding)
+        self._insert((normalize_query(query), scope), list(results), vector)
+
+    def _insert(
+        self,
+        key: tuple[str, Hashable],
+        results: list[Any],
+        vector: np.ndarray | None,
+        stored_at: float | None = None
+    ) -> None:
+        """Store an entry, evicting the least recently used if full."""
+        self._remove(key)
+        while len(self._entries) >= self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+        entry = _Entry(
+            results=results,
+            scope=key[1],
+            stored_at=time.monotonic() if stored_at is None else stored_at
+        )
+        if vector is not None:
+            vectors = self._vectors
+            if vectors is None or vectors.shape[1] != len(vector):
+                vectors = self._reset_vectors(len(vector))
+            entry.slot = self._free_slots.pop()
+            vectors[entry.slot] = vector
+            self._slot_keys[entry.slot] = key
+
+        self._entries[key] = entry
+
+    def _remove(self, key: tuple[str, Hashable]) -> None:
+        """Drop an entry and free its vector slot."""
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry.slot >= 0:
+            self._slot_keys[entry.slot] = None
+            self._free_slots.append(entry.slot)
+
+    def _reset_vectors(self, dim: int) -> np.ndarray:
+        """Allocate the vector matrix (forgetting any cached vectors) and return it."""
+        for entry in self._entries.values():
+            entry.slot = -1
+        self._vectors = np.zeros((self.max_entries, dim), dtype=np.float32)
+        self._slot_keys = [None] * self.max_entries
+        self._free_slots = list(range(self.max_entries - 1, -1, -1))
+        return self._vectors
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        self._entries.clear()
+        if self._vectors is not None:
+            self._slot_keys = [None] * self.max_entries
+            self._free_slots = list(range(self.max_entries - 1, -1, -1))
+
+    def stats(self) -> QueryCacheStats:
+        """
+        Get cache statistics.
+
+        Returns:
+            A snapshot of the counters
+        """
+        return QueryCacheStats(
+            exact_hits=self._stats.exact_hits,
+            semantic_hits=self._stats.semantic_hits,
+            misses=self._stats.misses,
+            invalidations=self._stats.invalidations,
+            expirations=self._stats.expirations,
+            entries=len(self._entries)
+        )
+
+
+def _unit(vector: list[float]) -> np.ndarray:
+    """Convert a vector to a unit-length float32 array."""
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm > 0 else array
@@ -0,0 +1,176 @@
+"""
+Ranking
+=======
+
+Recency- and channel-aware scoring on top of similarity.
+
+Why not rank by cosine similarity alone?
+- In Slack, the freshest answer is usually the right one: "when is the
+  deploy?" should find today's message, not last quarter's
+- Some channels (#incidents, #announcements) are more authoritative than
+  others (#random)
+
+Modes:
+- similarity: score = cosine similarity (channel boosts still apply)
+- recency:    score = similarity * weight(age), where
+
+      weight(age) = floor + (1 - floor) * 0.5 ** (age / half_life)
+
+  A message loses half of its boost every half_life; the floor keeps an
+  old but near-perfect match ahead of a recent, barely related one.
+  Messages without a timestamp are treated as old (weight = floor).
+
+Channel Boosts:
+    Per-channel multipliers ({"C123": 1.5, "C456": 0.8}) on top of the
+    mode's score.
+
+Hybrid Search:
+    The same weights multiply the fused reciprocal rank score (see
+    lexical.py) instead of the cosine similarity, so a hybrid score is a
+    small rank-based number (~0.03 at best), not a similarity.
+
+Vectorized:
+    Weights are computed for all candidate rows at once from the store's
+    per-row timestamp array and the channel posting lists - one NumPy
+    expression per search, no per-document Python.
+
+Max Age:
+    Not part of the score - max_age is a filter (since = now - max_age)
+    that removes old rows before anything is scored, so time-bounded
+    questions also scan fewer rows.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from src.rag.metadata_index import parse_ts
+
+# Ranking modes
+RANKING_MODES = ("similarity", "recency")
+
+SECONDS_PER_HOUR = 3600
+
+
+def parse_channel_boosts(value: str) -> dict[str, float]:
+    """
+    Parse channel boosts from a config string.
+
+    Args:
+        value: Comma-separated "CHANNEL_ID:multiplier" pairs,
+            e.g. "C0123ABC:1.5,C0456DEF:0.8" (empty = no boosts)
+
+    Returns:
+        Dict mapping channel ID to multiplier
+
+    Raises:
+        ValueError: If an entry is malformed or a multiplier is not positive
+    """
+    boosts = {}
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        channel, sep, multiplier = entry.partition(":")
+        if not sep or not channel.strip():
+            raise ValueError(f"Invalid channel boost '{entry}' (expected CHANNEL_ID:multiplier)")
+        boost = float(multiplier)
+        if not boost > 0:
+            raise ValueError(f"Channel boost for {channel} must be positive, got {multiplier}")
+        boosts[channel.strip()] = boost
+    return boosts
+
+
+@dataclass(frozen=True)
+class Ranking:
+    """
+    How search results are scored beyond plain similarity.
+
+    Attributes:
+        mode: "similarity" or "recency"
+        half_life_hours: Recency mode: age at which the boost halves
+        floor: Recency mode: weight of a very old message (0-1)
+        channel_boosts: Channel ID -> score multiplier
+
+    Example:
+        ranking = Ranking(mode="recency", half_life_hours=72, channel_boosts={"C123": 1.5})
+        results = store.search(query_embedding, top_k=5, ranking=ranking)
+    """
+    mode: str = "recency"
+    half_life_hours: float = 168.0
+    floor: float = 0.5
+    channel_boosts: dict[str, float] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        """Validate the settings."""
+        if self.mode not in RANKING_MODES:
+            raise ValueError(
+                f"Unknown ranking mode '{self.mode}' (expected one of {RANKING_MODES})"
+            )
+        if self.mode == "recency" and not self.half_life_hours > 0:
+            raise ValueError(f"half_life_hours must be positive, got {self.half_life_hours}")
+        if not 0.0 <= self.floor <= 1.0:
+            raise ValueError(f"floor must be between 0 and 1, got {self.floor}")
+
+    @property
+    def is_plain(self) -> bool:
+        """Whether scores are left as plain similarities."""
+        return self.mode == "similarity" and not self.channel_boosts
+
+    def recency_weights(self, timestamps: np.ndarray, now: float) -> np.ndarray:
+        """
+        Compute the recency weight of every row.
+
+        Args:
+            timestamps: Per-row epoch seconds (NaN if unknown)
+            now: Current epoch seconds
+
+        Returns:
+            float32 weights in [floor, 1] (all 1 in similarity mode)
+        """
+        if self.mode == "similarity":
+            return np.ones(len(timestamps), dtype=np.float32)
+
+        age_hours = np.maximum(now - timestamps, 0.0) / SECONDS_PER_HOUR
+        decay = np.nan_to_num(np.exp2(-age_hours / self.half_life_hours), nan=0.0)
+        return (self.floor + (1.0 - self.floor) * decay).astype(np.float32)
+
+    def document_weights(self, metadata: list[dict[str, Any]], now: float) -> np.ndarray:
+        """
+        Compute recency and channel weights from document metadata.
+
+        The same weights the vector store computes from its per-row arrays,
+        for documents that are not rows of one store (e.g. results merged
+        from several shards).
+
+        Args:
+            metadata: Each document's metadata ("ts" and "channel" are used)
+            now: Current epoch seconds
+
+        Returns:
+            float32 weights, one per document
+        """
+        timestamps = np.array([parse_ts(m.get("ts")) for m in metadata], dtype=np.float64)
+        weights = self.recency_weights(timestamps, now)
+        for i, m in enumerate(metadata):
+            weights[i] *= self.channel_boosts.get(m.get("channel", ""), 1.0)
+        return weights
+
+
+def max_age_since(since: float | None, max_age: float | None, now: float) -> float | None:
+    """
+    Combine a since bound with a max_age filter.
+
+    Args:
+        since: Explicit lower time bound (epoch seconds) or None
+        max_age: Maximum message age in seconds or None
+        now: Current epoch seconds
+
+    Returns:
+        The tighter of the two bounds (None if neither is set)
+    """
+    if max_age is None:
+        return since
+    cutoff = now - max_age
+    return cutoff if since is None else max(since, cutoff)
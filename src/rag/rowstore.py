@@ -0,0 +1,315 @@
+"""
+Row Storage
+===========
+
+In-memory storage for the vector store's embedding rows.
+
+VectorStore keeps one unit-normalized vector per document. How those
+vectors are held in RAM is a trade-off between memory and precision:
+
+Float32Rows:
+    Contiguous float32 matrix - 4 bytes per dimension, exact scores.
+    1536 dims = 6 KB per message.
+
+Int8Rows (scalar quantization):
+    Each row is stored as int8 codes plus one float32 scale:
+        code[i] = round(x[i] / max|x| * 127)
+        x[i]   ~= code[i] * scale,  scale = max|x| / 127
+    1 byte per dimension - 4x smaller than float32 (1536 dims = 1.5 KB).
+
+    Scores use asymmetric distance computation: the query stays in full
+    float32 precision and only the stored side is quantized, so
+        score = (codes @ query) * scale
+    The error is small enough that an exact rerank of a few times top_k
+    candidates (done by VectorStore) recovers exact rankings.
+
+Growth:
+    Rows live in a preallocated buffer whose capacity doubles when full.
+    Appending n rows copies only those n rows; the occasional regrowth
+    copies the existing ones once, so inserting N rows costs O(N) in total
+    instead of the O(N^2) of re-stacking the matrix on every insert.
+    The buffer can be up to 2x the rows it holds.
+
+Both classes also behave like a read-only float32 matrix for slicing and
+fancy indexing (row_storage[10:20], row_storage[[1, 5, 9]]), which is what
+the ANN index uses to train and assign rows.
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+def with_capacity(buffer: np.ndarray, used: int, size: int) -> np.ndarray:
+    """
+    Make sure a buffer has room for `size` rows, doubling its capacity.
+
+    Args:
+        buffer: Current buffer (rows along the first axis)
+        used: Rows of the buffer holding data (copied on growth)
+        size: Rows needed
+
+    Returns:
+        The same buffer if it is large enough, else a larger copy
+    """
+    if size <= len(buffer):
+        return buffer
+    grown = np.empty((max(size, 2 * len(buffer)),) + buffer.shape[1:], dtype=buffer.dtype)
+    grown[:used] = buffer[:used]
+    return grown
+
+
+class RowStorage(ABC):
+    """Interface for in-memory embedding rows."""
+
+    # Rows scored at a time, bounding temporary float32 copies
+    chunk_size = 16_384
+
+    def __init__(self, dim: int):
+        """
+        Initialize empty storage.
+
+        Args:
+            dim: Vector dimension
+        """
+        self.dim = dim
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Number of stored rows."""
+        return self._size
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Shape of the (logical) matrix."""
+        return self._size, self.dim
+
+    @property
+    @abstractmethod
+    def nbytes(self) -> int:
+        """Bytes of RAM allocated for rows (including spare capacity)."""
+
+    @abstractmethod
+    def append(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Append rows.
+
+        Args:
+            vectors: Unit-normalized float32 rows, shape (n, dim)
+
+        Returns:
+            The row numbers assigned to the new vectors
+        """
+
+    @abstractmethod
+    def update(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Overwrite existing rows."""
+
+    @abstractmethod
+    def take(self, rows: np.ndarray | slice) -> np.ndarray:
+        """Get rows as a float32 matrix (reconstructed if quantized)."""
+
+    @abstractmethod
+    def _score_block(self, rows: np.ndarray | slice, queries: np.ndarray) -> np.ndarray:
+        """Score a block of rows against queries; returns shape (n_queries, block)."""
+
+    @abstractmethod
+    def keep(self, rows: np.ndarray) -> None:
+        """Keep only the given rows (in the given order), renumbering them 0..n-1."""
+
+    def scores(self, query: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        """
+        Score rows against a unit-normalized query (dot product).
+
+        Args:
+            query: float32 query vector
+            rows: Rows to score (defaults to every row)
+
+        Returns:
+            float32 scores, one per scored row
+        """
+        scores: np.ndarray = self.scores_many(query.reshape(1, -1), rows)[0]
+        return scores
+
+    def scores_many(self, queries: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        """
+        Score rows against several unit-normalized queries at once.
+
+        Each block of rows is scored with one matrix-matrix product, so N
+        queries cost one pass over the rows instead of N.
+
+        Args:
+            queries: float32 query matrix, shape (n_queries, dim)
+            rows: Rows to score (defaults to every row)
+
+        Returns:
+            float32 scores, shape (n_queries, n_scored_rows)
+        """
+        count = self._size if rows is None else len(rows)
+        out = np.empty((len(queries), count), dtype=np.float32)
+
+        for start in range(0, count, self.chunk_size):
+            end = min(start + self.chunk_size, count)
+            block = slice(start, end) if rows is None else rows[start:end]
+            out[:, start:end] = self._score_block(block, queries)
+
+        return out
+
+    def clear(self) -> None:
+        """Remove every row."""
+        self.keep(np.empty(0, dtype=np.intp))
+
+    def __getitem__(self, key: np.ndarray | slice) -> np.ndarray:
+        """Read rows as float32, like indexing a matrix."""
+        if isinstance(key, slice):
+            return self.take(slice(*key.indices(self._size)))
+        return self.take(np.asarray(key, dtype=np.intp))
+
+
+class Float32Rows(RowStorage):
+    """Rows stored exactly as a contiguous float32 matrix."""
+
+    def __init__(self, dim: int):
+        """Initialize an empty float32 matrix."""
+        super().__init__(dim)
+        self._buffer = np.empty((0, dim), dtype=np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of RAM allocated for the matrix."""
+        return int(self._buffer.nbytes)
+
+    @property
+    def _matrix(self) -> np.ndarray:
+        """The filled part of the buffer (a view)."""
+        return self._buffer[:self._size]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The underlying matrix."""
+        return self._matrix
+
+    def append(self, vectors: np.ndarray) -> np.ndarray:
+        """Copy rows into the buffer, growing it if needed."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        start, end = self._size, self._size + len(vectors)
+        self._buffer = with_capacity(self._buffer, start, end)
+        self._buffer[start:end] = vectors
+        self._size = end
+        return np.arange(start, end)
+
+    def update(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Overwrite existing rows."""
+        self._matrix[rows] = vectors
+
+    def take(self, rows: np.ndarray | slice) -> np.ndarray:
+        """Get rows (a view for slices, a copy for index arrays)."""
+        return self._matrix[rows]
+
+    def _score_block(self, rows: np.ndarray | slice, queries: np.ndarray) -> np.ndarray:
+        """Dot products of the queries with the rows."""
+        scores: np.ndarray = queries @ self._matrix[rows].T
+        return scores
+
+    def scores(self, query: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        """Score rows with a single matrix-vector product."""
+        matrix = self._matrix if rows is None else self._matrix[rows]
+        scores: np.ndarray = matrix @ query
+        return scores
+
+    def scores_many(self, queries: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        """Score rows with a single matrix-matrix product."""
+        matrix = self._matrix if rows is None else self._matrix[rows]
+        scores: np.ndarray = queries @ matrix.T
+        return scores
+
+    def keep(self, rows: np.ndarray) -> None:
+        """Keep only the given rows."""
+        self._buffer = np.ascontiguousarray(self._matrix[rows])
+        self._size = len(self._buffer)
+
+
+class Int8Rows(RowStorage):
+    """Rows stored as int8 codes with a float32 scale per row."""
+
+    def __init__(self, dim: int):
+        """Initialize empty codes and scales (buffers, filled up to len(self))."""
+        super().__init__(dim)
+        self._codes = np.empty((0, dim), dtype=np.int8)
+        self._scales = np.empty(0, dtype=np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of RAM allocated for codes and scales."""
+        return int(self._codes.nbytes + self._scales.nbytes)
+
+    @staticmethod
+    def encode(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Quantize float32 rows to int8 codes and per-row scales.
+
+        Args:
+            vectors: float32 rows, shape (n, dim)
+
+        Returns:
+            Tuple of (codes, scales)
+        """
+        peak = np.abs(vectors).max(axis=1)
+        scales = (peak / 127).astype(np.float32)
+        safe = np.where(scales == 0, 1, scales)
+        codes = np.rint(vectors / safe[:, None]).astype(np.int8)
+        return codes, scales
+
+    def append(self, vectors: np.ndarray) -> np.ndarray:
+        """Quantize and append rows."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        codes, scales = self.encode(vectors)
+        start, end = self._size, self._size + len(vectors)
+        self._codes = with_capacity(self._codes, start, end)
+        self._scales = with_capacity(self._scales, start, end)
+        self._codes[start:end] = codes
+        self._scales[start:end] = scales
+        self._size = end
+        return np.arange(start, end)
+
+    def update(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Re-quantize and overwrite existing rows."""
+        codes, scales = self.encode(np.atleast_2d(np.asarray(vectors, dtype=np.float32)))
+        self._codes[rows] = codes
+        self._scales[rows] = scales
+
+    def take(self, rows: np.ndarray | slice) -> np.ndarray:
+        """Reconstruct approximate float32 rows."""
+        return self._codes[rows].astype(np.float32) * self._scales[rows][:, None]
+
+    def _score_block(self, rows: np.ndarray | slice, queries: np.ndarray) -> np.ndarray:
+        """Asymmetric distance: int8 codes against float32 queries, then rescale."""
+        # Widening a bounded block to float32 lets the product run through BLAS
+        return (queries @ self._codes[rows].astype(np.float32).T) * self._scales[rows]
+
+    def keep(self, rows: np.ndarray) -> None:
+        """Keep only the given rows."""
+        self._codes = np.ascontiguousarray(self._codes[rows])
+        self._scales = self._scales[rows]
+        self._size = len(self._codes)
+
+
+def create_row_storage(compression: str | None, dim: int) -> RowStorage:
+    """
+    Create row storage for a compression mode.
+
+    Args:
+        compression: None/"none" for float32, "int8" for scalar quantization
+        dim: Vector dimension
+
+    Returns:
+        An empty RowStorage
+
+    Raises:
+        ValueError: If the compression mode is unknown
+    """
+    if compression in (None, "none"):
+        return Float32Rows(dim)
+    if compression == "int8":
+        return Int8Rows(dim)
+    raise ValueError(f"Unknown vector compression: {compression}")
@@ -0,0 +1,498 @@
+"""
+Segment Log
+===========
+
+Append-only, segment-based on-disk format for the vector store.
+
+Why segments?
+- Rewriting one big JSON file after every batch costs O(total corpus) writes
+- Embeddings stored as JSON floats are slow to parse and ~3x larger than binary
+- Appending a small file per batch costs O(batch) writes
+
+Directory Layout:
+    data/vectorstore/
+    ├── manifest.json       # Ordered list of live segments + embedding model
+    ├── seg_000001.npy      # float32 embedding rows for segment 1
+    ├── seg_000001.jsonl    # One record per line: id, content, metadata
+    ├── seg_000002.jsonl    # Delete-only segments have no .npy file
+    └── ...
+
+Record Format (one JSON object per line):
+    {"id": "C123_1700000000.000100", "content": "...", "metadata": {...}}
+    {"id": "C123_1700000000.000200", "deleted": true}
+
+    Non-deleted records map, in order, to the rows of the segment's .npy
+    file. Segments are replayed in manifest order and later records win,
+    so updates and deletes never touch existing files.
+
+Loading:
+    Embedding files are opened with np.load(mmap_mode="r") so startup
+    does not parse any floats - the OS pages rows in as they are copied.
+
+Random Access:
+    The log remembers where the latest row of every document lives, so
+    read_vectors() can fetch exact float32 vectors for a handful of
+    documents (e.g. to rerank quantized search results) straight from the
+    memory-mapped files.
+
+Compaction:
+    Over time the log accumulates superseded rows and many small files.
+    compact() replays a prefix of segments and rewrites the live records
+    into a single segment in a background thread, then swaps the manifest.
+    Segments appended while compaction runs are kept after the new one,
+    so the replay order (and therefore the result) is unchanged.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.utils.logger import Logger
+
+logger = Logger("SegmentLog")
+
+
+@dataclass
+class SegmentRecord:
+    """
+    A live record produced by replaying the segment log.
+
+    Attributes:
+        id: Document ID
+        content: Document text
+        metadata: Document metadata
+        segment: Index of the segment (in replay order) holding the row
+        offset: Row offset within that segment's embedding file
+    """
+    id: str
+    content: str
+    metadata: dict[str, Any]
+    segment: int
+    offset: int
+
+
+class SegmentLog:
+    """
+    Append-only segment files plus a manifest.
+
+    Example:
+        log = SegmentLog(Path("data/vectorstore"))
+
+        # Append a batch of documents and deletions
+        log.append(
+            records=[{"id": "a", "content": "hello", "metadata": {}}],
+            embeddings=np.ones((1, 4), dtype=np.float32),
+            deleted_ids=["old_doc"]
+        )
+
+        # Replay everything on startup
+        records, arrays = log.load()
+        matrix = SegmentLog.gather(records, arrays)
+    """
+
+    def __init__(self, directory: Path, max_segments: int = 16):
+        """
+        Initialize the segment log.
+
+        Args:
+            directory: Directory holding the manifest and segment files
+            max_segments: Segment count that triggers background compaction
+        """
+        self.directory = directory
+        self.manifest_file = directory / "manifest.json"
+        self.max_segments = max_segments
+
+        self._lock = threading.Lock()
+        self._compaction_thread: threading.Thread | None = None
+
+        self._segments: list[dict[str, Any]] = []
+        self._next_segment = 1
+        # Embedding model that produced the stored vectors (None = unknown)
+        self._model: str | None = None
+
+        # Document ID -> (segment name, row offset) of its latest row
+        self._locations: dict[str, tuple[str, int]] = {}
+        # Segment name -> memory-mapped embeddings (opened on demand)
+        self._mmaps: dict[str, np.ndarray] = {}
+
+        directory.mkdir(parents=True, exist_ok=True)
+        self._read_manifest()
+
+    @property
+    def exists(self) -> bool:
+        """Whether a manifest has been written to disk."""
+        return self.manifest_file.exists()
+
+    @property
+    def segment_count(self) -> int:
+        """Number of live segments."""
+        return len(self._segments)
+
+    @property
+    def model(self) -> str | None:
+        """Embedding model recorded in the manifest (None if never set)."""
+        return self._model
+
+    def set_model(self, model: str) -> None:
+        """Record the embedding model that produced the stored vectors."""
+        with self._lock:
+            self._model = model
+            self._write_manifest()
+
+    # ==========================================================================
+    # Manifest
+    # ==========================================================================
+
+    def _read_manifest(self) -> None:
+        """Load the manifest if one exists."""
+        if not self.manifest_file.exists():
+            return
+
+        with open(self.manifest_file) as f:
+            manifest = json.load(f)
+
+        self._segments = manifest.get("segments", [])
+        self._next_segment = manifest.get("next_segment", len(self._segments) + 1)
+        self._model = manifest.get("model")
+
+    def _write_manifest(self) -> None:
+        """Atomically replace the manifest. Caller must hold the lock."""
+        manifest = {
+            "version": 1,
+            "segments": self._segments,
+            "next_segment": self._next_segment,
+            "model": self._model,
+        }
+        tmp_file = self.manifest_file.with_suffix(".json.tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_file, self.manifest_file)
+
+    def _allocate_name(self) -> str:
+        """Reserve a new segment name. Caller must hold the lock."""
+        name = f"seg_{self._next_segment:06d}"
+        self._next_segment += 1
+        return name
+
+    # ==========================================================================
+    # Segment Files
+    # ==========================================================================
+
+    def _write_segment(
+        self,
+        name: str,
+        records: list[dict[str, Any]],
+        embeddings: np.ndarray | None
+    ) -> dict[str, Any]:
+        """
+        Write a segment's files and return its manifest entry.
+
+        Files are written under a temporary name and renamed into place,
+        so a crash never leaves a half-written segment referenced.
+        """
+        rows = 0 if embeddings is None else len(embeddings)
+
+        if rows:
+            npy_file = self.directory / f"{name}.npy"
+            tmp_npy = self.directory / f"{name}.tmp.npy"
+            np.save(tmp_npy, np.ascontiguousarray(embeddings, dtype=np.float32))
+            os.replace(tmp_npy, npy_file)
+
+        jsonl_file = self.directory / f"{name}.jsonl"
+        tmp_jsonl = self.directory / f"{name}.jsonl.tmp"
+        with open(tmp_jsonl, "w") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")))
+                f.write("\n")
+        os.replace(tmp_jsonl, jsonl_file)
+
+        return {"name": name, "rows": rows, "records": len(records)}
+
+    def _read_segment(
+        self, entry: dict[str, Any]
+    ) -> tuple[list[dict[str, Any]], np.ndarray | None]:
+        """Read a segment's records and memory-map its embeddings."""
+        name = entry["name"]
+
+        with open(self.directory / f"{name}.jsonl") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+
+        embeddings = None
+        if entry.get("rows"):
+            embeddings = np.load(self.directory / f"{name}.npy", mmap_mode="r")
+
+        return records, embeddings
+
+    def _delete_segment_files(self, entry: dict[str, Any]) -> None:
+        """Remove a segment's files from disk."""
+        self._mmaps.pop(entry["name"], None)
+        for suffix in (".npy", ".jsonl"):
+            path = self.directory / f"{entry['name']}{suffix}"
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Could not remove {path.name}: {e}")
+
+    # ==========================================================================
+    # Public API
+    # ==========================================================================
+
+    def append(
+        self,
+        records: list[dict[str, Any]],
+        embeddings: np.ndarray | None,
+        deleted_ids: list[str] | None = None
+    ) -> None:
+        """
+        Append a new segment.
+
+        Args:
+            records: Document records (id, content, metadata), one per row
+            embeddings: float32 rows matching records, or None if there are none
+            deleted_ids: Document IDs to delete (applied before the records)
+        """
+        all_records = [{"id": doc_id, "deleted": True} for doc_id in deleted_ids or []]
+        all_records.extend(records)
+
+        if not all_records:
+            return
+
+        with self._lock:
+            name = self._allocate_name()
+
+        entry = self._write_segment(name, all_records, embeddings if records else None)
+
+        with self._lock:
+            self._segments.append(entry)
+            self._write_manifest()
+
+            for doc_id in deleted_ids or []:
+                self._locations.pop(doc_id, None)
+            for offset, record in enumerate(records):
+                self._locations[record["id"]] = (name, offset)
+
+        logger.debug(f"Appended segment {name} ({len(records)} rows)")
+
+        if len(self._segments) > self.max_segments:
+            self.compact_in_background()
+
+    def load(
+        self,
+        segments: list[dict[str, Any]] | None = None
+    ) -> tuple[list[SegmentRecord], list[np.ndarray | None]]:
+        """
+        Replay segments and return the live records.
+
+        Args:
+            segments: Manifest entries to replay (defaults to all live segments)
+
+        Returns:
+            Tuple of (live records in first-insertion order, memory-mapped
+            embedding array per segment, indexed by SegmentRecord.segment)
+        """
+        replay_all = segments is None
+        if segments is None:
+            with self._lock:
+                segments = list(self._segments)
+
+        live: dict[str, SegmentRecord] = {}
+        arrays: list[np.ndarray | None] = []
+
+        for seg_index, entry in enumerate(segments):
+            records, embeddings = self._read_segment(entry)
+            arrays.append(embeddings)
+
+            offset = 0
+            for record in records:
+                doc_id = record["id"]
+                if record.get("deleted"):
+                    live.pop(doc_id, None)
+                    continue
+
+                if doc_id in live:
+                    # Update: keep the original position, point at the new row
+                    existing = live[doc_id]
+                    existing.content = record["content"]
+                    existing.metadata = record.get("metadata", {})
+                    existing.segment = seg_index
+                    existing.offset = offset
+                else:
+                    live[doc_id] = SegmentRecord(
+                        id=doc_id,
+                        content=record["content"],
+                        metadata=record.get("metadata", {}),
+                        segment=seg_index,
+                        offset=offset,
+                    )
+                offset += 1
+
+        if replay_all:
+            with self._lock:
+                self._locations = {
+                    r.id: (segments[r.segment]["name"], r.offset) for r in live.values()
+                }
+                for entry, array in zip(segments, arrays):
+                    if array is not None:
+                        self._mmaps[entry["name"]] = array
+
+        return list(live.values()), arrays
+
+    @staticmethod
+    def gather(
+        records: list[SegmentRecord],
+        arrays: list[np.ndarray | None]
+    ) -> np.ndarray | None:
+        """
+        Copy the rows of the given records into one contiguous float32 matrix.
+
+        Rows are gathered with one fancy index per segment rather than one
+        copy per record.
+
+        Args:
+            records: Records returned by load()
+            arrays: Segment arrays returned by load()
+
+        Returns:
+            Matrix with one row per record (same order), or None if empty
+        """
+        if not records:
+            return None
+
+        dim = next(a.shape[1] for a in arrays if a is not None)
+        matrix = np.empty((len(records), dim), dtype=np.float32)
+
+        segments = np.fromiter((r.segment for r in records), dtype=np.intp, count=len(records))
+        offsets = np.fromiter((r.offset for r in records), dtype=np.intp, count=len(records))
+
+        for seg_index in np.unique(segments):
+            positions = np.nonzero(segments == seg_index)[0]
+            matrix[positions] = arrays[seg_index][offsets[positions]]
+
+        return matrix
+
+    def read_vectors(self, doc_ids: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Read the persisted float32 vectors of specific documents.
+
+        Args:
+            doc_ids: Document IDs to read
+
+        Returns:
+            Tuple of (found mask, matrix with one row per ID). Rows for IDs
+            that are not on disk yet are left as zeros.
+        """
+        with self._lock:
+            locations = [self._locations.get(doc_id) for doc_id in doc_ids]
+
+        found = np.array([loc is not None for loc in locations], dtype=bool)
+        by_segment: dict[str, list[tuple[int, int]]] = {}
+        for i, loc in enumerate(locations):
+            if loc is not None:
+                by_segment.setdefault(loc[0], []).append((i, loc[1]))
+
+        vectors = None
+        for name, pairs in by_segment.items():
+            array = self._mmaps.get(name)
+            if array is None:
+                try:
+                    array = np.load(self.directory / f"{name}.npy", mmap_mode="r")
+                except FileNotFoundError:
+                    # Compacted away since we looked up the locations
+                    found[[i for i, _ in pairs]] = False
+                    continue
+                self._mmaps[name] = array
+            if vectors is None:
+                vectors = np.zeros((len(doc_ids), array.shape[1]), dtype=np.float32)
+            positions, offsets = zip(*pairs)
+            vectors[list(positions)] = array[list(offsets)]
+
+        if vectors is None:
+            vectors = np.zeros((len(doc_ids), 0), dtype=np.float32)
+
+        return found, vectors
+
+    def clear(self) -> None:
+        """Remove every segment and reset the manifest."""
+        with self._lock:
+            old_segments = self._segments
+            self._segments = []
+            self._locations = {}
+            self._write_manifest()
+
+        for entry in old_segments:
+            self._delete_segment_files(entry)
+
+    # ==========================================================================
+    # Compaction
+    # ==========================================================================
+
+    def compact_in_background(self) -> None:
+        """Start compaction in a daemon thread if one isn't already running."""
+        if self._compaction_thread and self._compaction_thread.is_alive():
+            return
+
+        self._compaction_thread = threading.Thread(
+            target=self.compact,
+            name="vectorstore-compaction",
+            daemon=True
+        )
+        self._compaction_thread.start()
+
+    def wait_for_compaction(self, timeout: float | None = None) -> None:
+        """Block until a running background compaction finishes."""
+        if self._compaction_thread:
+            self._compaction_thread.join(timeout)
+
+    def compact(self) -> None:
+        """
+        Rewrite the current segments as a single segment of live records.
+
+        Safe to run concurrently with append(): only the segments present
+        when compaction starts are replaced.
+        """
+        with self._lock:
+            prefix = list(self._segments)
+            if len(prefix) <= 1:
+                return
+            name = self._allocate_name()
+
+        try:
+            records, arrays = self.load(prefix)
+            matrix = self.gather(records, arrays)
+            compacted = self._write_segment(
+                name,
+                [{"id": r.id, "content": r.content, "metadata": r.metadata} for r in records],
+                matrix
+            )
+            # Release the memory maps before removing their files
+            del arrays
+
+            with self._lock:
+                if self._segments[:len(prefix)] != prefix:
+                    # The log was cleared while we were compacting
+                    self._delete_segment_files(compacted)
+                    return
+                self._segments = [compacted] + self._segments[len(prefix):]
+                self._write_manifest()
+
+                # Point documents that still live in the old segments at the new one
+                prefix_names = {entry["name"] for entry in prefix}
+                for offset, record in enumerate(records):
+                    location = self._locations.get(record.id)
+                    if location is not None and location[0] in prefix_names:
+                        self._locations[record.id] = (name, offset)
+
+            for entry in prefix:
+                self._delete_segment_files(entry)
+
+            logger.info(
+                f"Compacted {len(prefix)} segments into {name} ({len(records)} records)"
+            )
+
+        except Exception as e:
+            logger.error("Error compacting vector store segments", e)
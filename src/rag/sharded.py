@@ -0,0 +1,758 @@
+"""
+Sharded Vector Store
+====================
+
+Partitions the vector store into one VectorStore per channel (or per hash
+bucket of channels), each with its own segment files and row matrix.
+
+Why shard?
+- A single store keeps every channel's rows in RAM, even channels nobody
+  has asked about in months
+- A channel-filtered question ("what did #payments decide?") only needs
+  that channel's rows
+- Scanning several smaller matrices in parallel uses more than one core
+
+Layout:
+    data/vectorstore_shards/
+        shards.json       # partitioning, model, documents per shard
+        C0123ABC/         # one VectorStore (segment log) per shard
+        C0456DEF/
+
+Partitioning:
+- channel: one shard per Slack channel
+- hash: a fixed number of shards; a channel's shard is crc32(channel)
+  mod num_shards (bounds the number of files with many small channels)
+
+    Document IDs start with their channel ID ("C0123ABC_1700000000.000100",
+    see chunking.py), so a document's shard is known from its ID alone -
+    get, delete and contains never look at other shards.
+
+Lazy Loading:
+    Opening the sharded store only reads shards.json. A shard is loaded
+    the first time something touches it; with max_loaded_shards set, the
+    least recently used shards are unloaded again, so cold channels never
+    occupy RAM.
+
+Parallel Search:
+    An unfiltered search fans out over the shards in a thread pool (NumPy
+    releases the GIL during the matrix products) and merges each shard's
+    sorted top-k with a heap. Scores are cosine similarities (times the
+    same ranking weights) in every shard, so they compare directly.
+
+    A channel filter resolves to a single shard before anything is loaded.
+
+Hybrid Search:
+    RRF scores only mean something within one fusion, so shards are not
+    fused separately: each shard returns its best dense candidates (by
+    similarity) and keyword candidates (by BM25 score), the two lists are
+    merged across shards, and reciprocal rank fusion runs once on the
+    merged rankings.
+
+    BM25 scores depend on corpus statistics (N, average length, document
+    frequencies). Each shard's own statistics would skew them: with
+    shard_by=channel, a word that appears only in one channel is in every
+    document of that shard and gets almost no idf there. So the target
+    shards' statistics for the query terms are summed first and every
+    shard scores with the totals; an unfiltered search gives keywords the
+    same BM25 scores as a single store (equal scores may come back in
+    another order). That costs one more pass over the shards, which with
+    max_loaded_shards set can mean loading cold shards twice. A
+    channel-filtered search reads only that channel's shard, so its idf
+    is the channel's, not the workspace's.
+"""
+
+import heapq
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from itertools import islice
+from pathlib import Path
+from typing import Any, TypeVar
+
+import numpy as np
+
+from src.rag.lexical import RRF_K, merge_stats, reciprocal_rank_fusion
+from src.rag.ranking import Ranking
+from src.rag.vectorstore import VectorDocument, VectorStore
+from src.utils.logger import Logger
+
+logger = Logger("ShardedVectorStore")
+
+# Partitioning schemes
+SHARD_BY = ("channel", "hash")
+
+# Characters allowed in shard directory names
+UNSAFE_NAME = re.compile(r"[^A-Za-z0-9_-]")
+
+T = TypeVar("T")
+
+
+def channel_of(doc_id: str) -> str:
+    """Get the channel ID a document ID starts with ("C123_1700..." -> "C123")."""
+    return doc_id.split("_", 1)[0]
+
+
+def _layout(shard_by: str | None, num_shards: int | None) -> str:
+    """Describe a partitioning for messages ("channel", "hash (16 shards)")."""
+    return f"{shard_by} ({num_shards} shards)" if num_shards else str(shard_by)
+
+
+def _merge_top(lists: list[list[VectorDocument]], top_k: int) -> list[VectorDocument]:
+    """Merge per-shard result lists (each sorted by score) into the overall top k."""
+    return list(islice(heapq.merge(*lists, key=lambda doc: -(doc.score or 0.0)), top_k))
+
+
+class ShardedVectorStore:
+    """
+    Vector store partitioned by channel, with lazily loaded shards.
+
+    Offers the VectorStore methods the indexer and RAGManager use, so it
+    can stand in for a single store.
+
+    Example:
+        def open_shard(path: Path) -> VectorStore:
+            return VectorStore(path, compression="int8", model=model)
+
+        store = ShardedVectorStore(
+            Path("data/vectorstore_shards"), open_shard,
+            shard_by="channel", max_loaded_shards=32
+        )
+
+        store.add_batch(documents)                       # routed by channel
+        results = store.search(query_embedding, top_k=5,
+                               filter_metadata={"channel": "C123"})  # one shard
+    """
+
+    def __init__(
+        self,
+        storage_path: Path,
+        open_shard: Callable[[Path], VectorStore],
+        shard_by: str = "channel",
+        num_shards: int = 16,
+        max_loaded_shards: int = 0,
+        workers: int = 4,
+        model: str | None = None,
+        reset_on_model_change: bool = False
+    ):
+        """
+        Initialize the sharded store.
+
+        Args:
+            storage_path: Directory holding the shard directories
+            open_shard: Opens (or creates) the VectorStore for a shard
+                directory; every shard is configured the same way
+            shard_by: "channel" (one shard per channel) or "hash"
+            num_shards: Number of shards with shard_by="hash"
+            max_loaded_shards: Shards kept in memory at once
+                (0 = no limit; the least recently used are unloaded)
+            workers: Threads searching shards in parallel
+            model: Name of the embedding model whose vectors are stored
+                (None skips the check)
+            reset_on_model_change: If the store holds another model's
+                vectors (or was partitioned differently), clear it instead
+                of raising
+
+        Raises:
+            ValueError: If shard_by is unknown, or the store holds another
+                model's vectors or another partitioning and
+                reset_on_model_change is False
+        """
+        if shard_by not in SHARD_BY:
+            raise ValueError(f"Unknown shard_by '{shard_by}' (expected one of {SHARD_BY})")
+
+        self.storage_path = storage_path
+        self.open_shard = open_shard
+        self.shard_by = shard_by
+        self.num_shards = num_shards
+        self.max_loaded_shards = max_loaded_shards
+        self.workers = workers
+        self.model = model
+
+        self.manifest_file = storage_path / "shards.json"
+
+        # Shard key -> document count, for every shard on disk
+        self._counts: dict[str, int] = {}
+        # Loaded shards, least recently used first
+        self._loaded: OrderedDict[str, VectorStore] = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: dict[str, threading.Lock] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._generation = 0
+
+        storage_path.mkdir(parents=True, exist_ok=True)
+        self._load_manifest(reset_on_model_change)
+
+        logger.info(
+            f"Sharded vector store initialized with {len(self)} documents "
+            f"in {len(self._counts)} shards (by {shard_by})"
+        )
+
+    # ==========================================================================
+    # Manifest
+    # ==========================================================================
+
+    def _load_manifest(self, reset: bool) -> None:
+        """Read shard counts, checking the partitioning and model match."""
+        if not self.manifest_file.exists():
+            self._save_manifest()
+            return
+
+        with open(self.manifest_file) as f:
+            manifest = json.load(f)
+
+        layout = (manifest.get("shard_by"), manifest.get("num_shards"))
+        expected = (self.shard_by, self.num_shards if self.shard_by == "hash" else None)
+        stored_model = manifest.get("model")
+        mismatch = None
+        if layout != expected:
+            mismatch = f"is partitioned as {_layout(*layout)}, not {_layout(*expected)}"
+        elif self.model is not None and stored_model not in (None, self.model):
+            mismatch = f"holds '{stored_model}' embeddings, not '{self.model}'"
+
+        self._counts = {key: int(count) for key, count in manifest.get("shards", {}).items()}
+
+        if mismatch is not None:
+            message = f"Sharded vector store at {self.storage_path} {mismatch}"
+            if not reset:
+                raise ValueError(f"{message}; clear it before changing it")
+            logger.warning(f"{message}; clearing it for re-indexing")
+            self.clear()
+
+        self._save_manifest()
+
+    def _save_manifest(self) -> None:
+        """Atomically replace shards.json."""
+        manifest = {
+            "version": 1,
+            "shard_by": self.shard_by,
+            "num_shards": self.num_shards if self.shard_by == "hash" else None,
+            "model": self.model,
+            "shards": self._counts,
+        }
+        tmp_file = self.manifest_file.with_suffix(".json.tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_file, self.manifest_file)
+
+    # ==========================================================================
+    # Shards
+    # ==========================================================================
+
+    def shard_key(self, channel: str) -> str:
+        """
+        Get the shard a channel's documents live in.
+
+        Args:
+            channel: Slack channel ID
+
+        Returns:
+            The shard's key (also its directory name)
+        """
+        if self.shard_by == "hash":
+            return f"shard_{zlib.crc32(channel.encode()) % self.num_shards:03d}"
+        return UNSAFE_NAME.sub("_", channel) or "_"
+
+    def _shard(self, key: str) -> VectorStore | None:
+        """
+        Get an existing shard, loading it on first access.
+
+        Args:
+            key: The shard key
+
+        Returns:
+            The shard, or None if it doesn't exist
+        """
+        with self._lock:
+            if key not in self._counts and key not in self._loaded:
+                return None
+        return self._open(key)
+
+    def _open(self, key: str) -> VectorStore:
+        """
+        Get a shard, loading it on first access (or creating it).
+
+        Safe to call from the search threads: each shard is loaded once.
+
+        Args:
+            key: The shard key
+
+        Returns:
+            The shard
+        """
+        with self._lock:
+            shard = self._loaded.get(key)
+            if shard is not None:
+                self._loaded.move_to_end(key)
+                return shard
+            loading = self._loading.setdefault(key, threading.Lock())
+
+        with loading:
+            with self._lock:
+                shard = self._loaded.get(key)
+            if shard is None:
+                start = time.perf_counter()
+                shard = self.open_shard(self.storage_path / key)
+                with self._lock:
+                    self._loaded[key] = shard
+                    self._counts.setdefault(key, len(shard))
+                logger.debug(
+                    f"Loaded shard {key} ({len(shard)} documents) "
+                    f"in {(time.perf_counter() - start) * 1000:.0f}ms"
+                )
+        return shard
+
+    def _evict(self, room: int = 0) -> None:
+        """Unload least recently used shards until `room` more fit under the limit."""
+        if self.max_loaded_shards <= 0:
+            return
+        while self._loaded and len(self._loaded) + room > self.max_loaded_shards:
+            key, shard = self._loaded.popitem(last=False)
+            shard.wait_for_compaction()
+            logger.debug(f"Unloaded shard {key}")
+
+    def _target_shards(self, filter_metadata: dict[str, Any] | None) -> list[str]:
+        """Get the shards a search has to look at (one for a channel filter)."""
+        channel = (filter_metadata or {}).get("channel")
+        if channel is not None:
+            key = self.shard_key(channel)
+            return [key] if key in self._counts else []
+        return list(self._counts)
+
+    def _map(self, fn: Callable[[VectorStore], T], keys: list[str]) -> list[T]:
+        """
+        Run a function on several shards, in parallel where possible.
+
+        With a shard limit, shards are processed in waves of at most
+        max_loaded_shards, loaded ones first, so a search over every shard
+        never holds more than the limit in memory.
+
+        Returns:
+            One result per shard
+        """
+        def run(keys: list[str]) -> list[T]:
+            return [fn(self._open(key)) for key in keys]
+
+        # Loaded shards first: they cost nothing to search
+        keys = sorted(keys, key=lambda key: key not in self._loaded)
+        wave = self.max_loaded_shards if self.max_loaded_shards > 0 else len(keys)
+
+        results: list[T] = []
+        for start in range(0, len(keys), max(wave, 1)):
+            batch = keys[start:start + wave]
+            self._evict(room=sum(1 for key in batch if key not in self._loaded))
+            if len(batch) == 1 or self.workers <= 1:
+                results.extend(run(batch))
+                continue
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="vectorstore-shard"
+                )
+            # One task per worker (every workers-th shard), not one per
+            # shard: with many small shards, task overhead beats the scans
+            tasks = [batch[w::self.workers] for w in range(min(self.workers, len(batch)))]
+            done = self._executor.map(run, tasks)
+            by_key = {
+                key: result
+                for task, found in zip(tasks, done)
+                for key, result in zip(task, found)
+            }
+            results.extend(by_key[key] for key in batch)
+        return results
+
+    def _shard_of(self, doc_id: str) -> VectorStore | None:
+        """Get the shard a document ID belongs to (None if it doesn't exist)."""
+        key = self.shard_key(channel_of(doc_id))
+        if key not in self._counts:
+            # No such shard: nothing to load, so nothing to make room for
+            return None
+        if key not in self._loaded:
+            self._evict(room=1)
+        return self._shard(key)
+
+    def _by_shard(self, doc_ids: list[str]) -> dict[str, list[str]]:
+        """Group document IDs by the shard they belong to."""
+        groups: dict[str, list[str]] = {}
+        for doc_id in doc_ids:
+            groups.setdefault(self.shard_key(channel_of(doc_id)), []).append(doc_id)
+        return groups
+
+    @property
+    def loaded_shards(self) -> list[str]:
+        """Keys of the shards currently in memory."""
+        return list(self._loaded)
+
+    @property
+    def embedding_bytes(self) -> int:
+        """Bytes of RAM used by the embedding rows of the loaded shards."""
+        return sum(shard.embedding_bytes for shard in list(self._loaded.values()))
+
+    @property
+    def generation(self) -> int:
+        """
+        Counter bumped by every add, delete and clear.
+
+        Kept here rather than summed from the shards: an unloaded and
+        reloaded shard starts counting from zero again.
+        """
+        return self._generation
+
+    # ==========================================================================
+    # Writes
+    # ==========================================================================
+
+    def add(self, document: VectorDocument) -> None:
+        """
+        Add a document to its channel's shard (saved immediately).
+
+        Args:
+            document: The document to add
+        """
+        self.add_batch([document])
+
+    def add_batch(self, documents: list[VectorDocument]) -> None:
+        """
+        Add documents, one add_batch() (one segment) per shard touched.
+
+        Args:
+            documents: List of documents to add
+
+        Raises:
+            ValueError: If an embedding dimension doesn't match the store
+        """
+        groups: dict[str, list[VectorDocument]] = {}
+        for doc in documents:
+            groups.setdefault(self.shard_key(channel_of(doc.id)), []).append(doc)
+        if not groups:
+            return
+
+        self._evict(room=sum(1 for key in groups if key not in self._loaded))
+        for key, group in groups.items():
+            shard = self._open(key)
+            shard.add_batch(group)
+            self._counts[key] = len(shard)
+
+        self._generation += 1
+        self._save_manifest()
+        self._evict()
+
+    def delete(self, doc_id: str) -> bool:
+        """
+        Delete a document by ID.
+
+        Args:
+            doc_id: The document ID to delete
+
+        Returns:
+            True if the document was found and deleted
+        """
+        return self.delete_many([doc_id]) > 0
+
+    def delete_many(self, doc_ids: list[str]) -> int:
+        """
+        Delete documents, one delete_many() per shard touched.
+
+        Args:
+            doc_ids: The document IDs to delete
+
+        Returns:
+            Number of documents found and deleted
+        """
+        deleted = 0
+        for key, group in self._by_shard(doc_ids).items():
+            if key not in self._loaded:
+                self._evict(room=1)
+            shard = self._shard(key)
+            if shard is None:
+                continue
+            deleted += shard.delete_many(group)
+            self._counts[key] = len(shard)
+
+        if deleted:
+            self._generation += 1
+            self._save_manifest()
+        return deleted
+
+    def clear(self) -> None:
+        """Remove every shard."""
+        for shard in self._loaded.values():
+            shard.wait_for_compaction()
+        self._loaded.clear()
+
+        for key in self._counts:
+            shutil.rmtree(self.storage_path / key, ignore_errors=True)
+        self._counts = {}
+        self._generation += 1
+        self._save_manifest()
+        logger.info("Sharded vector store cleared")
+
+    # ==========================================================================
+    # Search
+    # ==========================================================================
+
+    def search(
+        self,
+        query_vector: list[float],
+        top_k: int = 10,
+        filter_metadata: dict[str, Any] | None = None,
+        exact: bool = False,
+        since: float | None = None,
+        until: float | None = None,
+        max_age: float | None = None,
+        ranking: Ranking | None = None
+    ) -> list[VectorDocument]:
+        """
+        Search for similar documents (see VectorStore.search).
+
+        Returns:
+            List of VectorDocuments sorted by score (highest first)
+        """
+        return self.search_many(
+            [query_vector], top_k, filter_metadata, exact, since, until, max_age, ranking
+        )[0]
+
+    def search_many(
+        self,
+        query_vectors: list[list[float]],
+        top_k: int = 10,
+        filter_metadata: dict[str, Any] | None = None,
+        exact: bool = False,
+        since: float | None = None,
+        until: float | None = None,
+        max_age: float | None = None,
+        ranking: Ranking | None = None
+    ) -> list[list[VectorDocument]]:
+        """
+        Search several queries across the shards.
+
+        Each shard runs VectorStore.search_many() (one batched scan) in a
+        worker thread; every query's top_k is then merged from the shards'
+        sorted lists with a heap.
+
+        Args:
+            query_vectors: The query embeddings
+            top_k: Number of results to return per query
+            filter_metadata: Optional metadata filters; a channel filter
+                searches only that channel's shard
+            exact: Skip the shards' ANN indexes
+            since: Only documents with ts >= since (epoch seconds)
+            until: Only documents with ts <= until (epoch seconds)
+            max_age: Only documents at most this many seconds old
+            ranking: Recency / channel weighting (None = plain similarity)
+
+        Returns:
+            One result list per query (same order), each sorted by score
+        """
+        if len(query_vectors) == 0:
+            return []
+
+        per_shard = self._map(
+            lambda shard: shard.search_many(
+                query_vectors, top_k, filter_metadata, exact, since, until, max_age, ranking
+            ),
+            self._target_shards(filter_metadata)
+        )
+        self._evict()
+
+        return [
+            _merge_top([results[q] for results in per_shard], top_k)
+            for q in range(len(query_vectors))
+        ]
+
+    def search_hybrid(
+        self,
+        query_text: str,
+        query_vector: list[float] | None = None,
+        top_k: int = 10,
+        filter_metadata: dict[str, Any] | None = None,
+        exact: bool = False,
+        since: float | None = None,
+        until: float | None = None,
+        max_age: float | None = None,
+        ranking: Ranking | None = None
+    ) -> list[VectorDocument]:
+        """
+        Search by keywords and embedding (see search_hybrid_many).
+
+        Returns:
+            List of VectorDocuments sorted by fused score (highest first)
+        """
+        return self.search_hybrid_many(
+            [query_text], [query_vector], top_k, filter_metadata, exact, since, until,
+            max_age=max_age, ranking=ranking
+        )[0]
+
+    def search_hybrid_many(
+        self,
+        query_texts: list[str],
+        query_vectors: list[list[float] | None],
+        top_k: int = 10,
+        filter_metadata: dict[str, Any] | None = None,
+        exact: bool = False,
+        since: float | None = None,
+        until: float | None = None,
+        max_age: float | None = None,
+        ranking: Ranking | None = None,
+        depth: int = 4,
+        rrf_k: int = RRF_K
+    ) -> list[list[VectorDocument]]:
+        """
+        Hybrid search for several queries across the shards.
+
+        Each shard returns its top_k * depth keyword and dense candidates,
+        keyword candidates scored with the BM25 statistics of all searched
+        shards; both lists are merged across shards and fused once with
+        reciprocal rank fusion (see the module docstring). A ranking weights
+        the fused scores, as in VectorStore.search_hybrid_many().
+
+        Args:
+            query_texts: The query texts
+            query_vectors: One embedding (or None) per query text
+            top_k: Number of results to return per query
+            filter_metadata: Optional metadata filters; a channel filter
+                searches only that channel's shard
+            exact: Skip the shards' ANN indexes
+            since: Only documents with ts >= since (epoch seconds)
+            until: Only documents with ts <= until (epoch seconds)
+            max_age: Only documents at most this many seconds old
+            ranking: Recency / channel weighting (None = plain fusion)
+            depth: Candidates per ranking, as a multiple of top_k
+            rrf_k: Reciprocal rank fusion constant
+
+        Returns:
+            One result list per query (same order), each sorted by fused score
+        """
+        if len(query_texts) == 0:
+            return []
+
+        candidates = top_k * depth
+        dense = [i for i, vector in enumerate(query_vectors) if vector is not None]
+        dense_vectors = [vector for vector in query_vectors if vector is not None]
+        keys = self._target_shards(filter_metadata)
+
+        # Workspace-wide BM25 statistics, so every shard scores keywords alike
+        shard_stats = self._map(lambda shard: shard.keyword_stats(query_texts), keys)
+        stats = [merge_stats([found[q] for found in shard_stats]) for q in range(len(query_texts))]
+
+        def search_shard(
+            shard: VectorStore
+        ) -> tuple[list[list[VectorDocument]], list[list[VectorDocument]]]:
+            keyword = shard.search_keywords_many(
+                query_texts, candidates, filter_metadata, since, until, max_age, stats
+            )
+            vectors = shard.search_many(
+                dense_vectors, candidates, filter_metadata,
+                exact, since, until, max_age
+            )
+            return keyword, vectors
+
+        per_shard = self._map(search_shard, keys)
+        self._evict()
+
+        dense_results: dict[int, list[VectorDocument]] = {}
+        for n, i in enumerate(dense):
+            dense_results[i] = _merge_top([vectors[n] for _, vectors in per_shard], candidates)
+
+        now = time.time()
+        results = []
+        for q in range(len(query_texts)):
+            ranked_lists = [_merge_top([keyword[q] for keyword, _ in per_shard], candidates)]
+            if q in dense_results:
+                ranked_lists.append(dense_results[q])
+
+            # Fuse by position in a shared list of the candidate documents
+            documents: dict[str, VectorDocument] = {}
+            for ranked in ranked_lists:
+                for doc in ranked:
+                    documents.setdefault(doc.id, doc)
+            positions = {doc_id: n for n, doc_id in enumerate(documents)}
+            rankings = [
+                np.array([positions[doc.id] for doc in ranked], dtype=np.intp)
+                for ranked in ranked_lists
+            ]
+            fused, scores = reciprocal_rank_fusion(rankings, rrf_k)
+
+            docs = list(documents.values())
+            if ranking is not None and not ranking.is_plain and len(fused):
+                scores = scores * ranking.document_weights([docs[n].metadata for n in fused], now)
+                order = np.argsort(-scores, kind="stable")
+                fused, scores = fused[order], scores[order]
+
+            results.append([
+                replace(docs[n], score=score)
+                for n, score in zip(fused[:top_k].tolist(), scores[:top_k].tolist())
+            ])
+        return results
+
+    # ==========================================================================
+    # Lookups
+    # ==========================================================================
+
+    def get(self, doc_id: str) -> VectorDocument | None:
+        """Get a document by ID (loads only its shard)."""
+        shard = self._shard_of(doc_id)
+        return shard.get(doc_id) if shard is not None else None
+
+    def get_metadata(self, doc_id: str) -> dict[str, Any] | None:
+        """Get a document's metadata by ID (loads only its shard)."""
+        shard = self._shard_of(doc_id)
+        return shard.get_metadata(doc_id) if shard is not None else None
+
+    def find_covering(self, ts: float, channel: str | None = None) -> list[str]:
+        """
+        Find the documents whose message span contains a timestamp.
+
+        Args:
+            ts: Slack timestamp as epoch seconds
+            channel: Only documents from this channel (searches one shard)
+
+        Returns:
+            Matching document IDs
+        """
+        filter_metadata = {"channel": channel} if channel is not None else None
+        found = self._map(
+            lambda shard: shard.find_covering(ts, channel),
+            self._target_shards(filter_metadata)
+        )
+        return [doc_id for doc_ids in found for doc_id in doc_ids]
+
+    def build_index(self) -> bool:
+        """
+        Train the ANN index of every loaded shard.
+
+        Returns:
+            True if every loaded shard's index is trained
+        """
+        return all([shard.build_index() for shard in list(self._loaded.values())])
+
+    def compact(self) -> None:
+        """Start background compaction of the loaded shards' segments."""
+        for shard in list(self._loaded.values()):
+            shard.compact()
+
+    def wait_for_compaction(self, timeout: float | None = None) -> None:
+        """Block until the loaded shards' background compactions finish."""
+        for shard in list(self._loaded.values()):
+            shard.wait_for_compaction(timeout)
+
+    def close(self) -> None:
+        """Stop the search threads (a later parallel search starts new ones)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __len__(self) -> int:
+        """Get the number of documents in the store (without loading shards)."""
+        return sum(self._counts.values())
+
+    def __contains__(self, doc_id: str) -> bool:
+        """Check whether a document ID is stored (loads only its shard)."""
+        shard = self._shard_of(doc_id)
+        return shard is not None and doc_id in shard
@@ -27,20 +27,97 @@ Cosine Similarity:
     - 1 means identical direction (most similar)
     - 0 means perpendicular (unrelated)
     - -1 means opposite direction
+
+Storage Layout:
+    On disk, documents live in an append-only segment log (see segments.py):
+    each batch appends a float32 .npy file plus a compact JSONL side file,
+    and startup memory-maps the .npy files instead of parsing JSON floats.
+
+    In memory, rows are stored unit-normalized in a contiguous float32 matrix. Since
+    ||A|| = 1 for every stored row, cosine similarity reduces to a plain dot
+    product, so a query is a single matrix-vector product followed by an
+    argpartition top-k selection - no per-query norms, no full sort.
+
+Compression:
+    With compression="int8" rows are scalar-quantized in RAM (1 byte per
+    dimension instead of 4, see rowstore.py). Searches score the int8 rows
+    against the full-precision query, then rerank the best candidates with
+    their exact float32 vectors read from the memory-mapped segments.
+
+Filtered Search:
+    Inverted indexes over channel, author and day buckets of the Slack
+    timestamp (see metadata_index.py) resolve filters to a candidate row set
+    before any scoring, so a channel-filtered query only touches that
+    channel's rows.
+
+Embedding Models:
+    Vectors from different embedding models live in unrelated spaces, so
+    comparing them is meaningless. The store records the model that
+    produced its vectors in the segment manifest and refuses to open with
+    a different one (or starts over, if asked to).
+
+Row IDs:
+    Row i of the matrix belongs to the document _row_ids[i] - a dense
+    NumPy object array kept in step with the rows (appended, tombstoned
+    and compacted together). Turning the top-k rows of a search into
+    document IDs is one fancy index, not a scan of the ID dictionary.
+    _id_to_index is the inverse mapping; load checks the two agree.
+
+Deletes (Tombstones):
+    Deleting a document only clears its bit in a live-row mask and appends
+    a delete record to the log - O(1) per document, no matrix rebuild.
+    Searches skip dead rows. Once dead rows make up compact_threshold of
+    the matrix, live rows are packed together in one vectorized pass and
+    the on-disk segments are compacted in the background.
+
+Hybrid Search:
+    An optional BM25Index (see lexical.py) is maintained row by row next
+    to the embeddings. search_hybrid() ranks candidates both by cosine
+    similarity and by BM25 and fuses the two rankings with reciprocal
+    rank fusion; without a query vector it is a pure keyword search.
+
+Ranking:
+    Searches can take a Ranking (see ranking.py) that multiplies each
+    candidate's score by a recency weight, computed from the per-row
+    timestamp array, and by per-channel boosts - one vectorized expression
+    over the candidate rows. max_age turns into a since bound, so old rows
+    are pruned by the day-bucket index before anything is scored.
+
+Approximate Search:
+    An optional ANNIndex (e.g. IVFFlatIndex, see ann.py) narrows each query
+    down to a candidate subset of rows. The exact scan is kept as the
+    fallback and as the ground truth for recall.
 """
 
 import json
+import time
+from itertools import compress
 from dataclasses import dataclass, field, asdict
 from pathlib import Path
 from typing import Any
 
 import numpy as np
 
+from src.rag.ann import ANNIndex, top_k_indices, top_k_indices_2d
+from src.rag.lexical import RRF_K, BM25Index, BM25Stats, reciprocal_rank_fusion
+from src.rag.metadata_index import MetadataIndex
+from src.rag.ranking import Ranking, max_age_since
+from src.rag.rowstore import RowStorage, create_row_storage, with_capacity
+from src.rag.segments import SegmentLog
 from src.utils.logger import Logger
 
 logger = Logger("VectorStore")
 
 
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Return a C-contiguous float32 copy of a matrix with unit-length rows."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    # Avoid division by zero
+    norms[norms == 0] = 1
+    return np.ascontiguousarray(matrix / norms)
+
+
 @dataclass
 class VectorDocument:
     """
@@ -49,7 +126,8 @@ class VectorDocument:
     Attributes:
         id: Unique identifier for the document
         content: The original text content
-        embedding: The vector embedding
+        embedding: The vector embedding (documents returned by the store carry
+            the stored, unit-normalized vector - approximate if compressed)
         metadata: Additional data (channel, author, timestamp, etc.)
         score: Similarity score (set during search)
     """
@@ -86,9 +164,25 @@ class VectorStore:
     The store maintains an in-memory index for fast search while
     persisting to disk for durability.
 
-    Data is stored in two files:
-    - documents.json: Document content and metadata
-    - embeddings.npy: Numpy array of embeddings (more efficient)
+    Data is stored in an append-only segment log (see SegmentLog):
+    - seg_*.npy: float32 embedding rows, memory-mapped on load
+    - seg_*.jsonl: Document content and metadata
+    - manifest.json: Ordered list of live segments
+
+    Each add_batch()/delete_many() appends one small segment instead of
+    rewriting the whole store; segments are compacted in the background.
+    Deleted rows are tombstoned and skipped by searches until enough of
+    them accumulate to be worth compacting.
+
+    In memory, embeddings are kept as one unit-normalized row per document
+    (see RowStorage), maintained incrementally as documents are added:
+    a contiguous float32 matrix by default, or int8 codes when compressed.
+    The rows are the only in-memory copy of each embedding - stored
+    documents do not keep their own list of floats.
+
+    Metadata filters and time ranges are resolved through a MetadataIndex
+    before scoring. Optionally, an ANN index proposes candidate rows so an
+    unfiltered search only scores a fraction of the matrix (see ann.py).
 
     Example:
         store = VectorStore(Path("data/vectorstore"))
@@ -104,69 +198,326 @@ class VectorStore:
         # Search
         query_embedding = [0.15, -0.18, ...]
         results = store.search(query_embedding, top_k=5)
+
+        # Hold 4x more messages in the same RAM
+        store = VectorStore(Path("data/vectorstore"), compression="int8")
     """
 
-    def __init__(self, storage_path: Path):
+    def __init__(
+        self,
+        storage_path: Path,
+        max_segments: int = 16,
+        index: ANNIndex | None = None,
+        compression: str | None = None,
+        rerank_factor: int = 4,
+        model: str | None = None,
+        reset_on_model_change: bool = False,
+        compact_threshold: float = 0.25,
+        lexical_index: BM25Index | None = None
+    ):
         """
         Initialize the vector store.
 
         Args:
             storage_path: Directory to store data files
+            max_segments: Number of on-disk segments that triggers compaction
+            index: Optional approximate nearest-neighbour index
+            compression: None for float32 rows, "int8" for scalar quantization
+            rerank_factor: With compression, rerank top_k * rerank_factor
+                candidates using exact vectors (0 disables reranking)
+            model: Name of the embedding model whose vectors are stored
+                (None skips the check)
+            reset_on_model_change: If the store holds another model's
+                vectors, clear it instead of raising
+            compact_threshold: Fraction of deleted rows that triggers
+                compaction
+            lexical_index: Optional BM25 index over document content
+                (enables keyword and hybrid search)
+
+        Raises:
+            ValueError: If the store holds vectors from a different model
+                and reset_on_model_change is False
         """
         self.storage_path = storage_path
+        self.index = index
+        self.lexical_index = lexical_index
+        self.compression = compression
+        self.rerank_factor = rerank_factor
+        self.model = model
+        self.compact_threshold = compact_threshold
+
+        # Legacy single-file format (migrated to segments on first load)
         self.documents_file = storage_path / "documents.json"
         self.embeddings_file = storage_path / "embeddings.npy"
 
         # In-memory index
         self._documents: dict[str, VectorDocument] = {}
-        self._embeddings: np.ndarray | None = None
+        # One unit-normalized row per document (created on first add)
+        self._rows: RowStorage | None = None
         self._id_to_index: dict[str, int] = {}
+        # Row -> document ID (None for deleted rows) and live flag; both
+        # are buffers whose first _row_count entries are in use
+        self._row_ids = np.empty(0, dtype=object)
+        self._live = np.empty(0, dtype=bool)
+        self._row_count = 0
+        self._dead = 0
+        # Bumped by every change to the searchable contents (see generation)
+        self._generation = 0
+        # Inverted indexes over channel/author/time, by row
+        self._metadata_index = MetadataIndex()
+
+        # Changes not yet appended to disk (ID -> normalized float32 vector)
+        self._pending_adds: dict[str, np.ndarray] = {}
+        self._pending_deletes: set[str] = set()
 
         # Ensure directory exists
         storage_path.mkdir(parents=True, exist_ok=True)
 
+        self._log = SegmentLog(storage_path, max_segments=max_segments)
+
         # Load existing data
         self._load()
+        self._check_model(reset_on_model_change)
 
         logger.info(f"Vector store initialized with {len(self._documents)} documents")
 
-    def _load(self) -> None:
-        """Load existing data from disk."""
+    @property
+    def embedding_bytes(self) -> int:
+        """Bytes of RAM used by the embedding rows."""
+        return self._rows.nbytes if self._rows is not None else 0
+
+    @property
+    def _storage(self) -> RowStorage:
+        """
+        The row storage, for code paths that only run once rows exist.
+
+        Raises:
+            RuntimeError: If nothing has been stored yet
+        """
+        if self._rows is None:
+            raise RuntimeError("Vector store has no rows yet")
+        return self._rows
+
+    @property
+    def generation(self) -> int:
+        """
+        Counter bumped by every add, delete and clear.
+
+        Search results computed at one generation are still valid while it
+        is unchanged, which lets callers cache them (see query_cache.py).
+        """
+        return self._generation
+
+    @property
+    def dead_rows(self) -> int:
+        """Deleted rows not yet compacted away."""
+        return self._dead
+
+    @property
+    def _live_mask(self) -> np.ndarray:
+        """Live flag of every row (a view)."""
+        return self._live[:self._row_count]
+
+    def _append_row_ids(self, doc_ids: list[str]) -> None:
+        """Register new (live) rows, in row order."""
+        start, end = self._row_count, self._row_count + len(doc_ids)
+        self._row_ids = with_capacity(self._row_ids, start, end)
+        self._live = with_capacity(self._live, start, end)
+        self._row_ids[start:end] = doc_ids
+        self._live[start:end] = True
+        self._row_count = end
+
+    def _reset_rows(self) -> None:
+        """Forget every in-memory document and row."""
+        self._documents.clear()
+        self._rows = None
+        self._id_to_index.clear()
+        self._row_ids = np.empty(0, dtype=object)
+        self._live = np.empty(0, dtype=bool)
+        self._row_count = 0
+        self._dead = 0
+        self._generation += 1
+        self._metadata_index.clear()
+        if self.lexical_index is not None:
+            self.lexical_index.clear()
+        if self.index is not None:
+            self.index.reset()
+
+    def check_consistency(self) -> None:
+        """
+        Verify that documents, rows and both ID mappings agree.
+
+        Raises:
+            ValueError: Describing the first inconsistency found
+        """
+        n_rows = len(self._rows) if self._rows is not None else 0
+        if n_rows != self._row_count:
+            raise ValueError(f"{n_rows} embedding rows but {self._row_count} row IDs")
+
+        live = int(self._live_mask.sum())
+        if live != self._row_count - self._dead:
+            raise ValueError(f"{live} live rows but {self._dead} of {self._row_count} deleted")
+        if not len(self._documents) == len(self._id_to_index) == live:
+            raise ValueError(
+                f"{len(self._documents)} documents, {len(self._id_to_index)} indexed IDs, "
+                f"{live} live rows"
+            )
+
+        ids = np.fromiter(self._id_to_index.keys(), dtype=object, count=live)
+        rows = np.fromiter(self._id_to_index.values(), dtype=np.intp, count=live)
+        if live and (rows.min() < 0 or rows.max() >= self._row_count):
+            raise ValueError("Document mapped to a row out of range")
+        if not self._live_mask[rows].all():
+            raise ValueError("Document mapped to a deleted row")
+        mismatched = np.flatnonzero(self._row_ids[rows] != ids)
+        if len(mismatched):
+            row = rows[mismatched[0]]
+            raise ValueError(
+                f"Row {row} holds '{self._row_ids[row]}', not '{ids[mismatched[0]]}' "
+                f"({len(mismatched)} mismatched)"
+            )
+        missing = next((doc_id for doc_id in ids if doc_id not in self._documents), None)
+        if missing is not None:
+            raise ValueError(f"Row ID '{missing}' has no document")
+
+    def _load(self, chunk_size: int = 16_384) -> None:
+        """
+        Load existing data from disk.
+
+        Rows are copied out of the memory-mapped segments in chunks, so a
+        compressed store never materializes the full float32 matrix.
+        """
+        if not self._log.exists:
+            self._migrate_legacy()
+            return
+
+        try:
+            records, arrays = self._log.load()
+
+            for i, record in enumerate(records):
+                self._documents[record.id] = VectorDocument(
+                    id=record.id,
+                    content=record.content,
+                    embedding=[],
+                    metadata=record.metadata,
+                )
+                self._id_to_index[record.id] = i
+                self._metadata_index.add(i, record.metadata)
+                if self.lexical_index is not None:
+                    self.lexical_index.add(i, record.content)
+            self._append_row_ids([record.id for record in records])
+
+            for start in range(0, len(records), chunk_size):
+                block = SegmentLog.gather(records[start:start + chunk_size], arrays)
+                if block is None:
+                    continue
+                if self._rows is None:
+                    self._rows = create_row_storage(self.compression, block.shape[1])
+                self._rows.append(block)
+
+            self.check_consistency()
+
+            logger.debug(
+                f"Loaded {len(self._documents)} documents from "
+                f"{self._log.segment_count} segments"
+            )
+
+        except (ValueError, IndexError) as e:
+            # Segment files disagree (e.g. a truncated write). The store is
+            # rebuilt from Slack, so start over rather than serve wrong rows.
+            logger.error(f"Vector store at {self.storage_path} is inconsistent ({e}); clearing it")
+            self.clear()
+
+        except Exception as e:
+            logger.error(f"Error loading vector store: {e}")
+            # Never keep a half-loaded store
+            self._reset_rows()
+
+    def _check_model(self, reset: bool) -> None:
+        """Make sure stored vectors come from self.model, recording it if new."""
+        if self.model is None:
+            return
+
+        stored = self._log.model
+        if stored == self.model:
+            return
+
+        if stored is not None:
+            message = (
+                f"Vector store at {self.storage_path} holds '{stored}' embeddings, "
+                f"not '{self.model}'"
+            )
+            if not reset:
+                raise ValueError(f"{message}; clear it before switching models")
+
+            logger.warning(f"{message}; clearing it for re-indexing")
+            self.clear()
+
+        # New (or pre-tracking) store: adopt the configured model
+        self._log.set_model(self.model)
+
+    def _migrate_legacy(self) -> None:
+        """Convert a documents.json/embeddings.npy store into a segment."""
         if not self.documents_file.exists():
             return
 
         try:
-            # Load documents
             with open(self.documents_file) as f:
                 docs_data = json.load(f)
 
-            for i, doc_data in enumerate(docs_data):
-                doc = VectorDocument.from_dict(doc_data)
-                self._documents[doc.id] = doc
-                self._id_to_index[doc.id] = i
-
-            # Load embeddings if available
             if self.embeddings_file.exists():
-                self._embeddings = np.load(self.embeddings_file)
+                matrix = np.load(self.embeddings_file)
+            else:
+                matrix = np.array([d["embedding"] for d in docs_data])
+
+            if docs_data:
+                # Older stores saved raw float64 rows; normalizing is idempotent
+                matrix = _normalize_rows(matrix)
+
+            self._add_many([
+                VectorDocument(
+                    id=doc_data["id"],
+                    content=doc_data["content"],
+                    embedding=matrix[i],
+                    metadata=doc_data.get("metadata", {}),
+                )
+                for i, doc_data in enumerate(docs_data)
+            ])
 
-            logger.debug(f"Loaded {len(self._documents)} documents from disk")
+            self._save()
+            self.documents_file.unlink()
+            self.embeddings_file.unlink(missing_ok=True)
+
+            logger.info(f"Migrated {len(self._documents)} documents to segment format")
 
         except Exception as e:
-            logger.error(f"Error loading vector store: {e}")
+            logger.error(f"Error migrating vector store: {e}")
 
     def _save(self) -> None:
-        """Save data to disk."""
+        """
+        Persist pending changes to disk.
+
+        Appends one segment containing the documents added and deleted since
+        the last save. Existing segment files are never rewritten.
+        """
         try:
-            # Save documents
-            docs_list = [doc.to_dict() for doc in self._documents.values()]
-            with open(self.documents_file, "w") as f:
-                json.dump(docs_list, f)
+            added = [doc_id for doc_id in self._pending_adds if doc_id in self._documents]
+
+            records = []
+            for doc_id in added:
+                doc = self._documents[doc_id]
+                records.append({"id": doc.id, "content": doc.content, "metadata": doc.metadata})
 
-            # Save embeddings as numpy array (more efficient)
-            if self._embeddings is not None:
-                np.save(self.embeddings_file, self._embeddings)
+            embeddings = None
+            if added:
+                embeddings = np.stack([self._pending_adds[doc_id] for doc_id in added])
 
-            logger.debug(f"Saved {len(self._documents)} documents to disk")
+            self._log.append(records, embeddings, deleted_ids=sorted(self._pending_deletes))
+
+            self._pending_adds.clear()
+            self._pending_deletes.clear()
+
+            logger.debug(f"Saved {len(records)} documents to disk")
 
         except Exception as e:
             logger.error(f"Error saving vector store: {e}")
@@ -176,121 +527,595 @@ class VectorStore:
         Add a document to the store.
 
         If a document with the same ID exists, it will be replaced.
+        The document is persisted on the next add_batch() or delete().
 
         Args:
             document: The document to add
-        """
-        # Check if this is an update
-        is_update = document.id in self._documents
-
-        # Add to documents dict
-        self._documents[document.id] = document
 
-        # Update embeddings array
-        embedding = np.array(document.embedding)
-
-        if self._embeddings is None:
-            # First document
-            self._embeddings = embedding.reshape(1, -1)
-            self._id_to_index[document.id] = 0
-        elif is_update:
-            # Update existing
-            idx = self._id_to_index[document.id]
-            self._embeddings[idx] = embedding
-        else:
-            # Append new
-            self._embeddings = np.vstack([self._embeddings, embedding])
-            self._id_to_index[document.id] = len(self._embeddings) - 1
+        Raises:
+            ValueError: If the embedding dimension doesn't match the store
+        """
+        self._add_many([document])
 
     def add_batch(self, documents: list[VectorDocument]) -> None:
         """
         Add multiple documents efficiently.
 
+        The whole batch is normalized, copied into the rows and assigned to
+        the ANN index with one vectorized call each, then saved as a single
+        segment.
+
         Args:
             documents: List of documents to add
+
+        Raises:
+            ValueError: If an embedding dimension doesn't match the store
         """
-        for doc in documents:
-            self.add(doc)
+        self._add_many(documents)
 
         # Save after batch
         self._save()
         logger.debug(f"Added batch of {len(documents)} documents")
 
+    def _add_many(self, documents: list[VectorDocument]) -> None:
+        """Insert or replace documents in memory (not yet saved)."""
+        # A repeated ID keeps its last version, as with repeated add() calls
+        docs = list({doc.id: doc for doc in documents}.values())
+        if not docs:
+            return
+        self._generation += 1
+
+        dims = {len(doc.embedding) for doc in docs}
+        dim = self._rows.dim if self._rows is not None else next(iter(dims))
+        if dims != {dim}:
+            raise ValueError(
+                f"Embedding has {max(dims - {dim})} dimensions, store has {dim} "
+                f"(mixed embedding models?)"
+            )
+
+        # Stored unit-normalized
+        matrix = _normalize_rows(np.stack([
+            np.asarray(doc.embedding, dtype=np.float32) for doc in docs
+        ]))
+
+        if self._rows is None:
+            # First documents
+            self._rows = create_row_storage(self.compression, dim)
+
+        is_update = np.array([doc.id in self._documents for doc in docs], dtype=bool)
+        rows = np.empty(len(docs), dtype=np.intp)
+
+        # Replace existing rows in place
+        if is_update.any():
+            rows[is_update] = [self._id_to_index[doc.id] for doc in compress(docs, is_update)]
+            self._rows.update(rows[is_update], matrix[is_update])
+
+        # Append new rows with one copy
+        if not is_update.all():
+            new_ids = [doc.id for doc in compress(docs, ~is_update)]
+            rows[~is_update] = self._rows.append(matrix[~is_update])
+            self._id_to_index.update(zip(new_ids, rows[~is_update].tolist()))
+            self._append_row_ids(new_ids)
+
+        for doc, row, embedding in zip(docs, rows.tolist(), matrix):
+            # The embedding lives only in the rows
+            self._documents[doc.id] = VectorDocument(
+                id=doc.id,
+                content=doc.content,
+                embedding=[],
+                metadata=doc.metadata,
+            )
+            self._metadata_index.add(row, doc.metadata)
+            if self.lexical_index is not None:
+                self.lexical_index.add(row, doc.content)
+            self._pending_adds[doc.id] = embedding
+            self._pending_deletes.discard(doc.id)
+
+        if self.index is not None:
+            self.index.assign(rows, matrix)
+
+    def _materialize(
+        self,
+        rows: np.ndarray,
+        scores: np.ndarray | None = None
+    ) -> list[VectorDocument]:
+        """
+        Materialize stored documents together with their (normalized) embeddings.
+
+        Row -> ID and row -> embedding are one fancy index each.
+        """
+        embeddings = self._storage.take(rows).tolist()
+        row_scores: list[float | None] = (
+            [None] * len(rows) if scores is None else scores.tolist()
+        )
+
+        results = []
+        for doc_id, embedding, score in zip(self._row_ids[rows], embeddings, row_scores):
+            doc = self._documents[doc_id]
+            results.append(VectorDocument(
+                id=doc.id,
+                content=doc.content,
+                embedding=embedding,
+                metadata=doc.metadata,
+                score=score
+            ))
+        return results
+
+    def build_index(self) -> bool:
+        """
+        Train the ANN index on the current contents.
+
+        Returns:
+            True if the index is trained and will be used for searches
+        """
+        if self.index is None or self._rows is None:
+            return False
+        return self.index.train(self._rows)
+
+    def _index_candidates(self, queries: np.ndarray, top_k: int) -> np.ndarray | None:
+        """
+        Get candidate rows from the ANN index.
+
+        Trains the index on first use once the store is large enough.
+        For several queries, the union of their candidates is returned so
+        all of them can be scored in one pass.
+
+        Returns:
+            Candidate rows, or None to fall back to an exact scan
+        """
+        if self.index is None:
+            return None
+        if not self.index.is_trained and not self.build_index():
+            return None
+
+        if len(queries) == 1:
+            rows = self.index.candidates(queries[0])
+        else:
+            rows = np.unique(np.concatenate([self.index.candidates(q) for q in queries]))
+        if self._dead:
+            rows = rows[self._live_mask[rows]]
+        if len(rows) < top_k:
+            # Too few candidates to fill the results - scan everything
+            return None
+        return rows
+
+    def _exact_vectors(self, doc_ids: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get full-precision vectors for documents.
+
+        Unsaved documents come from the pending buffer, the rest from the
+        memory-mapped segment files.
+
+        Returns:
+            Tuple of (found mask, matrix with one row per ID)
+        """
+        found, vectors = self._log.read_vectors(doc_ids)
+        if vectors.shape[1] == 0:
+            vectors = np.zeros((len(doc_ids), self._storage.dim), dtype=np.float32)
+
+        for i, doc_id in enumerate(doc_ids):
+            pending = self._pending_adds.get(doc_id)
+            if pending is not None:
+                vectors[i] = pending
+                found[i] = True
+
+        return found, vectors
+
+    def _rerank(
+        self,
+        query: np.ndarray,
+        rows: np.ndarray,
+        scores: np.ndarray,
+        weights: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        Replace approximate scores with exact ones where the vector is available.
+
+        With ranking weights, the exact similarities are weighted the same
+        way as the (already weighted) approximate scores.
+        """
+        found, vectors = self._exact_vectors(self._row_ids[rows].tolist())
+        exact = vectors @ query
+        if weights is not None:
+            exact = exact * weights
+        return np.where(found, exact, scores).astype(np.float32)
+
+    def _rank_weights(
+        self,
+        ranking: Ranking | None,
+        rows: np.ndarray | None,
+        now: float
+    ) -> np.ndarray | None:
+        """
+        Compute per-row score multipliers for a ranking.
+
+        Args:
+            ranking: Recency / channel ranking (None = plain similarity)
+            rows: Candidate rows (None = all rows)
+            now: Current epoch seconds
+
+        Returns:
+            One weight per candidate row, or None if scores are unchanged
+        """
+        if ranking is None or ranking.is_plain:
+            return None
+
+        timestamps = self._metadata_index.timestamps
+        timestamps = timestamps[rows] if rows is not None else timestamps[:self._row_count]
+        weights = ranking.recency_weights(timestamps, now)
+
+        for channel, boost in ranking.channel_boosts.items():
+            boosted = self._metadata_index.candidates({"channel": channel})
+            if boosted is None:
+                # Not reached: the channel field is always indexed
+                continue
+            if rows is None:
+                weights[boosted] *= boost
+            else:
+                weights[np.isin(rows, boosted)] *= boost
+
+        return weights
+
+    def _filter_rows(
+        self,
+        filter_metadata: dict[str, Any] | None,
+        since: float | None,
+        until: float | None
+    ) -> np.ndarray | None:
+        """
+        Resolve metadata filters and a time range to candidate rows.
+
+        Indexed fields come straight from the posting lists; any other
+        filter keys are checked in Python, but only on those candidates.
+
+        Returns:
+            Matching rows, or None if there is nothing to filter on
+        """
+        conditions = {k: v for k, v in (filter_metadata or {}).items() if v is not None}
+        rows = self._metadata_index.candidates(conditions, since, until)
+
+        residual = {
+            k: v for k, v in conditions.items() if not self._metadata_index.can_filter(k)
+        }
+        if residual:
+            if rows is None:
+                rows = np.flatnonzero(self._live_mask)
+            metadata = [self._documents[doc_id].metadata for doc_id in self._row_ids[rows]]
+            rows = rows[np.array([
+                all(m.get(k) == v for k, v in residual.items()) for m in metadata
+            ], dtype=bool)]
+
+        return rows
+
     def search(
         self,
         query_vector: list[float],
         top_k: int = 10,
-        filter_metadata: dict[str, Any] | None = None
+        filter_metadata: dict[str, Any] | None = None,
+        exact: bool = False,
+        since: float | None = None,
+        until: float | None = None,
+        max_age: float | None = None,
+        ranking: Ranking | None = None
     ) -> list[VectorDocument]:
         """
         Search for similar documents.
 
         Uses cosine similarity to find documents with similar embeddings.
+        If an ANN index is configured, only its candidate rows are scored.
+        If rows are compressed, the best candidates are reranked exactly.
 
         Args:
             query_vector: The query embedding
             top_k: Number of results to return
             filter_metadata: Optional metadata filters (e.g., {"channel": "C123"})
+            exact: Skip the ANN index and scan every row
+            since: Only documents with ts >= since (epoch seconds)
+            until: Only documents with ts <= until (epoch seconds)
+            max_age: Only documents at most this many seconds old
+            ranking: Recency / channel weighting (None = plain similarity)
+
+        Returns:
+            List of VectorDocuments sorted by score (highest first)
+        """
+        return self.search_many(
+            [query_vector], top_k, filter_metadata, exact, since, until, max_age, ranking
+        )[0]
+
+    def search_many(
+        self,
+        query_vectors: list[list[float]],
+        top_k: int = 10,
+        filter_metadata: dict[str, Any] | None = None,
+        exact: bool = False,
+        since: float | None = None,
+        until: float | None = None,
+        max_age: float | None = None,
+        ranking: Ranking | None = None
+    ) -> list[list[VectorDocument]]:
+        """
+        Search for several queries at once.
+
+        All queries are scored with a single matrix-matrix product and the
+        top-k selection is vectorized across queries, so N queries cost one
+        pass over the rows instead of N scans. Filters apply to every query.
+        With an ANN index, every query is scored against the union of all
+        queries' candidates.
+
+        Args:
+            query_vectors: The query embeddings
+            top_k: Number of results to return per query
+            filter_metadata: Optional metadata filters (e.g., {"channel": "C123"})
+            exact: Skip the ANN index and scan every row
+            since: Only documents with ts >= since (epoch seconds)
+            until: Only documents with ts <= until (epoch seconds)
+            max_age: Only documents at most this many seconds old
+            ranking: Recency / channel weighting (None = plain similarity)
 
         Returns:
-            List of VectorDocuments sorted by similarity (highest first)
+            One result list per query (same order), each sorted by score
         """
-        if self._embeddings is None or len(self._documents) == 0:
+        if len(query_vectors) == 0:
             return []
+        if self._rows is None or len(self._documents) == 0:
+            return [[] for _ in query_vectors]
+
+        # Apply metadata filters before scoring so only matching rows are scanned
+        # (deleted rows are already gone from the metadata index)
+        now = time.time()
+        rows = self._filter_rows(filter_metadata, max_age_since(since, max_age, now), until)
+        if rows is not None and len(rows) == 0:
+            return [[] for _ in query_vectors]
+
+        return [
+            self._materialize(top_rows, top_scores)
+            for top_rows, top_scores in self._dense_rows(
+                query_vectors, top_k, rows, exact, ranking, now
+            )
+        ]
 
-        # Convert query to numpy array
-        query = np.array(query_vector)
+    def _dense_rows(
+        self,
+        query_vectors: list[list[float]],
+        top_k: int,
+        rows: np.ndarray | None,
+        exact: bool,
+        ranking: Ranking | None = None,
+        now: float | None = None
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Rank rows by (weighted) cosine similarity for several queries.
 
-        # Compute cosine similarities
-        # cos_sim = (A · B) / (||A|| * ||B||)
-        query_norm = np.linalg.norm(query)
-        doc_norms = np.linalg.norm(self._embeddings, axis=1)
+        Args:
+            query_vectors: The query embeddings
+            top_k: Number of rows to return per query
+            rows: Candidate rows from filters (None = all rows)
+            exact: Skip the ANN index
+            ranking: Recency / channel weighting (None = plain similarity)
+            now: Current epoch seconds (for recency)
 
-        # Avoid division by zero
-        doc_norms = np.where(doc_norms == 0, 1, doc_norms)
+        Returns:
+            One (rows, scores) pair per query, best first
+        """
+        # Rows are unit-normalized, so cosine similarity is a dot product
+        # with the normalized queries
+        queries = _normalize_rows(np.asarray(query_vectors, dtype=np.float32))
+
+        if rows is None and not exact:
+            rows = self._index_candidates(queries, top_k)
+
+        similarities = self._storage.scores_many(queries, rows)
+
+        # Recency and channel weights: one multiplier per candidate row
+        weights = self._rank_weights(ranking, rows, time.time() if now is None else now)
+        if weights is not None:
+            similarities *= weights
+
+        if rows is None and self._dead:
+            # Full scan: deleted rows can never make the top k
+            similarities[:, ~self._live_mask] = -np.inf
+
+        # Compressed scores are approximate: shortlist extra candidates
+        # and rerank them with exact vectors
+        rerank = self.compression not in (None, "none") and self.rerank_factor > 0
+        shortlist = top_k * self.rerank_factor if rerank else top_k
+
+        # Select the top rows of every query without sorting every score
+        top = top_k_indices_2d(similarities, shortlist)
+        all_top_scores = np.take_along_axis(similarities, top, axis=1)
+        all_top_rows = rows[top] if rows is not None else top
+        all_top_weights = weights[top] if weights is not None else [None] * len(queries)
+
+        results = []
+        for query, top_rows, top_scores, top_weights in zip(
+            queries, all_top_rows, all_top_scores, all_top_weights
+        ):
+            if self._dead:
+                # Fewer live rows than requested: drop the deleted fill-ins
+                keep = self._live_mask[top_rows]
+                top_rows, top_scores = top_rows[keep], top_scores[keep]
+                if top_weights is not None:
+                    top_weights = top_weights[keep]
+
+            if rerank and len(top_rows):
+                top_scores = self._rerank(query, top_rows, top_scores, top_weights)
+                order = top_k_indices(top_scores, top_k)
+                top_rows, top_scores = top_rows[order], top_scores[order]
+
+            results.append((top_rows, top_scores))
+
+        return results
+
+    def search_hybrid(
+        self,
+        query_text: str,
+        query_vector: list[float] | None = None,
+        top_k: int = 10,
+        filter_metadata: dict[str, Any] | None = None,
+        exact: bool = False,
+        since: float | None = None,
+        until: float | None = None,
+        max_age: float | None = None,
+        ranking: Ranking | None = None
+    ) -> list[VectorDocument]:
+        """
+        Search by keywords and embedding, fusing both rankings.
 
-        similarities = np.dot(self._embeddings, query) / (doc_norms * query_norm)
+        Args:
+            query_text: The query text (for BM25)
+            query_vector: The query embedding (None = keyword search only)
+            top_k: Number of results to return
+            filter_metadata: Optional metadata filters (e.g., {"channel": "C123"})
+            exact: Skip the ANN index and scan every row
+            since: Only documents with ts >= since (epoch seconds)
+            until: Only documents with ts <= until (epoch seconds)
+            max_age: Only documents at most this many seconds old
+            ranking: Recency / channel weighting (None = plain fusion)
 
-        # Create list of (doc_id, similarity) tuples
-        id_list = list(self._id_to_index.keys())
-        results: list[tuple[str, float]] = [
-            (id_list[i], float(similarities[i]))
-            for i in range(len(similarities))
-        ]
+        Returns:
+            List of VectorDocuments sorted by fused score (highest first)
+        """
+        return self.search_hybrid_many(
+            [query_text], [query_vector], top_k, filter_metadata, exact, since, until,
+            max_age=max_age, ranking=ranking
+        )[0]
 
-        # Apply metadata filters
-        if filter_metadata:
-            filtered_results = []
-            for doc_id, score in results:
-                doc = self._documents[doc_id]
-                # Check if all filter conditions match
-                matches = all(
-                    doc.metadata.get(k) == v
-                    for k, v in filter_metadata.items()
-                    if v is not None
-                )
-                if matches:
-                    filtered_results.append((doc_id, score))
-            results = filtered_results
+    def search_hybrid_many(
+        self,
+        query_texts: list[str],
+        query_vectors: list[list[float] | None],
+        top_k: int = 10,
+        filter_metadata: dict[str, Any] | None = None,
+        exact: bool = False,
+        since: float | None = None,
+        until: float | None = None,
+        max_age: float | None = None,
+        ranking: Ranking | None = None,
+        depth: int = 4,
+        rrf_k: int = RRF_K
+    ) -> list[list[VectorDocument]]:
+        """
+        Hybrid search for several queries at once.
 
-        # Sort by similarity (descending)
-        results.sort(key=lambda x: x[1], reverse=True)
+        Each query's top_k * depth rows by BM25 and by cosine similarity are
+        fused with reciprocal rank fusion. Queries without a vector use
+        BM25 alone; the others are scored together in one dense pass. The
+        returned score is the fused RRF score, not a cosine similarity;
+        a ranking weights the fused scores of the candidates.
 
-        # Return top_k documents with scores
-        output = []
-        for doc_id, score in results[:top_k]:
-            doc = self._documents[doc_id]
-            # Create a copy with the score
-            doc_with_score = VectorDocument(
-                id=doc.id,
-                content=doc.content,
-                embedding=doc.embedding,
-                metadata=doc.metadata,
-                score=score
+        Args:
+            query_texts: The query texts
+            query_vectors: One embedding (or None) per query text
+            top_k: Number of results to return per query
+            filter_metadata: Optional metadata filters (e.g., {"channel": "C123"})
+            exact: Skip the ANN index and scan every row
+            since: Only documents with ts >= since (epoch seconds)
+            until: Only documents with ts <= until (epoch seconds)
+            max_age: Only documents at most this many seconds old
+            ranking: Recency / channel weighting (None = plain fusion)
+            depth: Candidates per ranking, as a multiple of top_k
+            rrf_k: Reciprocal rank fusion constant
+
+        Returns:
+            One result list per query (same order), each sorted by fused score
+        """
+        if len(query_texts) == 0:
+            return []
+        if self._rows is None or len(self._documents) == 0:
+            return [[] for _ in query_texts]
+
+        now = time.time()
+        rows = self._filter_rows(filter_metadata, max_age_since(since, max_age, now), until)
+        if rows is not None and len(rows) == 0:
+            return [[] for _ in query_texts]
+
+        candidates = top_k * depth
+        rankings: list[list[np.ndarray]] = [[] for _ in query_texts]
+
+        if self.lexical_index is not None:
+            for ranked, text in zip(rankings, query_texts):
+                ranked.append(self.lexical_index.search(text, candidates, rows)[0])
+
+        dense = [(i, vector) for i, vector in enumerate(query_vectors) if vector is not None]
+        if dense:
+            dense_rows = self._dense_rows(
+                [vector for _, vector in dense], candidates, rows, exact
             )
-            output.append(doc_with_score)
+            for (i, _), (top_rows, _) in zip(dense, dense_rows):
+                rankings[i].append(top_rows)
+
+        results = []
+        for ranked in rankings:
+            fused_rows, fused_scores = reciprocal_rank_fusion(ranked, rrf_k)
+            weights = self._rank_weights(ranking, fused_rows, now)
+            if weights is not None:
+                fused_scores = fused_scores * weights
+                order = np.argsort(-fused_scores, kind="stable")
+                fused_rows, fused_scores = fused_rows[order], fused_scores[order]
+            results.append(self._materialize(fused_rows[:top_k], fused_scores[:top_k]))
+        return results
+
+    def search_keywords_many(
+        self,
+        query_texts: list[str],
+        top_k: int = 10,
+        filter_metadata: dict[str, Any] | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        max_age: float | None = None,
+        stats: list[BM25Stats] | None = None
+    ) -> list[list[VectorDocument]]:
+        """
+        Keyword (BM25) search for several queries.
+
+        Unlike search_hybrid_many() with no query vector, the returned
+        score is the BM25 score itself, so keyword results from several
+        stores can be merged (see sharded.py) - as long as every store
+        scores with the same corpus statistics.
 
-        return output
+        Args:
+            query_texts: The query texts
+            top_k: Number of results to return per query
+            filter_metadata: Optional metadata filters (e.g., {"channel": "C123"})
+            since: Only documents with ts >= since (epoch seconds)
+            until: Only documents with ts <= until (epoch seconds)
+            max_age: Only documents at most this many seconds old
+            stats: One BM25Stats per query to score with (None = this
+                store's own; see keyword_stats())
+
+        Returns:
+            One result list per query (same order), each sorted by BM25
+            score (empty without a lexical index)
+        """
+        if len(query_texts) == 0:
+            return []
+        if self.lexical_index is None or self._rows is None or len(self._documents) == 0:
+            return [[] for _ in query_texts]
+
+        rows = self._filter_rows(filter_metadata, max_age_since(since, max_age, time.time()), until)
+        if rows is not None and len(rows) == 0:
+            return [[] for _ in query_texts]
+
+        return [
+            self._materialize(*self.lexical_index.search(
+                text, top_k, rows, stats[n] if stats is not None else None
+            ))
+            for n, text in enumerate(query_texts)
+        ]
+
+    def keyword_stats(self, query_texts: list[str]) -> list[BM25Stats]:
+        """
+        Get the BM25 corpus statistics of this store for several queries.
+
+        Args:
+            query_texts: The query texts
+
+        Returns:
+            One BM25Stats per query (empty without a lexical index)
+        """
+        if self.lexical_index is None:
+            return [BM25Stats() for _ in query_texts]
+        return [self.lexical_index.stats(text) for text in query_texts]
 
     def delete(self, doc_id: str) -> bool:
         """
@@ -302,46 +1127,133 @@ class VectorStore:
         Returns:
             True if the document was found and deleted
         """
-        if doc_id not in self._documents:
-            return False
+        return self.delete_many([doc_id]) > 0
+
+    def delete_many(self, doc_ids: list[str]) -> int:
+        """
+        Delete several documents with a single write to disk.
 
-        # Remove from documents
-        del self._documents[doc_id]
+        Rows are tombstoned rather than removed: each delete is O(1), and
+        the matrix is only rebuilt once enough rows are dead (see
+        compact_threshold).
 
-        # Rebuild embeddings array (not the most efficient, but simple)
-        self._rebuild_embeddings()
+        Args:
+            doc_ids: The document IDs to delete
 
+        Returns:
+            Number of documents found and deleted
+        """
+        deleted = 0
+        for doc_id in doc_ids:
+            if doc_id not in self._documents:
+                continue
+
+            del self._documents[doc_id]
+            row = self._id_to_index.pop(doc_id)
+            self._row_ids[row] = None
+            self._live[row] = False
+            self._metadata_index.remove(row)
+            if self.lexical_index is not None:
+                self.lexical_index.remove(row)
+            self._dead += 1
+
+            self._pending_adds.pop(doc_id, None)
+            self._pending_deletes.add(doc_id)
+            deleted += 1
+
+        if not deleted:
+            return 0
+
+        self._generation += 1
         self._save()
-        return True
 
-    def _rebuild_embeddings(self) -> None:
-        """Rebuild the embeddings array from documents."""
+        if self._dead >= self.compact_threshold * self._row_count:
+            self._compact_rows()
+
+        return deleted
+
+    def _compact_rows(self) -> None:
+        """
+        Drop deleted rows, renumbering the live ones 0..n-1.
+
+        The in-memory rows are packed in one vectorized pass; the segment
+        files are compacted in a background thread.
+        """
         if not self._documents:
-            self._embeddings = None
-            self._id_to_index = {}
+            self._reset_rows()
+            self._log.compact_in_background()
             return
 
-        embeddings_list = []
-        self._id_to_index = {}
+        live_rows = np.flatnonzero(self._live_mask)
+        self._row_ids = self._row_ids[live_rows]
+        self._row_count = len(live_rows)
+        self._live = np.ones(self._row_count, dtype=bool)
+        self._id_to_index = {doc_id: i for i, doc_id in enumerate(self._row_ids.tolist())}
+        logger.debug(f"Compacted {self._dead} deleted rows")
+        self._dead = 0
+
+        self._storage.keep(live_rows)
+        self._metadata_index.rebuild(
+            [self._documents[doc_id].metadata for doc_id in self._row_ids]
+        )
+        if self.lexical_index is not None:
+            self.lexical_index.rebuild(
+                [self._documents[doc_id].content for doc_id in self._row_ids]
+            )
 
-        for i, (doc_id, doc) in enumerate(self._documents.items()):
-            embeddings_list.append(doc.embedding)
-            self._id_to_index[doc_id] = i
+        if self.index is not None:
+            self.index.rebuild(self._storage)
 
-        self._embeddings = np.array(embeddings_list)
+        self._log.compact_in_background()
 
     def get(self, doc_id: str) -> VectorDocument | None:
         """Get a document by ID."""
-        return self._documents.get(doc_id)
+        row = self._id_to_index.get(doc_id)
+        return self._materialize(np.array([row]))[0] if row is not None else None
+
+    def get_metadata(self, doc_id: str) -> dict[str, Any] | None:
+        """Get a document's metadata by ID (without materializing its embedding)."""
+        doc = self._documents.get(doc_id)
+        return doc.metadata if doc is not None else None
+
+    def find_covering(self, ts: float, channel: str | None = None) -> list[str]:
+        """
+        Find the documents whose message span contains a timestamp.
+
+        A single-message document covers only its own ts; a window of
+        messages covers ts .. ts_end (see chunking.py).
+
+        Args:
+            ts: Slack timestamp as epoch seconds
+            channel: Only documents from this channel
+
+        Returns:
+            Matching document IDs
+        """
+        rows = self._metadata_index.covering(ts, {"channel": channel})
+        doc_ids: list[str] = self._row_ids[rows].tolist()
+        return doc_ids
 
     def clear(self) -> None:
         """Clear all documents from the store."""
-        self._documents.clear()
-        self._embeddings = None
-        self._id_to_index.clear()
-        self._save()
+        self._reset_rows()
+        self._pending_adds.clear()
+        self._pending_deletes.clear()
+        self._log.clear()
         logger.info("Vector store cleared")
 
+    def compact(self) -> None:
+        """Start background compaction of the on-disk segments."""
+        self._log.compact_in_background()
+
+    def wait_for_compaction(self, timeout: float | None = None) -> None:
+        """Block until a running background compaction finishes."""
+        self._log.wait_for_compaction(timeout)
+
     def __len__(self) -> int:
         """Get the number of documents in the store."""
         return len(self._documents)
+
+    def __contains__(self, doc_id: str) -> bool:
+        """Check whether a document ID is stored."""
+        return doc_id in self._documents
@@ -7,7 +7,8 @@ Handles Slack events and routes them to the agent.
 Event Types:
 - app_mention: When someone mentions @MiniClawd in a channel
 - message.im: Direct messages to the bot
-- message.channels: Messages in channels (if subscribed)
+- message.channels: Messages in channels (if subscribed) - indexed for
+  RAG search as they arrive, including edits and deletes
 
 Handler Pattern:
     1. Receive event from Slack
@@ -132,14 +133,20 @@ async def _handle_message(
     DM conversations have access to full memory context and
     personal information (unlike channel mentions).
 
+    Channel messages (including edits and deletes) are not answered;
+    they are handed to the RAG live indexer so they become searchable
+    right away.
+
     Args:
         event: The Slack event data
         say: Function to send messages
         client: Slack API client
         ack: Acknowledge function
     """
-    # Only handle DMs (channel_type == "im")
+    # Only handle DMs (channel_type == "im"); index everything else
     if event.get("channel_type") != "im":
+        if _agent is not None and _agent.rag is not None:
+            _agent.rag.handle_message_event(event)
         return
 
     # Ignore bot messages (including our own)
@@ -28,6 +28,7 @@ import uuid
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
 from src.tools import MCPTool, ToolResult, tool_registry
 from src.utils.config import get_config
@@ -304,6 +305,39 @@ class TaskScheduler:
             replace_existing=True
         )
 
+    def schedule_interval(
+        self,
+        job_id: str,
+        func: Callable[[], Awaitable[object]],
+        interval: timedelta,
+        first_run: datetime | None = None
+    ) -> None:
+        """
+        Run an internal coroutine at a fixed interval.
+
+        Unlike user tasks, interval jobs are not persisted - the component
+        that owns them re-registers them on startup.
+
+        Args:
+            job_id: Unique job ID (an existing job with this ID is replaced)
+            func: Async function to run (its result is ignored)
+            interval: Time between runs
+            first_run: When to run first (defaults to one interval from now)
+        """
+        self.scheduler.add_job(
+            func,
+            trigger=IntervalTrigger(
+                seconds=interval.total_seconds(),
+                start_date=first_run or datetime.now() + interval
+            ),
+            id=job_id,
+            replace_existing=True,
+            # A slow run delays the next one instead of overlapping it
+            max_instances=1,
+            coalesce=True
+        )
+        logger.info(f"Scheduled interval job {job_id} every {interval}")
+
     def cancel_task(self, task_id: str) -> bool:
         """
         Cancel a scheduled task.
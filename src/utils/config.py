@@ -148,7 +148,50 @@ class RAGConfig:
     """RAG (Retrieval Augmented Generation) configuration."""
     messages_per_channel: int   # Max messages to index per channel
     index_frequency_hours: int  # How often to re-index
-    min_message_length: int     # Min length to include in index
+    backfill_days: int          # Deep-history backfill on startup (0 = off)
+    index_fetch_concurrency: int  # Channels fetched from Slack in parallel
+    index_embed_concurrency: int  # Channels embedded in parallel
+    index_queue_size: int       # Max channels waiting between pipeline stages
+    index_flush_size: int       # Documents buffered per vector store write
+    reindex_stagger_seconds: int  # Pause between channel groups when re-indexing
+    live_index: bool            # Index channel messages from Slack events as they arrive
+    live_index_window_ms: int   # Window for batching live message events
+    live_index_batch_size: int  # Queued live events that trigger an immediate flush
+    min_message_length: int     # Min document length to include in index
+    chunk_window_chars: int     # Max chars per conversation/thread window (0 = one doc per message)
+    chunk_standalone_chars: int # Messages at least this long are their own document
+    chunk_overlap: int          # Messages shared by consecutive windows
+    chunk_max_gap_minutes: int  # Longest pause inside a conversation window
+    index_threads: bool         # Index thread replies (conversations.replies)
+    dedup_threshold_percent: int  # Similarity at which near-duplicate messages collapse (0 = off)
+    ann_index: str              # "exact" (brute force) or "ivf" (approximate)
+    ann_nprobe: int             # IVF lists scanned per query
+    vector_compression: str     # "none" (float32) or "int8" (4x smaller in RAM)
+    rerank_factor: int          # Compressed search: exact-rerank top_k * factor
+    shard_by: str               # "none" (one store), "channel" or "hash" partitions
+    shard_count: int            # Number of shards with shard_by=hash
+    max_loaded_shards: int      # Shards kept in RAM at once (0 = no limit)
+    shard_search_threads: int   # Threads searching shards in parallel
+    search_mode: str            # "hybrid" (BM25 + semantic) or "dense" (semantic only)
+    compact_dead_percent: int   # Deleted-row percentage that triggers compaction
+    query_cache_size: int       # Cached search results (0 = no query cache)
+    query_cache_similarity_percent: int  # Cosine % to reuse a similar query (0 = exact only)
+    query_cache_ttl_minutes: int  # Cached result lifetime (0 = until the store changes)
+    ranking_mode: str           # "recency" (similarity * recency decay) or "similarity"
+    recency_half_life_hours: int  # Age at which the recency boost halves
+    recency_floor_percent: int  # Recency weight of very old messages
+    channel_boosts: str         # "CHANNEL_ID:multiplier,..." score boosts
+    max_age_days: int           # Skip messages older than this (0 = no limit)
+    embedding_cache_mb: int     # Persistent embedding cache size (0 = memory only)
+    embedding_memory_cache_mb: int  # In-memory embedding cache size
+    embedding_cache_ttl_hours: int  # In-memory cache entry lifetime (0 = no expiry)
+    embedding_batch_size: int   # Max texts per embedding request
+    embedding_batch_tokens: int # Max estimated tokens per embedding request
+    embedding_concurrency: int  # Max embedding requests in flight
+    embedding_max_retries: int  # Retries for 429/5xx embedding responses
+    embedding_batch_window_ms: int  # Window for merging concurrent embedding calls
+    embedding_backend: str      # "openai" (API) or "local" (in-process hashing encoder)
+    embedding_local_dim: int    # Vector dimension of the local backend
 
 
 @dataclass(frozen=True)
@@ -225,7 +268,54 @@ def load_config() -> Config:
         rag=RAGConfig(
             messages_per_channel=_optional_int("RAG_MESSAGES_PER_CHANNEL", 200),
             index_frequency_hours=_optional_int("RAG_INDEX_FREQUENCY_HOURS", 6),
+            backfill_days=_optional_int("RAG_BACKFILL_DAYS", 0),
+            index_fetch_concurrency=_optional_int("RAG_INDEX_FETCH_CONCURRENCY", 4),
+            index_embed_concurrency=_optional_int("RAG_INDEX_EMBED_CONCURRENCY", 2),
+            index_queue_size=_optional_int("RAG_INDEX_QUEUE_SIZE", 8),
+            index_flush_size=_optional_int("RAG_INDEX_FLUSH_SIZE", 1000),
+            reindex_stagger_seconds=_optional_int("RAG_REINDEX_STAGGER_SECONDS", 30),
+            live_index=_optional_bool("RAG_LIVE_INDEX", True),
+            live_index_window_ms=_optional_int("RAG_LIVE_INDEX_WINDOW_MS", 1000),
+            live_index_batch_size=_optional_int("RAG_LIVE_INDEX_BATCH_SIZE", 100),
             min_message_length=_optional_int("RAG_MIN_MESSAGE_LENGTH", 10),
+            chunk_window_chars=_optional_int("RAG_CHUNK_WINDOW_CHARS", 0),
+            chunk_standalone_chars=_optional_int("RAG_CHUNK_STANDALONE_CHARS", 200),
+            chunk_overlap=_optional_int("RAG_CHUNK_OVERLAP", 1),
+            chunk_max_gap_minutes=_optional_int("RAG_CHUNK_MAX_GAP_MINUTES", 10),
+            index_threads=_optional_bool("RAG_INDEX_THREADS", False),
+            dedup_threshold_percent=_optional_int("RAG_DEDUP_THRESHOLD_PERCENT", 0),
+            ann_index=_optional("RAG_ANN_INDEX", "exact").lower(),
+            ann_nprobe=_optional_int("RAG_ANN_NPROBE", 8),
+            vector_compression=_optional("RAG_VECTOR_COMPRESSION", "none").lower(),
+            rerank_factor=_optional_int("RAG_RERANK_FACTOR", 4),
+            shard_by=_optional("RAG_SHARD_BY", "none").lower(),
+            shard_count=_optional_int("RAG_SHARD_COUNT", 16),
+            max_loaded_shards=_optional_int("RAG_MAX_LOADED_SHARDS", 0),
+            shard_search_threads=_optional_int("RAG_SHARD_SEARCH_THREADS", 4),
+            search_mode=_optional("RAG_SEARCH_MODE", "dense").lower(),
+            compact_dead_percent=_optional_int("RAG_COMPACT_DEAD_PERCENT", 25),
+            query_cache_size=_optional_int("RAG_QUERY_CACHE_SIZE", 256),
+            query_cache_similarity_percent=_optional_int("RAG_QUERY_CACHE_SIMILARITY_PERCENT", 95),
+            # Defaults to a tenth of the recency half-life
+            query_cache_ttl_minutes=_optional_int(
+                "RAG_QUERY_CACHE_TTL_MINUTES",
+                _optional_int("RAG_RECENCY_HALF_LIFE_HOURS", 168) * 6
+            ),
+            ranking_mode=_optional("RAG_RANKING_MODE", "recency").lower(),
+            recency_half_life_hours=_optional_int("RAG_RECENCY_HALF_LIFE_HOURS", 168),
+            recency_floor_percent=_optional_int("RAG_RECENCY_FLOOR_PERCENT", 50),
+            channel_boosts=_optional("RAG_CHANNEL_BOOSTS", ""),
+            max_age_days=_optional_int("RAG_MAX_AGE_DAYS", 0),
+            embedding_cache_mb=_optional_int("RAG_EMBEDDING_CACHE_MB", 512),
+            embedding_memory_cache_mb=_optional_int("RAG_EMBEDDING_MEMORY_CACHE_MB", 64),
+            embedding_cache_ttl_hours=_optional_int("RAG_EMBEDDING_CACHE_TTL_HOURS", 0),
+            embedding_batch_size=_optional_int("RAG_EMBEDDING_BATCH_SIZE", 256),
+            embedding_batch_tokens=_optional_int("RAG_EMBEDDING_BATCH_TOKENS", 100_000),
+            embedding_concurrency=_optional_int("RAG_EMBEDDING_CONCURRENCY", 4),
+            embedding_max_retries=_optional_int("RAG_EMBEDDING_MAX_RETRIES", 5),
+            embedding_batch_window_ms=_optional_int("RAG_EMBEDDING_BATCH_WINDOW_MS", 5),
+            embedding_backend=_optional("RAG_EMBEDDING_BACKEND", "openai"),
+            embedding_local_dim=_optional_int("RAG_EMBEDDING_LOCAL_DIM", 512),
         ),
         memory=MemoryConfig(
             directory=project_root / _optional("MEMORY_DIR", "memory"),